@@ -0,0 +1,189 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# ==============================================
+# 🗄️ ALMACÉN DE PDFs POR CONTENIDO (SHA-256)
+# ==============================================
+# Cada PDF subido se guarda una sola vez en uploads/.cas/<ab>/<sha256>.pdf
+# y las carpetas de los scripts tienen hardlinks a ese objeto con el nombre
+# que le dio el usuario. Así, la misma factura subida con otro nombre (o a
+# otra carpeta) no ocupa disco dos veces, y si ya está en la carpeta del
+# script no se agrega: el script la procesa una sola vez. Un objeto sin
+# enlaces (nadie lo usa ya) se elimina al recolectar, pero nunca durante una
+# subida: entre guardar un objeto y enlazarlo en su carpeta (lotes enteros,
+# clasificación con OCR) también tiene un solo enlace. Las subidas en curso
+# se cuentan en memoria, como el resto del estado de la app (un solo worker).
+TAMANO_BLOQUE = 1024 * 1024
+ANTIGUEDAD_TEMPORALES = 3600  # segundos: subidas interrumpidas que quedaron a medias
+
+
+def sha256_archivo(ruta):
+    """SHA-256 del contenido de un archivo, leído por bloques"""
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(TAMANO_BLOQUE), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+class ArchivoEntrante:
+    """Temporal de una subida que calcula su SHA-256 mientras se escribe por bloques"""
+
+    def __init__(self, directorio):
+        self._archivo = tempfile.NamedTemporaryFile(dir=directorio, prefix="subida_", suffix=".tmp")
+        self._sha = hashlib.sha256()
+        self.tamano = 0
+
+    def write(self, datos):
+        self._sha.update(datos)
+        self.tamano += len(datos)
+        return self._archivo.write(datos)
+
+    @property
+    def sha256(self):
+        return self._sha.hexdigest()
+
+    def __getattr__(self, nombre):
+        # read, seek, flush, close, name... los atiende el temporal
+        return getattr(self._archivo, nombre)
+
+
+class AlmacenContenido:
+    """Objetos PDF direccionados por su SHA-256, compartidos por hardlink"""
+
+    def __init__(self, raiz):
+        self.raiz = raiz
+        self.temporales = os.path.join(raiz, "tmp")
+        os.makedirs(self.temporales, exist_ok=True)
+        self._candado = threading.Lock()
+        self._subidas = 0
+
+    @contextmanager
+    def subida(self):
+        """Marca una subida en curso: mientras dure, recolectar no elimina objetos"""
+        with self._candado:
+            self._subidas += 1
+        try:
+            yield self
+        finally:
+            with self._candado:
+                self._subidas -= 1
+
+    def nuevo_entrante(self):
+        """Temporal dentro del almacén (mismo sistema de archivos, se puede enlazar sin copiar)"""
+        return ArchivoEntrante(self.temporales)
+
+    def ruta(self, sha):
+        return os.path.join(self.raiz, sha[:2], f"{sha}.pdf")
+
+    def guardar(self, entrante):
+        """Incorpora un ArchivoEntrante ya escrito; devuelve (ruta del objeto, si es nuevo)"""
+        entrante.flush()
+        ruta = self.ruta(entrante.sha256)
+        if os.path.exists(ruta):
+            return ruta, False
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        try:
+            os.link(entrante.name, ruta)
+        except FileExistsError:
+            # Otra subida simultánea del mismo contenido llegó primero
+            return ruta, False
+        return ruta, True
+
+    def guardar_stream(self, stream):
+        """Copia un stream binario al almacén por bloques; devuelve (ruta, si es nuevo, sha256, tamaño)"""
+        entrante = self.nuevo_entrante()
+        try:
+            for bloque in iter(lambda: stream.read(TAMANO_BLOQUE), b""):
+                entrante.write(bloque)
+            ruta, nuevo = self.guardar(entrante)
+            return ruta, nuevo, entrante.sha256, entrante.tamano
+        finally:
+            entrante.close()
+
+    def recolectar(self):
+        """Elimina los objetos que ya no enlaza ninguna carpeta y los temporales abandonados.
+
+        Devuelve cuántos objetos se eliminaron (0 si hay una subida en curso:
+        sus objetos aún no están enlazados y se recolecta en la próxima).
+        """
+        with self._candado:
+            if self._subidas:
+                return 0
+            return self._recolectar()
+
+    def _recolectar(self):
+        eliminados = 0
+        for raiz, _, nombres in os.walk(self.raiz):
+            for nombre in nombres:
+                ruta = os.path.join(raiz, nombre)
+                try:
+                    info = os.stat(ruta)
+                    if raiz == self.temporales:
+                        if time.time() - info.st_mtime > ANTIGUEDAD_TEMPORALES:
+                            os.unlink(ruta)
+                    elif info.st_nlink == 1:
+                        os.unlink(ruta)
+                        eliminados += 1
+                except FileNotFoundError:
+                    continue
+        return eliminados
+
+
+class IndiceCarpeta:
+    """PDFs de una carpeta por tamaño, para saber si un contenido ya está en ella.
+
+    Un PDF de la carpeta es el mismo documento si es un enlace al objeto del
+    almacén (mismo inodo) o, si llegó por otra vía, si su SHA-256 coincide.
+    Solo se calcula el hash de los archivos con el mismo tamaño. El índice
+    vive lo que una subida: `subidos` son los nombres que ella escribió.
+    """
+
+    def __init__(self, carpeta):
+        self.carpeta = carpeta
+        self._por_tamano = {}
+        self._hashes = {}
+        self.subidos = set()
+        for nombre in os.listdir(carpeta):
+            ruta = os.path.join(carpeta, nombre)
+            if nombre.lower().endswith(".pdf") and os.path.isfile(ruta):
+                self.agregar(nombre)
+
+    def agregar(self, nombre):
+        info = os.stat(os.path.join(self.carpeta, nombre))
+        self.quitar(nombre)
+        self._por_tamano.setdefault(info.st_size, {})[nombre] = (info.st_dev, info.st_ino)
+
+    def quitar(self, nombre):
+        for nombres in self._por_tamano.values():
+            nombres.pop(nombre, None)
+        self._hashes.pop(nombre, None)
+
+    def nombre_libre(self, nombre):
+        """`nombre`, o "nombre (2).pdf", "(3)"... si esta subida ya escribió un PDF con ese nombre"""
+        if nombre not in self.subidos:
+            return nombre
+        base, extension = os.path.splitext(nombre)
+        n = 2
+        while (f"{base} ({n}){extension}" in self.subidos
+               or os.path.exists(os.path.join(self.carpeta, f"{base} ({n}){extension}"))):
+            n += 1
+        return f"{base} ({n}){extension}"
+
+    def buscar(self, ruta_objeto, sha, tamano):
+        """Nombre del PDF de la carpeta con el mismo contenido (o None)"""
+        info = os.stat(ruta_objeto)
+        candidatos = self._por_tamano.get(tamano, {})
+        for nombre, inodo in candidatos.items():
+            if inodo == (info.st_dev, info.st_ino):
+                return nombre
+        for nombre in candidatos:
+            if nombre not in self._hashes:
+                self._hashes[nombre] = sha256_archivo(os.path.join(self.carpeta, nombre))
+            if self._hashes[nombre] == sha:
+                return nombre
+        return None
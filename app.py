@@ -1,8 +1,22 @@
-from flask import Flask, jsonify, render_template, request, send_from_directory
+from flask import Flask, Request, Response, jsonify, render_template, request, send_from_directory
+import json
 import os
 import subprocess
-import shutil
+import tempfile
+import threading
 import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+from almacen import AlmacenContenido, ArchivoEntrante, IndiceCarpeta
+from clasificador import clasificar_pdf
+from descarga_zip import PlanZip, huella_archivos
+from espacios import EspaciosResultados, enlazar
+from ingesta import ERRORES_LOTE, enrutar, miembros_pdf
+from motor import VARIABLE_PROGRESO, LectorProgreso, MotorScripts
+from pipeline import ETAPAS_PIPELINE, EjecucionPipeline, vincular_pdfs
+from trabajos import ESTADO_COMPLETADO, ESTADO_ERROR, ColaTrabajos
 
 # ==============================================
 # 🔧 CONFIGURACIÓN PRINCIPAL
@@ -26,10 +40,68 @@ EXPECTED_SCRIPTS = [
     "6 CE COMBINADO.py"
 ]
 
+def carpeta_script(filename):
+    """Nombre de la subcarpeta de uploads asociada a un script"""
+    return filename.split(".py")[0].replace(" ", "_").replace(".", "_")
+
 # Crear subcarpetas dentro de uploads (una por script)
 for script in EXPECTED_SCRIPTS:
-    folder_name = script.split(".py")[0].replace(" ", "_").replace(".", "_")
-    os.makedirs(os.path.join(UPLOADS_PATH, folder_name), exist_ok=True)
+    os.makedirs(os.path.join(UPLOADS_PATH, carpeta_script(script)), exist_ok=True)
+
+# 🗄️ PDFs subidos, una copia por contenido (ver almacen.py)
+almacen = AlmacenContenido(os.path.join(UPLOADS_PATH, ".cas"))
+
+
+class SolicitudConAlmacen(Request):
+    """Los archivos de una subida se escriben por bloques directo en el almacén, calculando su SHA-256"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return almacen.nuevo_entrante()
+
+
+app.request_class = SolicitudConAlmacen
+
+# 🧵 Cola de trabajos: los scripts corren fuera del worker web.
+# El estado vive en memoria del proceso, así que con gunicorn se debe usar
+# un solo worker con varios hilos (p. ej. --workers 1 --threads 8).
+# Cada ejecución publica en su propia carpeta; un mismo script no corre dos veces a la vez
+# (comparte su carpeta de uploads), pero scripts distintos sí.
+MAX_TRABAJOS_SIMULTANEOS = int(os.environ.get("MAX_TRABAJOS_SIMULTANEOS", 2))
+cola_trabajos = ColaTrabajos(max_trabajos=MAX_TRABAJOS_SIMULTANEOS)
+
+# 🔀 Pipeline completo (ver pipeline.ETAPAS_PIPELINE): hasta MAX_ETAPAS_PARALELAS etapas a la vez
+MAX_ETAPAS_PARALELAS = int(os.environ.get("MAX_ETAPAS_PARALELAS", 2))
+MAX_PIPELINES_HISTORIAL = 50
+_pipelines = OrderedDict()
+_pipelines_lock = threading.Lock()
+
+# 🔒 Un candado por script: protege su carpeta de uploads mientras corre y publica
+_candados_script = {script: threading.Lock() for script in EXPECTED_SCRIPTS}
+
+# 🔥 Modo de ejecución: "pool" (procesos precalentados) o "subproceso" (un python por ejecución)
+MODO_EJECUCION = os.environ.get("MODO_EJECUCION", "pool")
+# Un proceso por rama del pipeline para que las dos corran de verdad en paralelo
+MAX_PROCESOS_MOTOR = int(os.environ.get("MAX_PROCESOS_MOTOR", max(MAX_TRABAJOS_SIMULTANEOS, MAX_ETAPAS_PARALELAS)))
+TIMEOUT_SCRIPT = 300  # 5 minutos máximo
+INTERVALO_PROGRESO = 0.5  # segundos entre lecturas de los eventos del script
+
+_motor = None
+_motor_lock = threading.Lock()
+
+
+def obtener_motor():
+    """Crea (una sola vez) el pool de procesos que ejecuta los scripts en caliente"""
+    global _motor
+    with _motor_lock:
+        if _motor is None:
+            _motor = MotorScripts(EXPECTED_SCRIPTS, max_procesos=MAX_PROCESOS_MOTOR)
+            _motor.precalentar()
+        return _motor
+
+
+# Precalentar al importar la app (gunicorn) sin repetirlo en procesos hijos "spawn"
+if MODO_EJECUCION == "pool" and __name__ != "__mp_main__":
+    obtener_motor()
 
 # ==============================================
 # 🌐 RUTA PRINCIPAL
@@ -52,13 +124,75 @@ def check_files():
 # ==============================================
 # 📤 SUBIR PDFs
 # ==============================================
+# Subcarpetas de entrada de cada script (las que llena el pipeline); un lote puede traerlas
+SUBCARPETAS_ENTRADA = {etapa.script: list(etapa.entradas.values()) for etapa in ETAPAS_PIPELINE}
+
+
+def guardar_en_almacen(stream):
+    """Incorpora al almacén un archivo subido o un stream; devuelve (ruta del objeto, si es nuevo, sha256, tamaño)"""
+    if isinstance(stream, ArchivoEntrante):
+        ruta_objeto, nuevo = almacen.guardar(stream)
+        return ruta_objeto, nuevo, stream.sha256, stream.tamano
+    return almacen.guardar_stream(stream)
+
+
+# Clasificación por SHA-256: los objetos del almacén no cambian, el mismo PDF se clasifica una vez
+MAX_CLASIFICACIONES = 4096
+_clasificaciones = OrderedDict()
+_clasificaciones_lock = threading.Lock()
+
+
+def clasificar_objeto(ruta_objeto, sha, ocr=True):
+    """clasificador.clasificar_pdf de un objeto del almacén, recordado por su SHA-256"""
+    with _clasificaciones_lock:
+        previa = _clasificaciones.get(sha)
+        # Un escaneado clasificado sin OCR puede reconocerse ahora con OCR
+        if previa and (previa["tipo"] or previa["fuente"] == "ocr" or not ocr):
+            _clasificaciones.move_to_end(sha)
+            return previa
+    clasificacion = clasificar_pdf(ruta_objeto, ocr=ocr)
+    if not clasificacion["error"]:
+        with _clasificaciones_lock:
+            _clasificaciones[sha] = clasificacion
+            while len(_clasificaciones) > MAX_CLASIFICACIONES:
+                _clasificaciones.popitem(last=False)
+    return clasificacion
+
+
+def agregar_a_carpeta(indice, nombre, ruta_objeto, sha, tamano):
+    """Enlaza un objeto del almacén en la carpeta del índice con `nombre`; devuelve (nombre, igual_a).
+
+    Si la carpeta ya tiene el mismo contenido (con este u otro nombre) no se
+    agrega e igual_a es el nombre del PDF existente. Otro PDF con el mismo
+    nombre en la misma subida (a/z.pdf y b/z.pdf) no se pisa: se guarda como
+    "z (2).pdf".
+    """
+    igual_a = indice.buscar(ruta_objeto, sha, tamano)
+    if igual_a:
+        return nombre, igual_a
+    nombre = indice.nombre_libre(nombre)
+    enlazar(ruta_objeto, os.path.join(indice.carpeta, nombre))
+    indice.agregar(nombre)
+    indice.subidos.add(nombre)
+    return nombre, None
+
+
+def mensaje_omitidos(duplicados, renombrados):
+    """Sufijo del mensaje de una subida con los duplicados omitidos y los PDFs renombrados"""
+    partes = []
+    if duplicados:
+        partes.append(f"{len(duplicados)} duplicado(s) omitido(s)")
+    if renombrados:
+        partes.append(f"{len(renombrados)} renombrado(s) por nombre repetido")
+    return f" ({', '.join(partes)})" if partes else ""
+
+
 @app.route("/upload-pdfs1/<filename>", methods=["POST"])
 def upload_pdfs(filename):
     if filename not in EXPECTED_SCRIPTS:
         return jsonify({"error": f"❌ Proceso '{filename}' no reconocido"}), 404
 
-    folder_name = filename.split(".py")[0].replace(" ", "_").replace(".", "_")
-    target_folder = os.path.join(UPLOADS_PATH, folder_name)
+    target_folder = os.path.join(UPLOADS_PATH, carpeta_script(filename))
     os.makedirs(target_folder, exist_ok=True)
 
     if "pdfFiles" not in request.files:
@@ -66,171 +200,706 @@ def upload_pdfs(filename):
 
     files = request.files.getlist("pdfFiles")
     saved = []
+    duplicados = []
+    renombrados = []
+    advertencias = []
+    reutilizados = 0
+    almacen.recolectar()
+    indice = IndiceCarpeta(target_folder)
 
-    for file in files:
-        if file.filename.lower().endswith(".pdf"):
-            save_path = os.path.join(target_folder, file.filename)
-            file.save(save_path)
-            saved.append(file.filename)
+    with almacen.subida():
+        for file in files:
+            # Solo el nombre: el navegador puede mandar rutas relativas
+            nombre = os.path.basename(file.filename.replace("\\", "/"))
+            if not nombre.lower().endswith(".pdf"):
+                continue
+            ruta_objeto, nuevo, sha, tamano = guardar_en_almacen(file.stream)
 
-    if not saved:
+            guardado, igual_a = agregar_a_carpeta(indice, nombre, ruta_objeto, sha, tamano)
+            if igual_a:
+                duplicados.append({"archivo": nombre, "igual_a": igual_a})
+                continue
+            if guardado != nombre:
+                renombrados.append({"archivo": file.filename, "guardado_como": guardado})
+            saved.append(guardado)
+            reutilizados += not nuevo
+
+            # 🧭 Aviso si el documento parece de otro proceso (solo capa de texto: sin OCR en esta ruta)
+            clasificacion = clasificar_objeto(ruta_objeto, sha, ocr=False)
+            if clasificacion["script"] and clasificacion["script"] != filename:
+                advertencias.append({"archivo": guardado, "tipo": clasificacion["tipo"], "script": clasificacion["script"]})
+
+    if not saved and not duplicados:
         return jsonify({"error": "⚠ No se encontraron archivos PDF válidos"}), 400
 
+    mensaje = f"✅ {len(saved)} archivo(s) subido(s) correctamente para {filename}"
+    mensaje += mensaje_omitidos(duplicados, renombrados)
+    return jsonify({
+        "message": mensaje,
+        "saved_files": saved,
+        "duplicados": duplicados,
+        "renombrados": renombrados,
+        "advertencias": advertencias,
+        "reutilizados": reutilizados
+    })
+
+# ==============================================
+# 📦 SUBIR UN LOTE ZIP/TAR
+# ==============================================
+@app.route("/upload-lote/<filename>", methods=["POST"])
+def upload_lote(filename):
+    """Extrae los PDFs de un ZIP/TAR en la carpeta del script y sus subcarpetas de entrada.
+
+    El lote llega en el campo 'lote' de un formulario multipart o como cuerpo
+    crudo de la petición (un TAR crudo se extrae mientras se recibe).
+    """
+    if filename not in EXPECTED_SCRIPTS:
+        return jsonify({"error": f"❌ Proceso '{filename}' no reconocido"}), 404
+
+    if request.mimetype == "multipart/form-data":
+        if "lote" not in request.files:
+            return jsonify({"error": "⚠ No se envió el lote (campo 'lote' vacío)"}), 400
+        stream = request.files["lote"].stream
+    else:
+        stream = request.stream
+
+    carpeta = carpeta_script(filename)
+    almacen.recolectar()
+    indices = {}
+    carpetas = OrderedDict()
+    duplicados = []
+    renombrados = []
+    error = None
+
+    with almacen.subida():
+        try:
+            for ruta, miembro in miembros_pdf(stream, almacen.temporales):
+                subcarpeta, nombre = enrutar(ruta, SUBCARPETAS_ENTRADA.get(filename, []))
+                destino = os.path.join(UPLOADS_PATH, carpeta, subcarpeta)
+                if subcarpeta not in indices:
+                    os.makedirs(destino, exist_ok=True)
+                    indices[subcarpeta] = IndiceCarpeta(destino)
+                ruta_objeto, _, sha, tamano = guardar_en_almacen(miembro)
+
+                guardado, igual_a = agregar_a_carpeta(indices[subcarpeta], nombre, ruta_objeto, sha, tamano)
+                if igual_a:
+                    duplicados.append({"archivo": ruta, "igual_a": "/".join(filter(None, [subcarpeta, igual_a]))})
+                    continue
+                if guardado != nombre:
+                    renombrados.append({"archivo": ruta, "guardado_como": "/".join(filter(None, [subcarpeta, guardado]))})
+                resumen = carpetas.setdefault("/".join(filter(None, [carpeta, subcarpeta])), {"archivos": 0, "bytes": 0})
+                resumen["archivos"] += 1
+                resumen["bytes"] += tamano
+        except ValueError as e:
+            return jsonify({"error": f"⚠ {e}"}), 400
+        except ERRORES_LOTE as e:
+            # Lote truncado o corrupto: se conserva lo extraído hasta ese punto
+            error = f"⚠ Lote incompleto o dañado: {e}"
+
+    extraidos = sum(resumen["archivos"] for resumen in carpetas.values())
+    if not extraidos and not duplicados:
+        return jsonify({"error": error or "⚠ El lote no contiene archivos PDF"}), 400
+
+    mensaje = f"✅ {extraidos} PDF(s) extraído(s) del lote para {filename}"
+    mensaje += mensaje_omitidos(duplicados, renombrados)
+    return jsonify({
+        "message": mensaje,
+        "carpetas": carpetas,
+        "duplicados": duplicados,
+        "renombrados": renombrados,
+        "error": error
+    })
+
+# ==============================================
+# 🧭 SUBIDA CON CLASIFICACIÓN AUTOMÁTICA
+# ==============================================
+@app.route("/upload-auto", methods=["POST"])
+def upload_auto():
+    """Sube PDFs (campo 'pdfFiles') o un lote ZIP/TAR (campo 'lote') sin elegir proceso.
+
+    Cada PDF se clasifica por su primera página (ver clasificador.py) y va a
+    la carpeta del script que lo procesa; los que no se reconocen no se
+    guardan y se informan en "sin_clasificar".
+    """
+    if "lote" in request.files:
+        entradas = miembros_pdf(request.files["lote"].stream, almacen.temporales)
+    elif "pdfFiles" in request.files:
+        entradas = ((file.filename, file.stream) for file in request.files.getlist("pdfFiles"))
+    else:
+        return jsonify({"error": "⚠ No se enviaron archivos (campos 'pdfFiles' o 'lote' vacíos)"}), 400
+
+    almacen.recolectar()
+    indices = {}
+    por_script = OrderedDict()
+    clasificados = []
+    sin_clasificar = []
+    duplicados = []
+    renombrados = []
+    error = None
+
+    with almacen.subida():
+        try:
+            for ruta, stream in entradas:
+                nombre = os.path.basename(ruta.replace("\\", "/"))
+                if not nombre.lower().endswith(".pdf"):
+                    continue
+                ruta_objeto, _, sha, tamano = guardar_en_almacen(stream)
+                clasificacion = clasificar_objeto(ruta_objeto, sha)
+                script = clasificacion["script"]
+                if not script:
+                    sin_clasificar.append({"archivo": ruta, "motivo": clasificacion["error"] or "tipo no reconocido"})
+                    continue
+
+                if script not in indices:
+                    carpeta = os.path.join(UPLOADS_PATH, carpeta_script(script))
+                    os.makedirs(carpeta, exist_ok=True)
+                    indices[script] = IndiceCarpeta(carpeta)
+                guardado, igual_a = agregar_a_carpeta(indices[script], nombre, ruta_objeto, sha, tamano)
+                if igual_a:
+                    duplicados.append({"archivo": ruta, "script": script, "igual_a": igual_a})
+                    continue
+                if guardado != nombre:
+                    renombrados.append({"archivo": ruta, "script": script, "guardado_como": guardado})
+                clasificados.append({"archivo": ruta, "tipo": clasificacion["tipo"], "script": script,
+                                     "fuente": clasificacion["fuente"]})
+                resumen = por_script.setdefault(script, {"archivos": 0, "bytes": 0})
+                resumen["archivos"] += 1
+                resumen["bytes"] += tamano
+        except ValueError as e:
+            return jsonify({"error": f"⚠ {e}"}), 400
+        except ERRORES_LOTE as e:
+            error = f"⚠ Lote incompleto o dañado: {e}"
+
+    if not clasificados and not duplicados and not sin_clasificar:
+        return jsonify({"error": error or "⚠ No se encontraron archivos PDF válidos"}), 400
+
+    mensaje = f"✅ {len(clasificados)} PDF(s) clasificado(s) y enviado(s) a su proceso"
+    if sin_clasificar:
+        mensaje += f", {len(sin_clasificar)} sin clasificar"
+    mensaje += mensaje_omitidos(duplicados, renombrados)
     return jsonify({
-        "message": f"✅ {len(saved)} archivo(s) subido(s) correctamente para {filename}",
-        "saved_files": saved
+        "message": mensaje,
+        "scripts": por_script,
+        "clasificados": clasificados,
+        "sin_clasificar": sin_clasificar,
+        "duplicados": duplicados,
+        "renombrados": renombrados,
+        "error": error
     })
 
 # ==============================================
 # ⚙️ EJECUTAR SCRIPT Y GUARDAR RESULTADO EN DESCARGAS
 # ==============================================
+def obtener_resultado_path():
+    """Carpeta donde se publican los resultados según el entorno"""
+    if os.name == "nt":  # Windows local
+        return os.path.join(os.path.expanduser("~"), "Downloads", "resultado")
+    return "/tmp/resultado"  # Render o Linux
+
+
+# 🗃️ Una carpeta por ejecución dentro de la de resultados (ver espacios.py).
+# Se eliminan pasadas RESULTADOS_TTL_HORAS o si superan RESULTADOS_CUOTA_MB.
+RESULTADOS_TTL_HORAS = float(os.environ.get("RESULTADOS_TTL_HORAS", 24))
+RESULTADOS_CUOTA_MB = int(os.environ.get("RESULTADOS_CUOTA_MB", 1024))
+espacios = EspaciosResultados(
+    obtener_resultado_path(),
+    ttl_segundos=RESULTADOS_TTL_HORAS * 3600,
+    cuota_bytes=RESULTADOS_CUOTA_MB * 1024 * 1024
+)
+
+
+def correr_script(filename, upload_folder, al_progreso=None):
+    """Ejecuta un script sobre su carpeta (pool o subproceso); devuelve stdout, stderr y si terminó bien.
+
+    Mientras corre, cada evento de progreso que emite el script se pasa a
+    `al_progreso(evento)` (ver scripts/comun/progreso.py).
+    """
+    script_path = os.path.join(SCRIPTS_PATH, filename)
+    print(f"🚀 Ejecutando script: {script_path}")
+    print(f"📁 Carpeta de trabajo: {upload_folder}")
+
+    descriptor, ruta_progreso = tempfile.mkstemp(prefix="progreso_", suffix=".jsonl")
+    os.close(descriptor)
+    lector = LectorProgreso(ruta_progreso)
+    entorno = {VARIABLE_PROGRESO: ruta_progreso}
+    limite = time.monotonic() + TIMEOUT_SCRIPT
+
+    def relevar_progreso():
+        for evento in lector.leer():
+            if al_progreso:
+                al_progreso(evento)
+
+    try:
+        if MODO_EJECUCION == "pool":
+            motor = obtener_motor()
+            futuro = motor.enviar(filename, upload_folder, entorno)
+            while True:
+                try:
+                    ejecucion = futuro.result(timeout=INTERVALO_PROGRESO)
+                    break
+                except FuturesTimeoutError:
+                    relevar_progreso()
+                    if time.monotonic() > limite:
+                        # Se mata el proceso antes de soltar el candado del script: no sigue escribiendo en su carpeta
+                        motor.abortar(futuro)
+                        raise RuntimeError("⏱️ El proceso excedió el tiempo máximo de 5 minutos y se detuvo")
+            stdout, stderr, ok = ejecucion["stdout"], ejecucion["stderr"], ejecucion["ok"]
+        else:
+            # 🔥 PASAR LA CARPETA COMO ARGUMENTO AL SCRIPT
+            proceso = subprocess.Popen(
+                ["python", script_path, upload_folder],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                cwd=SCRIPTS_PATH,
+                env={**os.environ, **entorno}
+            )
+            while True:
+                try:
+                    stdout, stderr = proceso.communicate(timeout=INTERVALO_PROGRESO)
+                    break
+                except subprocess.TimeoutExpired:
+                    relevar_progreso()
+                    if time.monotonic() > limite:
+                        proceso.kill()
+                        proceso.communicate()
+                        raise RuntimeError("⏱️ El proceso excedió el tiempo máximo de 5 minutos y se detuvo")
+            ok = proceso.returncode == 0
+        relevar_progreso()
+    finally:
+        os.unlink(ruta_progreso)
+
+    print(f"📋 STDOUT del script:\n{stdout}")
+    if stderr:
+        print(f"📋 STDERR del script:\n{stderr}")
+    return {"stdout": stdout, "stderr": stderr, "ok": ok}
+
+
+EXTENSIONES_RESULTADO = (".pdf", ".xlsx", ".csv", ".xls")
+
+
+def firma_archivo(ruta):
+    """(inodo, mtime, tamaño): cambia si el archivo se crea, reescribe o reemplaza"""
+    info = os.stat(ruta)
+    return info.st_ino, info.st_mtime_ns, info.st_size
+
+
+def instantanea_resultados(upload_folder):
+    """Firma de los posibles archivos de resultado antes o después de correr un script.
+
+    Incluye la carpeta del script con sus subcarpetas (PDFs, Excel, CSV) y
+    el primer nivel de la carpeta de scripts (solo Excel y CSV).
+    """
+    rutas = []
+    for raiz, _, nombres in os.walk(upload_folder):
+        rutas.extend(os.path.join(raiz, n) for n in sorted(nombres) if n.lower().endswith(EXTENSIONES_RESULTADO))
+    if os.path.exists(SCRIPTS_PATH):
+        rutas.extend(
+            os.path.join(SCRIPTS_PATH, n) for n in sorted(os.listdir(SCRIPTS_PATH))
+            if n.lower().endswith((".xlsx", ".csv", ".xls")) and os.path.isfile(os.path.join(SCRIPTS_PATH, n))
+        )
+    instantanea = {}
+    for ruta in rutas:
+        try:
+            instantanea[ruta] = firma_archivo(ruta)
+        except FileNotFoundError:
+            pass
+    return instantanea
+
+
+def publicar_resultados(upload_folder, resultado_path, moved_files, antes):
+    """Publica en la carpeta de resultados solo lo que el script creó o modificó.
+
+    `antes` es la instantánea tomada al arrancar el script: las entradas sin
+    cambios y los Excel viejos de la carpeta de scripts no se publican. Los
+    archivos se enlazan (hardlink), sin copiar bytes; los de subcarpetas
+    conservan su ruta relativa (p. ej. FC_EMPRESA/x.pdf).
+    """
+    enlazados = copiados = 0
+    for ruta, firma in instantanea_resultados(upload_folder).items():
+        if antes.get(ruta) == firma:
+            continue
+        if os.path.dirname(ruta) == SCRIPTS_PATH:
+            relativo = os.path.basename(ruta)
+            if relativo in moved_files:
+                continue
+        else:
+            relativo = os.path.relpath(ruta, upload_folder).replace(os.sep, "/")
+        destino = os.path.join(resultado_path, relativo)
+        try:
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            if enlazar(ruta, destino):
+                enlazados += 1
+            else:
+                copiados += 1
+            moved_files.append(relativo)
+        except Exception as e:
+            print(f"❌ Error publicando {relativo}: {e}")
+    print(f"🔗 Publicados desde {upload_folder}: {enlazados} enlazado(s), {copiados} copiado(s)")
+    return moved_files
+
+
+def resumen_resultados(mensaje, stdout, stderr, moved_files, resultado_path, job_id):
+    """Respuesta común de una ejecución: salida, archivos publicados y URLs de descarga"""
+    # 🔎 Verificar qué quedó en la carpeta de resultados
+    archivos_finales = os.listdir(resultado_path)
+    print(f"📊 Archivos en carpeta resultado: {archivos_finales}")
+
+    # 🔗 URL de descarga (solo si Render)
+    render_url = os.environ.get("RENDER_EXTERNAL_URL")
+    download_urls = []
+    if render_url:
+        for file in moved_files:
+            download_urls.append({
+                "filename": file,
+                "url": f"{render_url}/jobs/{job_id}/download/{file}"
+            })
+
+    # 🧾 Resultado
+    return {
+        "message": mensaje,
+        "output": stdout,
+        "error_output": stderr if stderr else None,
+        "archivos_guardados": moved_files,
+        "carpeta_resultado": resultado_path,
+        "download_urls": download_urls if render_url else None,
+        "total_archivos": len(moved_files),
+        "success": len(moved_files) > 0
+    }
+
+
+def ejecutar_script(filename, job_id):
+    """Ejecuta un script de forma bloqueante y publica sus archivos en la carpeta del trabajo"""
+    # 🔥 Calcular la carpeta de uploads para este script
+    upload_folder = os.path.join(UPLOADS_PATH, carpeta_script(filename))
+
+    # 📂 Carpeta de resultados propia de esta ejecución
+    resultado_path = espacios.crear(job_id)
+    trabajo = cola_trabajos.obtener(job_id)
+    try:
+        with _candados_script[filename]:
+            antes = instantanea_resultados(upload_folder)
+            ejecucion = correr_script(filename, upload_folder, al_progreso=trabajo.publicar)
+
+            # 🔥 PUBLICAR LOS ARCHIVOS GENERADOS
+            moved_files = publicar_resultados(upload_folder, resultado_path, [], antes)
+        return resumen_resultados(
+            f"✅ {filename} ejecutado correctamente", ejecucion["stdout"], ejecucion["stderr"],
+            moved_files, resultado_path, job_id
+        )
+    finally:
+        espacios.liberar(job_id)
+
+
 @app.route("/run-process1/<filename>", methods=["POST"])
 def run_process(filename):
     script_path = os.path.join(SCRIPTS_PATH, filename)
     if not os.path.exists(script_path):
         return jsonify({"error": f"❌ Archivo {filename} no encontrado"}), 404
 
-    # 🔥 Calcular la carpeta de uploads para este script
-    folder_name = filename.split(".py")[0].replace(" ", "_").replace(".", "_")
-    upload_folder = os.path.join(UPLOADS_PATH, folder_name)
+    # 📥 Encolar y responder de inmediato: el worker web queda libre
+    job_id = uuid.uuid4().hex
+    trabajo = cola_trabajos.encolar(filename, ejecutar_script, filename, job_id, trabajo_id=job_id)
+    print(f"📥 Trabajo {trabajo.id} encolado para {filename}")
 
-    # 📂 Carpeta destino según entorno
-    if os.name == "nt":  # Windows local
-        resultado_path = os.path.join(os.path.expanduser("~"), "Downloads", "resultado")
-    else:  # Render o Linux
-        resultado_path = "/tmp/resultado"
-    os.makedirs(resultado_path, exist_ok=True)
-
-    # 🗑️ Limpiar carpeta de resultados antes de ejecutar
-    for file in os.listdir(resultado_path):
-        file_path = os.path.join(resultado_path, file)
-        try:
-            if os.path.isfile(file_path):
-                os.unlink(file_path)
-        except Exception as e:
-            print(f"⚠️ No se pudo eliminar {file}: {e}")
+    return jsonify({
+        "message": f"⏳ {filename} encolado para ejecución",
+        "job_id": trabajo.id,
+        "estado": trabajo.estado,
+        "status_url": f"/jobs/{trabajo.id}",
+        "output_url": f"/jobs/{trabajo.id}/output",
+        "eventos_url": f"/jobs/{trabajo.id}/eventos",
+        "resultados_url": f"/jobs/{trabajo.id}/resultados"
+    }), 202
+
+# ==============================================
+# 🔀 EJECUTAR EL PIPELINE COMPLETO (1 y 2 → 5, 3 y 4 → 6)
+# ==============================================
+def ejecutar_etapa(etapa, resultado_path, moved_files, al_progreso=None):
+    """Enlaza los PDFs de las etapas previas en la carpeta del script, lo ejecuta y publica lo que produjo"""
+    upload_folder = os.path.join(UPLOADS_PATH, carpeta_script(etapa.script))
+    salidas = {e.script: e.salida for e in ETAPAS_PIPELINE}
+    with _candados_script[etapa.script]:
+        for previa, subcarpeta in etapa.entradas.items():
+            origen = os.path.join(UPLOADS_PATH, carpeta_script(previa), salidas[previa])
+            destino = os.path.join(upload_folder, subcarpeta)
+            with _candados_script[previa]:
+                enlazados = vincular_pdfs(origen, destino)
+            print(f"🔗 {etapa.script}: {enlazados} PDF(s) de {previa} → {destino}")
+
+        antes = instantanea_resultados(upload_folder)
+        ejecucion = correr_script(etapa.script, upload_folder, al_progreso=al_progreso)
+        if not ejecucion["ok"]:
+            lineas = ejecucion["stderr"].strip().splitlines()
+            raise RuntimeError(lineas[-1] if lineas else f"{etapa.script} terminó con error")
+        # Se publica con el candado tomado: otra ejecución del mismo script no pisa estos archivos
+        publicar_resultados(upload_folder, resultado_path, moved_files, antes)
+    return {"message": f"✅ {etapa.script} ejecutado correctamente", **ejecucion}
+
+
+def ejecutar_pipeline(ejecucion, job_id):
+    """Corre el pipeline completo; cada etapa publica sus archivos en la carpeta del trabajo"""
+    resultado_path = espacios.crear(job_id)
+    trabajo = cola_trabajos.obtener(job_id)
+    moved_files = []
+
+    def correr_etapa(etapa):
+        def al_progreso(evento):
+            # Los eventos de cada script llevan el nombre de su etapa
+            trabajo.publicar({**evento, "script": etapa.script})
+        return ejecutar_etapa(etapa, resultado_path, moved_files, al_progreso)
+
+    def al_cambiar(etapa, estado):
+        trabajo.publicar({"tipo": "etapa", "script": etapa.script, "estado": estado["estado"], "error": estado["error"]})
 
     try:
-        # 🔥 PASAR LA CARPETA COMO ARGUMENTO AL SCRIPT
-        print(f"🚀 Ejecutando script: {script_path}")
-        print(f"📁 Carpeta de trabajo: {upload_folder}")
-        
-        result = subprocess.run(
-            ["python", script_path, upload_folder],
-            capture_output=True,
-            text=True,
-            cwd=SCRIPTS_PATH,
-            timeout=300  # 5 minutos máximo
-        )
+        ejecucion.ejecutar(correr_etapa, max_paralelo=MAX_ETAPAS_PARALELAS, al_cambiar=al_cambiar)
+    finally:
+        espacios.liberar(job_id)
+
+    stdout, stderr = [], []
+    for etapa in ETAPAS_PIPELINE:
+        resultado = ejecucion.resultados.get(etapa.script)
+        if resultado is None:
+            continue
+        stdout.append(f"===== {etapa.script} =====\n{resultado['stdout']}")
+        if resultado["stderr"]:
+            stderr.append(f"===== {etapa.script} =====\n{resultado['stderr']}")
+
+    fallidas = [script for script, estado in ejecucion.estados.items() if estado["estado"] != ESTADO_COMPLETADO]
+    mensaje = "✅ Pipeline ejecutado correctamente" if not fallidas else \
+        f"⚠️ Pipeline terminado con etapas sin completar: {', '.join(fallidas)}"
+    resumen = resumen_resultados(mensaje, "\n".join(stdout), "\n".join(stderr), moved_files, resultado_path, job_id)
+    resumen["success"] = resumen["success"] and not fallidas
+    return resumen
+
+
+@app.route("/run-pipeline", methods=["POST"])
+def run_pipeline():
+    faltantes = [e.script for e in ETAPAS_PIPELINE if not os.path.exists(os.path.join(SCRIPTS_PATH, e.script))]
+    if faltantes:
+        return jsonify({"error": f"❌ Scripts no encontrados: {', '.join(faltantes)}"}), 404
+
+    ejecucion = EjecucionPipeline(ETAPAS_PIPELINE)
+    job_id = uuid.uuid4().hex
+    trabajo = cola_trabajos.encolar("pipeline", ejecutar_pipeline, ejecucion, job_id, trabajo_id=job_id)
+    with _pipelines_lock:
+        _pipelines[trabajo.id] = ejecucion
+        while len(_pipelines) > MAX_PIPELINES_HISTORIAL:
+            _pipelines.popitem(last=False)
+    print(f"📥 Pipeline {trabajo.id} encolado")
+
+    return jsonify({
+        "message": "⏳ Pipeline encolado para ejecución",
+        "job_id": trabajo.id,
+        "estado": trabajo.estado,
+        "status_url": f"/pipeline/{trabajo.id}",
+        "output_url": f"/jobs/{trabajo.id}/output",
+        "eventos_url": f"/jobs/{trabajo.id}/eventos",
+        "resultados_url": f"/jobs/{trabajo.id}/resultados"
+    }), 202
 
-        print(f"📋 STDOUT del script:\n{result.stdout}")
-        if result.stderr:
-            print(f"📋 STDERR del script:\n{result.stderr}")
-
-        # ⏳ Esperar un momento para que el script termine de escribir archivos
-        time.sleep(2)
-
-        # 🔥 BUSCAR ARCHIVOS GENERADOS
-        moved_files = []
-        
-        print(f"🔍 Buscando archivos en: {upload_folder}")
-        if os.path.exists(upload_folder):
-            archivos_en_upload = os.listdir(upload_folder)
-            print(f"📄 Archivos encontrados: {len(archivos_en_upload)}")
-            
-            for file in archivos_en_upload:
-                # Copiar archivos de resultado (Excel, CSV) y PDFs procesados
-                if file.lower().endswith((".pdf", ".xlsx", ".csv", ".xls")):
-                    src = os.path.join(upload_folder, file)
-                    dst = os.path.join(resultado_path, file)
-                    
-                    try:
-                        shutil.copy2(src, dst)
-                        moved_files.append(file)
-                        print(f"✅ Copiado: {file} ({os.path.getsize(src)} bytes)")
-                    except Exception as e:
-                        print(f"❌ Error copiando {file}: {e}")
-
-        # También buscar en carpeta de scripts (backup)
-        print(f"🔍 Buscando archivos en: {SCRIPTS_PATH}")
-        if os.path.exists(SCRIPTS_PATH):
-            for file in os.listdir(SCRIPTS_PATH):
-                if file.lower().endswith((".xlsx", ".csv", ".xls")) and file not in moved_files:
-                    src = os.path.join(SCRIPTS_PATH, file)
-                    dst = os.path.join(resultado_path, file)
-                    
-                    try:
-                        shutil.copy2(src, dst)
-                        moved_files.append(file)
-                        print(f"✅ Copiado desde scripts: {file}")
-                    except Exception as e:
-                        print(f"❌ Error copiando {file}: {e}")
-
-        # 🔎 Verificar qué quedó en la carpeta de resultados
-        archivos_finales = os.listdir(resultado_path)
-        print(f"📊 Archivos en carpeta resultado: {archivos_finales}")
-
-        # 🔗 URL de descarga (solo si Render)
-        render_url = os.environ.get("RENDER_EXTERNAL_URL")
-        download_urls = []
-        if render_url:
-            for file in moved_files:
-                download_urls.append({
-                    "filename": file,
-                    "url": f"{render_url}/download/resultado/{file}"
-                })
-
-        # 🧾 Respuesta
-        return jsonify({
-            "message": f"✅ {filename} ejecutado correctamente",
-            "output": result.stdout,
-            "error_output": result.stderr if result.stderr else None,
-            "archivos_guardados": moved_files,
-            "carpeta_resultado": resultado_path,
-            "download_urls": download_urls if render_url else None,
-            "total_archivos": len(moved_files),
-            "success": len(moved_files) > 0
-        })
-
-    except subprocess.TimeoutExpired:
-        return jsonify({"error": "⏱️ El proceso excedió el tiempo máximo de 5 minutos"}), 500
-    except Exception as e:
-        print(f"❌ Error completo: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({"error": f"Error: {str(e)}"}), 500
+
+@app.route("/pipeline/<job_id>", methods=["GET"])
+def pipeline_status(job_id):
+    trabajo, error = buscar_trabajo(job_id)
+    with _pipelines_lock:
+        ejecucion = _pipelines.get(job_id)
+    if error or ejecucion is None:
+        return error or (jsonify({"error": f"❌ Pipeline {job_id} no encontrado"}), 404)
+    estado = trabajo.a_dict()
+    estado["etapas"] = ejecucion.a_dict()["etapas"]
+    return jsonify(estado)
+
+# ==============================================
+# 🧵 CONSULTAR TRABAJOS ENCOLADOS
+# ==============================================
+def buscar_trabajo(job_id):
+    trabajo = cola_trabajos.obtener(job_id)
+    if trabajo is None:
+        return None, (jsonify({"error": f"❌ Trabajo {job_id} no encontrado"}), 404)
+    return trabajo, None
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    trabajo, error = buscar_trabajo(job_id)
+    if error:
+        return error
+    return jsonify(trabajo.a_dict())
+
+
+@app.route("/jobs/<job_id>/eventos", methods=["GET"])
+def job_eventos(job_id):
+    """Progreso del trabajo en vivo (Server-Sent Events) hasta que termina.
+
+    Al reconectar, EventSource envía Last-Event-ID y se reanuda desde ahí.
+    """
+    trabajo, error = buscar_trabajo(job_id)
+    if error:
+        return error
+    try:
+        ultimo_id = int(request.headers.get("Last-Event-ID", request.args.get("desde", -1)))
+    except ValueError:
+        ultimo_id = -1
+
+    def generar():
+        nonlocal ultimo_id
+        yield "retry: 2000\n\n"
+        while True:
+            eventos = trabajo.eventos_desde(ultimo_id, timeout=15)
+            if not eventos:
+                if trabajo.terminado:
+                    # Ya se envió todo (reconexión tras el final): se repite el estado final y se cierra
+                    final = {"tipo": "estado", "estado": trabajo.estado, "error": trabajo.error}
+                    yield f"event: estado\ndata: {json.dumps(final, ensure_ascii=False)}\n\n"
+                    return
+                # Comentario SSE: mantiene viva la conexión a través de proxies
+                yield ": latido\n\n"
+                continue
+            for evento in eventos:
+                ultimo_id = evento["id"]
+                yield f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {json.dumps(evento, ensure_ascii=False, default=str)}\n\n"
+                if evento["tipo"] == "estado" and evento["estado"] in (ESTADO_COMPLETADO, ESTADO_ERROR):
+                    return
+
+    return Response(generar(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"  # sin buffer en nginx/Render
+    })
+
+
+@app.route("/jobs/<job_id>/output", methods=["GET"])
+def job_output(job_id):
+    trabajo, error = buscar_trabajo(job_id)
+    if error:
+        return error
+    return jsonify({
+        "job_id": trabajo.id,
+        "estado": trabajo.estado,
+        "output": trabajo.resultado.get("output"),
+        "error_output": trabajo.resultado.get("error_output"),
+        "error": trabajo.error
+    })
+
+
+@app.route("/jobs/<job_id>/resultados", methods=["GET"])
+def job_resultados(job_id):
+    trabajo, error = buscar_trabajo(job_id)
+    if error:
+        return error
+    archivos = espacios.listar(job_id)
+    if archivos is None and trabajo.terminado:
+        return jsonify({"error": f"❌ Los resultados del trabajo {job_id} ya expiraron"}), 404
+    archivos = archivos or []
+    return jsonify({
+        "job_id": trabajo.id,
+        "estado": trabajo.estado,
+        "archivos_guardados": [a["nombre"] for a in archivos],
+        "carpeta_resultado": trabajo.resultado.get("carpeta_resultado"),
+        "download_urls": [
+            {"filename": a["nombre"], "tamaño": a["tamaño"], "url": f"/jobs/{job_id}/download/{a['nombre']}"}
+            for a in archivos
+        ],
+        "zip_url": f"/jobs/{job_id}/zip" if archivos else None,
+        "total_archivos": len(archivos)
+    })
+
+
+@app.route("/jobs/<job_id>/download/<path:filename>", methods=["GET"])
+def job_download(job_id, filename):
+    resultado_path = espacios.ruta(job_id)
+    if resultado_path is None:
+        return jsonify({"error": f"❌ No hay resultados para el trabajo {job_id} (o ya expiraron)"}), 404
+    if not os.path.isfile(os.path.join(resultado_path, filename)):
+        return jsonify({"error": f"Archivo {filename} no encontrado"}), 404
+    return send_from_directory(resultado_path, filename, as_attachment=True)
+
+
+# Plan del ZIP por trabajo: cada Range de una descarga reanudada lo reutiliza sin recomprimir
+MAX_PLANES_ZIP = 16
+_planes_zip = OrderedDict()
+_planes_zip_lock = threading.Lock()
+
+
+def plan_zip(job_id, archivos):
+    """PlanZip de los archivos del trabajo, recordado mientras no cambien (misma ETag)"""
+    etag = huella_archivos(archivos)
+    with _planes_zip_lock:
+        previo = _planes_zip.get(job_id)
+        if previo and previo.etag == etag:
+            _planes_zip.move_to_end(job_id)
+            return previo
+    plan = PlanZip(archivos)
+    with _planes_zip_lock:
+        _planes_zip[job_id] = plan
+        _planes_zip.move_to_end(job_id)
+        while len(_planes_zip) > MAX_PLANES_ZIP:
+            _planes_zip.popitem(last=False)
+    return plan
+
+
+@app.route("/jobs/<job_id>/zip", methods=["GET"])
+def job_zip(job_id):
+    """Todos los resultados del trabajo en un ZIP generado al vuelo (admite Range para reanudar)"""
+    resultado_path = espacios.ruta(job_id)
+    archivos = espacios.listar(job_id)
+    if not archivos:
+        return jsonify({"error": f"❌ No hay resultados para el trabajo {job_id} (o ya expiraron)"}), 404
+    try:
+        plan = plan_zip(job_id, [(a["nombre"], os.path.join(resultado_path, a["nombre"])) for a in archivos])
+    except ValueError as e:
+        return jsonify({"error": f"❌ {e}"}), 413
+
+    cabeceras = {
+        "Content-Disposition": f'attachment; filename="resultados_{job_id[:8]}.zip"',
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{plan.etag}"',
+    }
+    # If-Range con otra ETag (o con fecha, que no se publica): el ZIP cambió, se envía completo
+    rango = request.range
+    if rango and "If-Range" in request.headers and request.if_range.etag != plan.etag:
+        rango = None
+    if rango:
+        limites = rango.range_for_length(plan.tamano)
+        if limites is None:
+            cabeceras["Content-Range"] = f"bytes */{plan.tamano}"
+            return Response(status=416, headers=cabeceras)
+        inicio, fin = limites
+        cabeceras["Content-Range"] = f"bytes {inicio}-{fin - 1}/{plan.tamano}"
+        cabeceras["Content-Length"] = str(fin - inicio)
+        return Response(plan.leer(inicio, fin), status=206, mimetype="application/zip", headers=cabeceras)
+
+    cabeceras["Content-Length"] = str(plan.tamano)
+    return Response(plan.leer(), mimetype="application/zip", headers=cabeceras)
 
 # ==============================================
 # 📥 DESCARGAR RESULTADOS DESDE RENDER
 # ==============================================
+# Sin job_id se usa la ejecución más reciente (compatibilidad con las URLs anteriores)
 @app.route("/download/resultado/<path:filename>", methods=["GET"])
 def download_file(filename):
-    resultado_path = "/tmp/resultado" if not os.name == "nt" else os.path.join(os.path.expanduser("~"), "Downloads", "resultado")
-    
-    file_path = os.path.join(resultado_path, filename)
-    if not os.path.exists(file_path):
+    job_id = request.args.get("job_id") or espacios.mas_reciente()
+    if job_id is None:
         return jsonify({"error": f"Archivo {filename} no encontrado"}), 404
-    
-    return send_from_directory(resultado_path, filename, as_attachment=True)
+    return job_download(job_id, filename)
 
 @app.route("/ver-resultados", methods=["GET"])
 def ver_resultados():
-    resultado_path = "/tmp/resultado" if not os.name == "nt" else os.path.join(os.path.expanduser("~"), "Downloads", "resultado")
-    
-    if not os.path.exists(resultado_path):
+    job_id = request.args.get("job_id") or espacios.mas_reciente()
+    archivos = espacios.listar(job_id) if job_id else None
+    if archivos is None:
+        if request.args.get("job_id"):
+            return jsonify({"error": f"❌ No hay resultados para el trabajo {job_id} (o ya expiraron)"}), 404
         return jsonify({"archivos_encontrados": []})
-    
-    archivos = []
-    for f in os.listdir(resultado_path):
-        file_path = os.path.join(resultado_path, f)
-        if os.path.isfile(file_path):
-            archivos.append({
-                "nombre": f,
-                "tamaño": os.path.getsize(file_path),
-                "url": f"/download/resultado/{f}"
-            })
-    
-    return jsonify({"archivos_encontrados": archivos})
+
+    for archivo in archivos:
+        archivo["url"] = f"/jobs/{job_id}/download/{archivo['nombre']}"
+    return jsonify({
+        "job_id": job_id,
+        "archivos_encontrados": archivos,
+        "zip_url": f"/jobs/{job_id}/zip" if archivos else None
+    })
 
 # ==============================================
 # 🚀 INICIAR SERVIDOR
@@ -0,0 +1,95 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+# ==============================================
+# ⏱️ BENCHMARK: EMPAREJAMIENTO VORAZ VS ASIGNACIÓN ÓPTIMA
+# ==============================================
+# Compara, para 5.FC COMBINACION y 6 CE COMBINADO, el modo voraz (por
+# defecto) con el óptimo (mayor puntuación total) sobre nombres de archivo
+# sintéticos: parejas, puntuación total, tiempo y tamaño de las componentes
+# del grafo de candidatos. Falla si alguna asignación repite un archivo o si
+# el modo óptimo suma menos que el voraz.
+# Uso: python benchmarks/bench_asignacion.py [--tamanos 500 1000 2000]
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from motor import SCRIPTS_PATH, cargar_script  # noqa: E402
+
+sys.path.insert(0, SCRIPTS_PATH)
+
+from bench_emparejamiento import APELLIDOS, NOMBRES, generar_archivos  # noqa: E402
+from comun.emparejamiento import IndiceCandidatos, aristas_candidatas, componentes  # noqa: E402
+
+
+def generar_comprobantes(modulo, cantidad, semilla=0):
+    """Listas (erp, soporte) con el formato de los scripts 4 y 3; ~85% tienen pareja"""
+    azar = random.Random(semilla)
+    beneficiarios = [f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)}" for _ in range(cantidad // 8 + 5)]
+    erp, soporte = [], []
+    for n in range(cantidad):
+        dia, mes = azar.randint(1, 28), azar.randint(9, 11)
+        beneficiario = azar.choice(beneficiarios)
+        total = azar.randint(50, 9000) * 1000
+        nombre_erp = f"CE{n + 1} - 2025-{mes:02d}-{dia:02d} - {beneficiario} - {total}.pdf"
+        erp.append(modulo.procesar_archivo(nombre_erp, nombre_erp))
+        if azar.random() < 0.85:
+            nombre_soporte = f"{dia:02d}-{mes:02d}-2025 - {beneficiario} - {total}.0.pdf"
+        else:
+            nombre_soporte = f"{azar.randint(1, 28):02d}-{mes:02d}-2025 - {azar.choice(beneficiarios)} - {total}.0.pdf"
+        soporte.append(modulo.procesar_archivo(nombre_soporte, nombre_soporte))
+    azar.shuffle(soporte)
+    return erp, soporte
+
+
+def describir_componentes(modulo, erp, soporte):
+    """(componentes, archivos ERP en la mayor) del grafo de candidatos sobre el umbral"""
+    claves_erp = [modulo.conjuntos_archivo(a) for a in erp]
+    claves_soporte = [modulo.conjuntos_archivo(a) for a in soporte]
+    indice = IndiceCandidatos(claves_soporte, modulo.TIPOS_POR_CASO)
+    aristas = aristas_candidatas(claves_erp, claves_soporte, modulo.puntuar_par, modulo.UMBRAL_PUNTUACION, indice)
+    grupos = componentes(aristas)
+    mayor = max((len({i for i, _, _ in grupo}) for grupo in grupos), default=0)
+    return len(grupos), mayor
+
+
+def medir(modulo, erp, soporte, modo):
+    inicio = time.perf_counter()
+    coincidencias = modulo.encontrar_coincidencias_precisas(erp, soporte, modo)
+    segundos = time.perf_counter() - inicio
+    if len({c['indice_erp'] for c in coincidencias}) != len(coincidencias) or \
+            len({c['indice_soporte'] for c in coincidencias}) != len(coincidencias):
+        print(f"❌ El modo {modo} asignó un archivo dos veces")
+        sys.exit(1)
+    return len(coincidencias), sum(c['puntuacion'] for c in coincidencias), segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emparejamiento voraz vs asignación óptima")
+    parser.add_argument("--tamanos", type=int, nargs="*", default=[500, 1000, 2000])
+    args = parser.parse_args()
+
+    casos = [
+        ("5.FC COMBINACION.py", generar_archivos),
+        ("6 CE COMBINADO.py", generar_comprobantes),
+    ]
+    for script, generar in casos:
+        modulo = cargar_script(script)
+        print(f"📊 {script}")
+        print("   archivos | componentes (mayor) | voraz: parejas / puntos / tiempo | óptimo: parejas / puntos / tiempo")
+        for cantidad in args.tamanos:
+            erp, soporte = generar(modulo, cantidad)
+            total_componentes, mayor = describir_componentes(modulo, erp, soporte)
+            parejas_v, puntos_v, t_v = medir(modulo, erp, soporte, "voraz")
+            parejas_o, puntos_o, t_o = medir(modulo, erp, soporte, "optimo")
+            if puntos_o < puntos_v:
+                print(f"❌ Con {cantidad} archivos el modo óptimo suma menos que el voraz")
+                sys.exit(1)
+            print(f"   {cantidad:>8} | {total_componentes:>11} ({mayor:>5}) | "
+                  f"{parejas_v:>6} / {puntos_v:>8} / {t_v:6.2f}s | {parejas_o:>6} / {puntos_o:>8} / {t_o:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# ==============================================
+# ⏱️ BENCHMARK: CAMPOS MUISKA CON ESCANEO ANCLADO VS PATRÓN A PATRÓN
+# ==============================================
+# Genera facturas sintéticas largas (encabezado DIAN + anexos) y mide
+# extraer_fecha/razon_social/valor con un solo escaneo anclado frente a
+# search() de cada patrón sobre todo el texto. Verifica además que ambos
+# modos den exactamente los mismos campos.
+# Uso: python benchmarks/bench_campos_muiska.py [--lineas 100 1000 10000]
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from motor import SCRIPTS_PATH, cargar_script  # noqa: E402
+
+sys.path.insert(0, SCRIPTS_PATH)
+
+PALABRAS = ("detalle", "consumo", "valor", "referencia", "producto", "servicio",
+            "cantidad", "unidad", "precio", "impuesto", "item", "descripción", "neto")
+
+# Encabezados que ejercitan distintos patrones y el modo forzado
+ENCABEZADOS = [
+    "Fecha de Emisión: 03/09/2025 Datos del Emisor / Vendedor Razón Social: ACME SAS Nombre Comercial: ACME",
+    "Fecha de generación: 01/10/2025 Datos del vendedor Razón social: YESSICA RODRIGUEZ Tipo de documento: NIT",
+    "Fecha y hora de expedición: 2025-08-15 Proveedo: INSUMOS DEL CAMPO NIT: 900123456",
+]
+CIERRES = [
+    "MONEDA COP TASA DE CAMBIO Subtotal 1.560.000,00",
+    "Total neto factura (=) 2.350.000,00",
+    "Total factura (=) COP $ 845.000,00",
+    "Subtotal 12,00 otros cargos 98.765.432",
+]
+
+
+def factura_sintetica(lineas, semilla):
+    """Encabezado + `lineas` líneas de anexo + cierre con el valor"""
+    azar = random.Random(semilla)
+    anexo = " ".join(
+        f"{azar.choice(PALABRAS)} {azar.choice(PALABRAS)} {azar.randint(1, 99999)}"
+        for _ in range(lineas)
+    )
+    return f"{azar.choice(ENCABEZADOS)} {anexo} {azar.choice(CIERRES)}"
+
+
+def extraer(modulo, texto, anclado):
+    escaneo = modulo.extractor_campos.escanear(texto, anclado=anclado)
+    return (
+        modulo.extraer_fecha(texto, escaneo),
+        modulo.extraer_razon_social(texto, escaneo),
+        modulo.extraer_valor(texto, escaneo),
+    )
+
+
+def medir(modulo, textos, anclado, repeticiones):
+    """Mediana del tiempo por documento, en milisegundos"""
+    muestras = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for texto in textos:
+            extraer(modulo, texto, anclado)
+        muestras.append((time.perf_counter() - inicio) / len(textos) * 1000)
+    return statistics.median(muestras)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escaneo anclado vs patrón a patrón en facturas MUISKA")
+    parser.add_argument("--lineas", type=int, nargs="*", default=[100, 1000, 10000])
+    parser.add_argument("--documentos", type=int, default=20)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    modulo = cargar_script("2. FC MUISKA.py")
+
+    print(f"📊 {args.documentos} facturas sintéticas por tamaño, {args.repeticiones} repeticiones")
+    for lineas in args.lineas:
+        textos = [modulo.normalizar_texto(factura_sintetica(lineas, i)) for i in range(args.documentos)]
+
+        for texto in textos:
+            if extraer(modulo, texto, True) != extraer(modulo, texto, False):
+                print(f"❌ Resultados distintos con {lineas} líneas:\n{texto[:300]}...")
+                sys.exit(1)
+
+        secuencial = medir(modulo, textos, False, args.repeticiones)
+        anclado = medir(modulo, textos, True, args.repeticiones)
+        kb = sum(len(t) for t in textos) / len(textos) / 1024
+        print(f"   {lineas:>6} líneas (~{kb:,.0f} KB): patrón a patrón {secuencial:8.3f} ms/doc | "
+              f"anclado {anclado:8.3f} ms/doc | {secuencial / anclado:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import glob
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import fitz
+import pdfplumber
+
+# ==============================================
+# ⏱️ BENCHMARK: DOCUMENTOS POR SEGUNDO DEL CLASIFICADOR
+# ==============================================
+# Clasifica los PDFs de muestra (más un comprobante de egreso y un
+# desprendible sintéticos) y compara con lo que cuesta hoy descubrir un
+# error de carpeta: leer el documento completo con pdfplumber. Con --ocr
+# también mide un escaneado (render en gris a CLASIFICADOR_DPI + tesseract).
+# Uso: python benchmarks/bench_clasificador.py [--pdfs ...] [--repeticiones 5] [--ocr]
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from clasificador import clasificar_pdf  # noqa: E402
+
+PDFS_MUESTRA = sorted(
+    glob.glob(os.path.join(BASE_DIR, "uploads", "1_ERP_FC", "*.pdf"))
+    + glob.glob(os.path.join(BASE_DIR, "uploads", "2__FC_MUISKA", "*.pdf"))
+)
+
+SINTETICOS = {
+    "comprobante_egreso.pdf": "COMPROBANTE DE EGRESO\nBENEFICIARIO\nJUAN PEREZ\nTOTAL DEL DOCUMENTO\n1.560.000",
+    "desprendible.pdf": "Comprobante de transferencia\nIdentificación Juan Perez\nReferencia 123\n$1,560,000.00",
+}
+
+
+def crear_pdf(ruta, texto=None):
+    """PDF de una página con texto, o escaneado (solo imagen) si no hay texto"""
+    with fitz.open() as documento:
+        pagina = documento.new_page()
+        if texto:
+            pagina.insert_text((50, 72), texto, fontsize=9)
+        else:
+            imagen = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 1200, 1600), 0)
+            imagen.clear_with(230)
+            pagina.insert_image(pagina.rect, pixmap=imagen)
+        documento.save(ruta)
+
+
+def medir(funcion, rutas, repeticiones):
+    """Mediana de documentos por segundo de `funcion` sobre `rutas`"""
+    funcion(rutas[0])  # calentamiento
+    muestras = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for ruta in rutas:
+            funcion(ruta)
+        muestras.append(len(rutas) / (time.perf_counter() - inicio))
+    return statistics.median(muestras)
+
+
+def leer_completo(ruta):
+    with pdfplumber.open(ruta) as pdf:
+        for pagina in pdf.pages:
+            pagina.extract_text()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Documentos por segundo del clasificador")
+    parser.add_argument("--pdfs", nargs="*", default=PDFS_MUESTRA)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--ocr", action="store_true", help="medir también un PDF escaneado")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as raiz:
+        rutas = list(args.pdfs)
+        for nombre, texto in SINTETICOS.items():
+            rutas.append(os.path.join(raiz, nombre))
+            crear_pdf(rutas[-1], texto)
+
+        print(f"📊 {len(rutas)} PDFs, {args.repeticiones} repeticiones")
+        for ruta in rutas:
+            resultado = clasificar_pdf(ruta, ocr=False)
+            print(f"   {os.path.basename(ruta)[:40]:<40} → {resultado['tipo'] or 'sin clasificar'}")
+
+        clasificados = medir(lambda ruta: clasificar_pdf(ruta, ocr=False), rutas, args.repeticiones)
+        completos = medir(leer_completo, rutas, args.repeticiones)
+        print(f"   clasificador (1ª página, fitz): {clasificados:8.1f} documentos/s")
+        print(f"   pdfplumber documento completo:  {completos:8.1f} documentos/s ({clasificados / completos:.1f}x)")
+
+        if args.ocr:
+            if not shutil.which("tesseract"):
+                print("   ⚠ tesseract no está instalado: se omite la medición con OCR")
+                return
+            escaneado = os.path.join(raiz, "escaneado.pdf")
+            crear_pdf(escaneado)
+            for dpi in (100, 300):
+                velocidad = medir(lambda ruta: clasificar_pdf(ruta, dpi=dpi), [escaneado], args.repeticiones)
+                print(f"   escaneado con OCR a {dpi} DPI:     {velocidad:8.1f} documentos/s")
+
+
+if __name__ == "__main__":
+    main()
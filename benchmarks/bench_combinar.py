@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+# ==============================================
+# ⏱️ BENCHMARK: MEMORIA DE LA COMBINACIÓN DE PDFs SEGÚN EL TAMAÑO DEL LOTE
+# ==============================================
+# Genera PDFs sintéticos (texto + imagen) y combina lotes de N pares, cada
+# lote en un proceso nuevo para que el RSS pico sea solo suyo. Compara la
+# etapa de comun/combinar_pdf (documentos cerrados al terminar cada par)
+# con el bucle anterior de 5.FC COMBINACION (fitz.open sin cerrar). En
+# CPython el conteo de referencias libera esos documentos al terminar cada
+# par, así que los dos bucles miden el mismo RSS pico: el informe sirve para
+# ver MB/s y memoria por tamaño de lote, no para detectar la fuga.
+# Uso: python benchmarks/bench_combinar.py [--pares 25 100 400] [--workers 1]
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from motor import SCRIPTS_PATH  # noqa: E402
+
+sys.path.insert(0, SCRIPTS_PATH)
+
+import fitz  # noqa: E402
+
+from comun.combinar_pdf import combinar_lote, memoria_pico_mb  # noqa: E402
+
+
+def crear_pdf(ruta, paginas, semilla):
+    """PDF con texto y una imagen de ruido por página (como un escaneo: no se comprime)"""
+    azar = random.Random(semilla)
+    with fitz.open() as documento:
+        for n in range(paginas):
+            pagina = documento.new_page()
+            pagina.insert_text((72, 72), f"Factura sintética {semilla}-{n}", fontsize=14)
+            pixeles = fitz.Pixmap(fitz.csRGB, 500, 500, azar.randbytes(500 * 500 * 3), False)
+            pagina.insert_image(fitz.Rect(72, 100, 472, 500), pixmap=pixeles)
+        documento.save(ruta, deflate=True)
+
+
+def combinar_antiguo(tareas):
+    """El bucle anterior: un par tras otro, sin cerrar los documentos de entrada"""
+    for rutas, ruta_salida in tareas:
+        salida_pdf = fitz.open()
+        for ruta in rutas:
+            salida_pdf.insert_pdf(fitz.open(ruta))
+        salida_pdf.save(ruta_salida)
+        salida_pdf.close()
+
+
+def medir_lote(carpeta, pares, modo, workers):
+    """Corre en el proceso hijo: combina `pares` pares y devuelve MB/s y RSS pico"""
+    entradas = sorted(os.path.join(carpeta, nombre) for nombre in os.listdir(carpeta) if nombre.endswith(".pdf"))
+    with tempfile.TemporaryDirectory() as salida:
+        tareas = [
+            ((entradas[(2 * n) % len(entradas)], entradas[(2 * n + 1) % len(entradas)]),
+             os.path.join(salida, f"combinado_{n:05d}.pdf"))
+            for n in range(pares)
+        ]
+        if modo == "antiguo":
+            combinar_antiguo(tareas)
+            return {"memoria_pico_mb": memoria_pico_mb(), "mb_por_segundo": None}
+        lote = combinar_lote(tareas, workers=workers)
+        errores = [r["error"] for r in lote["resultados"] if r["error"]]
+        if errores:
+            raise RuntimeError(errores[0])
+        return {"memoria_pico_mb": lote["memoria_pico_mb"], "mb_por_segundo": lote["mb_por_segundo"],
+                "mb_entrada": lote["mb_entrada"], "mb_salida": lote["mb_salida"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSS pico y MB/s de la combinación de PDFs por tamaño de lote")
+    parser.add_argument("--pares", type=int, nargs="*", default=[25, 100, 400])
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--documentos", type=int, default=40, help="PDFs de entrada distintos")
+    parser.add_argument("--paginas", type=int, default=3)
+    parser.add_argument("--hijo", nargs=4, metavar=("CARPETA", "PARES", "MODO", "WORKERS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        carpeta, pares, modo, workers = args.hijo
+        print(json.dumps(medir_lote(carpeta, int(pares), modo, int(workers))))
+        return
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        for n in range(args.documentos):
+            crear_pdf(os.path.join(carpeta, f"entrada_{n:03d}.pdf"), args.paginas, n)
+
+        print(f"📊 {args.documentos} PDFs de entrada de {args.paginas} páginas, {args.workers} proceso(s)")
+        for pares in args.pares:
+            fila = {}
+            for modo in ("antiguo", "nuevo"):
+                proceso = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--hijo", carpeta, str(pares), modo, str(args.workers)],
+                    capture_output=True, text=True, check=True,
+                )
+                fila[modo] = json.loads(proceso.stdout.strip().splitlines()[-1])
+            nuevo = fila["nuevo"]
+            print(f"   {pares:>5} pares | antes: RSS pico {fila['antiguo']['memoria_pico_mb']:7.1f} MB | "
+                  f"ahora: RSS pico {nuevo['memoria_pico_mb']:7.1f} MB, {nuevo['mb_por_segundo']:6.1f} MB/s, "
+                  f"{nuevo['mb_entrada']:.1f} MB → {nuevo['mb_salida']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# ==============================================
+# ⏱️ BENCHMARK: PyPDF2 PdfMerger VS MOTOR COMPARTIDO (fitz.insert_pdf)
+# ==============================================
+# Combina N pares ERP + soporte (PDFs de muestra de uploads/) con el bucle
+# que tenía 6 CE COMBINADO (PyPDF2.PdfMerger, un par tras otro) y con
+# comun/combinar_pdf.combinar_pares, con y sin optimización de la salida.
+# Reporta segundos, pares/s y MB escritos. Requiere PyPDF2 solo para la
+# columna de referencia.
+# Uso: python benchmarks/bench_combinar_motores.py [--pares 100 1000] [--workers 1]
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from motor import SCRIPTS_PATH  # noqa: E402
+
+sys.path.insert(0, SCRIPTS_PATH)
+
+from comun.combinar_pdf import combinar_pares  # noqa: E402
+
+PDF_ERP = os.path.join(BASE_DIR, "uploads", "1_ERP_FC", "1-1.pdf")
+PDF_SOPORTE = os.path.join(BASE_DIR, "uploads", "2__FC_MUISKA", "1-2.pdf")
+
+
+def combinar_pypdf2(triples):
+    """El bucle anterior de 6 CE COMBINADO"""
+    import PyPDF2
+
+    for erp, soporte, salida in triples:
+        pdf_merger = PyPDF2.PdfMerger()
+        pdf_merger.append(erp)
+        pdf_merger.append(soporte)
+        pdf_merger.write(salida)
+        pdf_merger.close()
+
+
+def mb_escritos(carpeta):
+    return sum(os.path.getsize(os.path.join(carpeta, nombre)) for nombre in os.listdir(carpeta)) / (1024 * 1024)
+
+
+def medir(nombre, funcion, pares):
+    """Corre `funcion(triples)` en una carpeta de salida nueva; (segundos, MB escritos)"""
+    with tempfile.TemporaryDirectory() as salida:
+        triples = [(PDF_ERP, PDF_SOPORTE, os.path.join(salida, f"{nombre}_{n:05d}.pdf")) for n in range(pares)]
+        inicio = time.perf_counter()
+        funcion(triples)
+        segundos = time.perf_counter() - inicio
+        return segundos, mb_escritos(salida)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PyPDF2 PdfMerger vs fitz.insert_pdf al combinar pares")
+    parser.add_argument("--pares", type=int, nargs="*", default=[100, 1000])
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    motores = [
+        ("fitz", lambda triples: combinar_pares(triples, workers=args.workers, comprimir=False)),
+        ("fitz + garbage/deflate", lambda triples: combinar_pares(triples, workers=args.workers, comprimir=True)),
+    ]
+    try:
+        import PyPDF2  # noqa: F401
+
+        motores.insert(0, ("PyPDF2 PdfMerger", combinar_pypdf2))
+    except ImportError:
+        print("⚠️ PyPDF2 no está instalado: se omite la referencia")
+
+    tamano = (os.path.getsize(PDF_ERP) + os.path.getsize(PDF_SOPORTE)) / 1024
+    print(f"📊 Par de muestra: {tamano:.0f} KB de entrada, {args.workers} proceso(s) para fitz")
+    for pares in args.pares:
+        base = None
+        for nombre, funcion in motores:
+            segundos, mb = medir(nombre.split()[0].lower(), funcion, pares)
+            base = base or segundos
+            print(f"   {pares:>5} pares | {nombre:<24} {segundos:7.2f}s | {pares / segundos:7.1f} pares/s | "
+                  f"{mb:7.1f} MB | {base / segundos:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
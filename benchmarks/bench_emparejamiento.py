@@ -0,0 +1,101 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+# ==============================================
+# ⏱️ BENCHMARK: EMPAREJAMIENTO ERP / MUISKA CON ÍNDICE INVERTIDO
+# ==============================================
+# Genera nombres de archivo sintéticos con el formato que dejan los scripts
+# 1 (ERP) y 2 (MUISKA) y mide encontrar_coincidencias_precisas con el índice
+# frente a la comparación exhaustiva de todos los pares (solo en tamaños
+# pequeños: es O(N·M)). Donde corren ambas, verifica que el resultado sea
+# idéntico. Uso: python benchmarks/bench_emparejamiento.py [--tamanos 1000 5000 20000]
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from motor import SCRIPTS_PATH, cargar_script  # noqa: E402
+
+sys.path.insert(0, SCRIPTS_PATH)
+
+NOMBRES = ["YESSICA", "CARLOS", "MARIA", "ANDRES", "LORENA", "FELIPE", "DIANA", "JORGE", "PAOLA", "LUIS"]
+APELLIDOS = ["RODRIGUEZ", "VARGAS", "AMARIS", "PEREZ", "GOMEZ", "LOPEZ", "DIAZ", "MARTINEZ", "SUAREZ", "ROJAS"]
+
+
+def generar_archivos(modulo, cantidad, semilla=0):
+    """Listas (erp, soporte) ya procesadas; ~90% de los ERP tienen su soporte"""
+    azar = random.Random(semilla)
+    proveedores = [
+        f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)}" for _ in range(cantidad // 10 + 5)
+    ]
+    erp, soporte = [], []
+    for n in range(cantidad):
+        dia, mes = azar.randint(1, 28), azar.randint(9, 11)
+        proveedor = azar.choice(proveedores)
+        subtotal = azar.randint(50, 9000) * 1000
+        nombre_erp = f"{n + 1}-{azar.randint(1, 9)}_{dia}-{mes}-2025_{proveedor}_{subtotal}.pdf"
+        erp.append(modulo.procesar_archivo(nombre_erp, nombre_erp))
+        if azar.random() < 0.9:
+            nombre_soporte = f"{dia:02d}-{mes:02d}-2025 - {proveedor} - ${subtotal}.pdf"
+        else:
+            nombre_soporte = f"{azar.randint(1, 28):02d}-{mes:02d}-2025 - {azar.choice(proveedores)} - ${azar.randint(50, 9000) * 1000}.pdf"
+        soporte.append(modulo.procesar_archivo(nombre_soporte, nombre_soporte))
+    azar.shuffle(soporte)
+    return erp, soporte
+
+
+def emparejar_exhaustivo(modulo, archivos_erp, archivos_soporte):
+    """Comparación de todos los pares, como antes del índice"""
+    resultado = []
+    usados = set()
+    for i, archivo_erp in enumerate(archivos_erp):
+        mejor = None
+        mejor_puntuacion = 0
+        for j, archivo_soporte in enumerate(archivos_soporte):
+            if j in usados:
+                continue
+            puntuacion, criterios = modulo.puntuar_par(
+                modulo.conjuntos_archivo(archivo_erp), modulo.conjuntos_archivo(archivo_soporte)
+            )
+            if puntuacion >= 40 and puntuacion > mejor_puntuacion:
+                mejor_puntuacion = puntuacion
+                mejor = (i, j, puntuacion, criterios)
+        if mejor:
+            resultado.append(mejor)
+            usados.add(mejor[1])
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emparejamiento con índice invertido vs exhaustivo")
+    parser.add_argument("--tamanos", type=int, nargs="*", default=[1000, 5000, 20000])
+    parser.add_argument("--max-exhaustivo", type=int, default=2000,
+                        help="tamaño máximo en el que también se mide la comparación exhaustiva")
+    args = parser.parse_args()
+
+    modulo = cargar_script("5.FC COMBINACION.py")
+
+    print("📊 Archivos por lado | índice | exhaustivo | parejas")
+    for cantidad in args.tamanos:
+        erp, soporte = generar_archivos(modulo, cantidad)
+
+        inicio = time.perf_counter()
+        coincidencias = modulo.encontrar_coincidencias_precisas(erp, soporte)
+        t_indice = time.perf_counter() - inicio
+        obtenidas = [(c['indice_erp'], c['indice_soporte'], c['puntuacion'], c['criterios']) for c in coincidencias]
+
+        t_exhaustivo = "—"
+        if cantidad <= args.max_exhaustivo:
+            inicio = time.perf_counter()
+            esperadas = emparejar_exhaustivo(modulo, erp, soporte)
+            t_exhaustivo = f"{time.perf_counter() - inicio:.2f}s"
+            if esperadas != obtenidas:
+                print(f"❌ Con {cantidad} archivos el índice no reproduce el resultado exhaustivo")
+                sys.exit(1)
+
+        print(f"   {cantidad:>6} | {t_indice:6.2f}s | {t_exhaustivo:>10} | {len(coincidencias)}")
+
+
+if __name__ == "__main__":
+    main()
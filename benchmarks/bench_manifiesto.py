@@ -0,0 +1,62 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# ==============================================
+# ⏱️ BENCHMARK: RE-EJECUCIÓN CON Y SIN MANIFIESTO DE PROCESADOS
+# ==============================================
+# Ejecuta 1.ERP FC sobre N copias del PDF de muestra: primera pasada, una
+# re-ejecución con el manifiesto (omite lo ya procesado) y otra con
+# OMITIR_PROCESADOS=0 (lee todo de nuevo; la caché de texto sigue activa).
+# Después agrega --nuevos PDFs y vuelve a correr con el manifiesto.
+# Uso: python benchmarks/bench_manifiesto.py [--pdfs 200] [--nuevos 10]
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from motor import SCRIPTS_PATH, cargar_script  # noqa: E402
+
+sys.path.insert(0, SCRIPTS_PATH)
+
+PDF_MUESTRA = os.path.join(BASE_DIR, "uploads", "1_ERP_FC", "1-1.pdf")
+
+
+def copiar_facturas(carpeta, desde, hasta):
+    for n in range(desde, hasta):
+        shutil.copy(PDF_MUESTRA, os.path.join(carpeta, f"factura_{n:05d}.pdf"))
+
+
+def medir(script, carpeta, omitir=True):
+    os.environ["OMITIR_PROCESADOS"] = "1" if omitir else "0"
+    inicio = time.perf_counter()
+    resumen = script.run(carpeta)
+    return time.perf_counter() - inicio, resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-ejecución de 1.ERP FC con y sin manifiesto")
+    parser.add_argument("--pdfs", type=int, default=200)
+    parser.add_argument("--nuevos", type=int, default=10)
+    args = parser.parse_args()
+
+    script = cargar_script("1.ERP FC.py")
+    with tempfile.TemporaryDirectory() as carpeta:
+        copiar_facturas(carpeta, 0, args.pdfs)
+        pasadas = [("primera pasada", True), ("re-ejecución con manifiesto", True),
+                   ("re-ejecución OMITIR_PROCESADOS=0", False)]
+        filas = []
+        for nombre, omitir in pasadas:
+            filas.append((nombre,) + medir(script, carpeta, omitir))
+        copiar_facturas(carpeta, args.pdfs, args.pdfs + args.nuevos)
+        filas.append((f"+{args.nuevos} PDFs nuevos con manifiesto",) + medir(script, carpeta))
+
+    print(f"📊 1.ERP FC - {args.pdfs} PDFs")
+    for nombre, segundos, resumen in filas:
+        print(f"   {nombre:<36} {segundos:7.2f}s | procesados {resumen['archivos_procesados']:>5} | "
+              f"omitidos {resumen['archivos_omitidos']:>5}")
+
+
+if __name__ == "__main__":
+    main()
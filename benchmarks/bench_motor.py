@@ -0,0 +1,82 @@
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# ==============================================
+# ⏱️ BENCHMARK: SUBPROCESO EN FRÍO VS POOL EN CALIENTE
+# ==============================================
+# Uso: python benchmarks/bench_motor.py [--script "1.ERP FC.py"] [--pdfs 10]
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from motor import MotorScripts, SCRIPTS_PATH  # noqa: E402
+
+PDF_MUESTRA = os.path.join(BASE_DIR, "uploads", "1_ERP_FC", "1-1.pdf")
+
+
+def preparar_lote(destino, pdf_muestra, cantidad):
+    """Crea una carpeta nueva con `cantidad` copias del PDF de muestra"""
+    if os.path.exists(destino):
+        shutil.rmtree(destino)
+    os.makedirs(destino)
+    for i in range(cantidad):
+        shutil.copy(pdf_muestra, os.path.join(destino, f"factura_{i:03d}.pdf"))
+
+
+def medir_subproceso(script, carpeta):
+    inicio = time.perf_counter()
+    subprocess.run(
+        [sys.executable, os.path.join(SCRIPTS_PATH, script), carpeta],
+        capture_output=True,
+        cwd=SCRIPTS_PATH,
+        check=True,
+    )
+    return time.perf_counter() - inicio
+
+
+def medir_pool(motor, script, carpeta):
+    inicio = time.perf_counter()
+    ejecucion = motor.ejecutar(script, carpeta)
+    if not ejecucion["ok"]:
+        raise RuntimeError(ejecucion["stderr"])
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara subproceso en frío contra pool en caliente")
+    parser.add_argument("--script", default="1.ERP FC.py")
+    parser.add_argument("--pdf", default=PDF_MUESTRA)
+    parser.add_argument("--pdfs", type=int, default=10)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    motor = MotorScripts([args.script], max_procesos=1)
+    motor.precalentar(esperar=True)
+
+    tiempos = {"subproceso": [], "pool": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        carpeta = os.path.join(tmp, "lote")
+        for _ in range(args.repeticiones):
+            preparar_lote(carpeta, args.pdf, args.pdfs)
+            tiempos["subproceso"].append(medir_subproceso(args.script, carpeta))
+
+            preparar_lote(carpeta, args.pdf, args.pdfs)
+            tiempos["pool"].append(medir_pool(motor, args.script, carpeta))
+
+    motor.cerrar()
+
+    print(f"📊 {args.script} - lote de {args.pdfs} PDFs, {args.repeticiones} repeticiones")
+    for modo, valores in tiempos.items():
+        print(f"   {modo:<11} mediana {statistics.median(valores):.3f}s  "
+              f"(mín {min(valores):.3f}s, máx {max(valores):.3f}s)")
+    ganancia = statistics.median(tiempos["subproceso"]) / statistics.median(tiempos["pool"])
+    print(f"   🔥 El pool en caliente es {ganancia:.1f}x más rápido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# ==============================================
+# ⏱️ BENCHMARK: OCR DE DESPRENDIBLES A 150 / 200 / 300 DPI
+# ==============================================
+# Genera desprendibles escaneados sintéticos (PDF de solo imagen, con datos
+# conocidos), los procesa con 3.CE DESPRENDIBLES a cada resolución y mide
+# segundos por desprendible y acierto de fecha, beneficiario y valor.
+# Requiere tesseract con el idioma "spa".
+# Uso: python benchmarks/bench_ocr.py [--desprendibles 10] [--dpi 150 200 300] [--workers 1]
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+# Sin caché de OCR: cada resolución debe pasar de verdad por tesseract
+os.environ["CACHE_OCR_MAX_MB"] = "0"
+
+import fitz  # noqa: E402
+
+from motor import SCRIPTS_PATH, cargar_script  # noqa: E402
+
+sys.path.insert(0, SCRIPTS_PATH)
+
+MESES = ["ene", "feb", "mar", "abr", "may", "jun", "jul", "ago", "sep", "oct", "nov", "dic"]
+NOMBRES = ["YESSICA LORENA RODRIGUEZ VARGAS", "INSUMOS DEL CAMPO SAS", "CARLOS ANDRES PEREZ GOMEZ",
+           "AGROSERVICIOS BOYACA LTDA", "MARIA FERNANDA LOPEZ DIAZ"]
+DPI_ESCANEO = 200  # resolución a la que se "escanea" el desprendible sintético
+
+
+def crear_desprendible(ruta, semilla):
+    """PDF de una sola imagen con el formato del comprobante; devuelve los campos esperados"""
+    azar = random.Random(semilla)
+    dia, mes, anio = azar.randint(1, 28), azar.randint(1, 12), 2025
+    valor = azar.randint(50, 9000) * 1000
+    beneficiario = azar.choice(NOMBRES)
+    lineas = [
+        "Banco de Bogotá",
+        "Comprobante de pago",
+        f"{dia} {MESES[mes - 1]} {anio} - 10:{azar.randint(10, 59)} a.m.",
+        "Transferencia",
+        f"$ {valor:,}".replace(",", "."),
+        "Referencia",
+        beneficiario,
+        f"Producto origen: Cuenta de ahorros *{azar.randint(1000, 9999)}",
+    ]
+
+    # Página con texto, rasterizada e insertada como imagen: queda sin capa de texto
+    with fitz.open() as original:
+        pagina = original.new_page(width=420, height=595)
+        y = 60
+        for linea in lineas:
+            pagina.insert_text((40, y), linea, fontsize=13)
+            y += 34
+        imagen = pagina.get_pixmap(dpi=DPI_ESCANEO)
+
+    with fitz.open() as escaneado:
+        pagina = escaneado.new_page(width=420, height=595)
+        pagina.insert_image(pagina.rect, pixmap=imagen)
+        escaneado.save(ruta)
+
+    return {
+        "Fecha de Pago": f"{dia:02d}/{mes:02d}/{anio}",
+        "Beneficiario": beneficiario,
+        "Valor a Pagar": float(valor),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo y acierto del OCR de desprendibles por DPI")
+    parser.add_argument("--desprendibles", type=int, default=10)
+    parser.add_argument("--dpi", type=int, nargs="*", default=[150, 200, 300])
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    modulo = cargar_script("3.CE DESPRENDIBLES.py")
+    campos = ("Fecha de Pago", "Beneficiario", "Valor a Pagar")
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        esperados = {}
+        for i in range(args.desprendibles):
+            archivo = f"desprendible_{i:03d}.pdf"
+            esperados[archivo] = crear_desprendible(os.path.join(carpeta, archivo), i)
+
+        print(f"📊 {args.desprendibles} desprendibles escaneados, {args.workers} proceso(s) de OCR")
+        for dpi in args.dpi:
+            inicio = time.perf_counter()
+            filas = modulo.extraer_datos_desprendibles(carpeta, dpi=dpi, workers=args.workers)
+            segundos = time.perf_counter() - inicio
+
+            aciertos = {campo: 0 for campo in campos}
+            for fila in filas:
+                esperado = esperados[fila["Nombre Archivo"]]
+                for campo in campos:
+                    aciertos[campo] += fila[campo] == esperado[campo]
+
+            detalle = "  ".join(
+                f"{campo.split()[0].lower()} {aciertos[campo] / args.desprendibles:.0%}" for campo in campos
+            )
+            print(f"   {dpi:>3} DPI: {segundos / args.desprendibles:.2f} s/desprendible | acierto: {detalle}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import os
+import sys
+import time
+
+# ==============================================
+# ⏱️ BENCHMARK: PIPELINE CON RAMAS PARALELAS VS COLA SECUENCIAL
+# ==============================================
+# Simula las seis etapas con la duración indicada (en segundos, en el orden
+# 1..6) y mide el tiempo total de la cola secuencial que usaba el frontend
+# contra EjecucionPipeline con pipeline.ETAPAS_PIPELINE. El pipeline debe
+# tardar más o menos lo de la rama más larga. Las etapas esperan en lugar de
+# usar CPU: mide la planificación, no la capacidad de la máquina.
+# Uso: python benchmarks/bench_pipeline.py [--duraciones 3 2 4 3 2 1] [--paralelo 2]
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from pipeline import ETAPAS_PIPELINE, EjecucionPipeline, Etapa  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo total: cola secuencial vs pipeline con dependencias")
+    parser.add_argument("--duraciones", type=float, nargs=6, default=[3, 2, 4, 3, 2, 1],
+                        help="segundos de las etapas 1 a 6")
+    parser.add_argument("--paralelo", type=int, default=2)
+    args = parser.parse_args()
+
+    scripts = sorted(etapa.script for etapa in ETAPAS_PIPELINE)
+    duraciones = dict(zip(scripts, args.duraciones))
+
+    def simular(etapa):
+        time.sleep(duraciones[etapa.script])
+        return {"message": f"✅ {etapa.script}"}
+
+    inicio = time.perf_counter()
+    for script in sorted(duraciones):
+        simular(Etapa(script))
+    secuencial = time.perf_counter() - inicio
+
+    ejecucion = EjecucionPipeline(ETAPAS_PIPELINE)
+    inicio = time.perf_counter()
+    ejecucion.ejecutar(simular, max_paralelo=args.paralelo)
+    pipeline = time.perf_counter() - inicio
+
+    facturas = sum(duraciones[s] for s in ("1.ERP FC.py", "2. FC MUISKA.py", "5.FC COMBINACION.py"))
+    egresos = sum(duraciones[s] for s in ("3.CE DESPRENDIBLES.py", "4.CE ERP CONTABLE.py", "6 CE COMBINADO.py"))
+    print(f"📊 Rama facturas (1 → 2 → 5): {facturas:.1f}s | rama egresos (3 → 4 → 6): {egresos:.1f}s")
+    print(f"   Secuencial: {secuencial:6.2f}s")
+    print(f"   Pipeline:   {pipeline:6.2f}s ({secuencial / pipeline:.2f}x, {args.paralelo} etapas a la vez)")
+    for etapa in ejecucion.a_dict()["etapas"]:
+        print(f"   • {etapa['script']:<24} {etapa['estado']:<11} {etapa['duracion_segundos']:5.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+# ==============================================
+# ⏱️ BENCHMARK: PLANTILLA DE REGIONES VS PÁGINA COMPLETA
+# ==============================================
+# Mide los milisegundos por documento de leer el texto completo de cada
+# página (pdfplumber y PyMuPDF, sin caché) contra leer solo las regiones de
+# la plantilla del tipo. La plantilla se toma de scripts/plantillas (o de
+# PLANTILLAS_PATH); se genera con PLANTILLAS_MODO=aprender en el script.
+# Uso: python benchmarks/bench_plantillas.py [--tipo factura_erp] [--pdfs ...] [--repeticiones 5]
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from comun.plantillas import Plantilla, ruta_plantilla  # noqa: E402
+from comun.texto_pdf import BACKENDS  # noqa: E402
+
+PDFS_MUESTRA = sorted(glob.glob(os.path.join(BASE_DIR, "uploads", "1_ERP_FC", "*.pdf")))
+
+
+def pagina_completa(backend):
+    def extraer(ruta):
+        documento = backend.abrir(ruta)
+        try:
+            for i in range(backend.total_paginas(documento)):
+                backend.texto_pagina(documento, i)
+        finally:
+            backend.cerrar(documento)
+    return extraer
+
+
+def medir(extraer, rutas, repeticiones):
+    """Mediana de milisegundos por documento"""
+    extraer(rutas[0])  # calentamiento: importaciones y fuentes
+    muestras = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for ruta in rutas:
+            extraer(ruta)
+        muestras.append((time.perf_counter() - inicio) * 1000 / len(rutas))
+    return statistics.median(muestras)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Milisegundos por documento: plantilla de regiones vs página completa")
+    parser.add_argument("--tipo", default="factura_erp")
+    parser.add_argument("--pdfs", nargs="*", default=PDFS_MUESTRA)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    if not args.pdfs:
+        parser.error("no hay PDFs de muestra; indíquelos con --pdfs")
+    plantilla = Plantilla.cargar(args.tipo)
+    if plantilla is None:
+        parser.error(f"no hay plantilla en {ruta_plantilla(args.tipo)}; apréndala con PLANTILLAS_MODO=aprender")
+
+    completos = sum(all(plantilla.extraer(ruta)["campos"].values()) for ruta in args.pdfs)
+    tiempos = {f"{nombre} página": pagina_completa(backend) for nombre, backend in BACKENDS.items()}
+    tiempos["plantilla"] = plantilla.extraer
+    tiempos = {nombre: medir(extraer, args.pdfs, args.repeticiones) for nombre, extraer in tiempos.items()}
+
+    print(f"📊 {len(args.pdfs)} PDFs, {args.repeticiones} repeticiones, plantilla '{args.tipo}' "
+          f"({completos} con todos los campos en sus regiones)")
+    for nombre, milisegundos in tiempos.items():
+        print(f"   {nombre:<18} {milisegundos:8.2f} ms/documento")
+    for nombre in BACKENDS:
+        print(f"   ⚡ Plantilla {tiempos[f'{nombre} página'] / tiempos['plantilla']:.1f}x más rápida que {nombre}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# ==============================================
+# ⏱️ BENCHMARK: PUBLICAR RESULTADOS COPIANDO VS ENLAZANDO
+# ==============================================
+# Crea N PDFs en una carpeta de script simulada y los publica en una
+# carpeta de resultados con shutil.copy2 (como antes) y con hardlinks
+# (espacios.enlazar). Mide tiempo y bytes nuevos escritos en disco.
+# Uso: python benchmarks/bench_publicacion.py [--pdfs 500] [--kb 200]
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from espacios import enlazar  # noqa: E402
+
+
+def uso_disco(ruta):
+    """Bytes realmente ocupados (bloques) por la carpeta, sin contar dos veces un mismo inodo"""
+    vistos, total = set(), 0
+    for raiz, _, nombres in os.walk(ruta):
+        for nombre in nombres:
+            info = os.stat(os.path.join(raiz, nombre))
+            if info.st_ino not in vistos:
+                vistos.add(info.st_ino)
+                total += info.st_blocks * 512
+    return total
+
+
+def publicar(origen, destino, funcion):
+    os.makedirs(destino)
+    inicio = time.perf_counter()
+    for nombre in os.listdir(origen):
+        funcion(os.path.join(origen, nombre), os.path.join(destino, nombre))
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publicación de resultados: copy2 vs hardlink")
+    parser.add_argument("--pdfs", type=int, default=500)
+    parser.add_argument("--kb", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as raiz:
+        origen = os.path.join(raiz, "uploads")
+        os.makedirs(origen)
+        contenido = os.urandom(args.kb * 1024)
+        for n in range(args.pdfs):
+            with open(os.path.join(origen, f"factura_{n:05d}.pdf"), "wb") as archivo:
+                archivo.write(contenido)
+        base = uso_disco(raiz)
+
+        copia = publicar(origen, os.path.join(raiz, "copia"), shutil.copy2)
+        extra_copia = uso_disco(raiz) - base
+        shutil.rmtree(os.path.join(raiz, "copia"))
+
+        enlace = publicar(origen, os.path.join(raiz, "enlace"), enlazar)
+        extra_enlace = uso_disco(raiz) - base
+
+    mb = 1024 * 1024
+    print(f"📊 Publicar {args.pdfs} PDFs de {args.kb} KB")
+    print(f"   shutil.copy2: {copia:6.3f}s | {extra_copia / mb:8.1f} MB nuevos en disco")
+    print(f"   hardlink:     {enlace:6.3f}s | {extra_enlace / mb:8.1f} MB nuevos en disco ({copia / enlace:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+# ==============================================
+# ⏱️ BENCHMARK: EMPAREJAMIENTO POR TABLAS VS POR NOMBRES DE ARCHIVO
+# ==============================================
+# Arma las tablas que dejan 1.ERP FC y 2. FC MUISKA (y los nombres de
+# archivo que esos scripts generan) para N facturas con pareja conocida:
+# algunas con la fecha del soporte corrida uno o dos días y algunas sin
+# soporte. Compara 5.FC COMBINACION por tablas (joins de pandas + nombres
+# para los sobrantes) con la heurística de nombres sola: tiempo, parejas
+# correctas y parejas equivocadas.
+# Uso: python benchmarks/bench_tablas.py [--tamanos 1000 5000 20000]
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from motor import SCRIPTS_PATH, cargar_script  # noqa: E402
+
+sys.path.insert(0, SCRIPTS_PATH)
+
+import pandas as pd  # noqa: E402
+
+from bench_emparejamiento import APELLIDOS, NOMBRES  # noqa: E402
+from comun.tablas import emparejar_con_tablas  # noqa: E402
+
+
+def generar_caso(erp_fc, muiska, combinacion, cantidad, semilla=0):
+    """Tablas y archivos (ya procesados por 5.FC COMBINACION) con la pareja verdadera de cada ERP"""
+    azar = random.Random(semilla)
+    proveedores = [
+        f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)}" for _ in range(cantidad // 10 + 5)
+    ]
+    filas_erp, filas_soporte, verdad = [], [], {}
+    for n in range(cantidad):
+        dia, mes = azar.randint(1, 25), azar.randint(9, 11)
+        proveedor = azar.choice(proveedores)
+        subtotal = azar.randint(50, 9000) * 1000
+        fecha = f"{dia}/{mes}/2025"
+        renombrado = erp_fc.limpiar_nombre_archivo(f"{n + 1}-1_{fecha}_{proveedor}_{subtotal}.pdf")
+        filas_erp.append([f"{n + 1}-1", fecha, proveedor, subtotal, renombrado])
+
+        sorteo = azar.random()
+        if sorteo < 0.05:
+            continue  # Factura sin soporte
+        dia_soporte = dia + (azar.randint(1, 2) if sorteo < 0.20 else 0)
+        fila = [f"{dia_soporte:02d}/{mes:02d}/2025", f"{proveedor} S.A.S.", float(subtotal), "Subtotal", f"m{n}.pdf"]
+        fila.append(muiska.nombre_renombrado(*fila[:3]))
+        verdad[n] = len(filas_soporte)
+        filas_soporte.append(fila)
+
+    tabla_erp = pd.DataFrame(filas_erp, columns=["Factura", "Fecha", "Proveedor", "Subtotal", "Archivo Renombrado"])
+    tabla_soporte = pd.DataFrame(filas_soporte, columns=["Fecha", "Razón Social Proveedores", "Subtotal/Total",
+                                                         "Fuente del Valor", "Nombre del Archivo", "Archivo Renombrado"])
+    archivos_erp = [combinacion.procesar_archivo(nombre, nombre) for nombre in tabla_erp["Archivo Renombrado"]]
+    archivos_soporte = [combinacion.procesar_archivo(nombre, nombre) for nombre in tabla_soporte["Archivo Renombrado"]]
+    return tabla_erp, tabla_soporte, archivos_erp, archivos_soporte, verdad
+
+
+def evaluar(coincidencias, verdad):
+    correctas = sum(verdad.get(c['indice_erp']) == c['indice_soporte'] for c in coincidencias)
+    return correctas, len(coincidencias) - correctas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emparejamiento por tablas de resultados vs por nombres de archivo")
+    parser.add_argument("--tamanos", type=int, nargs="*", default=[1000, 5000, 20000])
+    args = parser.parse_args()
+
+    erp_fc = cargar_script("1.ERP FC.py")
+    muiska = cargar_script("2. FC MUISKA.py")
+    combinacion = cargar_script("5.FC COMBINACION.py")
+
+    print("📊 Facturas | pares reales | tablas: tiempo / correctas / erradas (por tabla) | nombres: tiempo / correctas / erradas")
+    for cantidad in args.tamanos:
+        tabla_erp, tabla_soporte, archivos_erp, archivos_soporte, verdad = generar_caso(
+            erp_fc, muiska, combinacion, cantidad
+        )
+
+        inicio = time.perf_counter()
+        por_tablas, origen = emparejar_con_tablas(
+            archivos_erp, archivos_soporte, (tabla_erp, combinacion.TABLA_ERP), (tabla_soporte, combinacion.TABLA_SOPORTE),
+            lambda erp, soporte: combinacion.encontrar_coincidencias_precisas(erp, soporte, "voraz"),
+        )
+        t_tablas = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        por_nombres = combinacion.encontrar_coincidencias_precisas(archivos_erp, archivos_soporte, "voraz")
+        t_nombres = time.perf_counter() - inicio
+
+        ok_t, mal_t = evaluar(por_tablas, verdad)
+        ok_n, mal_n = evaluar(por_nombres, verdad)
+        print(f"   {cantidad:>7} | {len(verdad):>12} | {t_tablas:6.2f}s / {ok_t:>6} / {mal_t:>5} ({origen['por_tabla']}) | "
+              f"{t_nombres:6.2f}s / {ok_n:>6} / {mal_n:>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+# ==============================================
+# ⏱️ BENCHMARK: PÁGINAS POR SEGUNDO DE CADA BACKEND DE TEXTO
+# ==============================================
+# Mide la extracción pura (sin caché) de pdfplumber y PyMuPDF sobre los
+# mismos PDFs. Uso: python benchmarks/bench_texto.py [--pdfs ...] [--repeticiones 5]
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from comun.texto_pdf import BACKENDS  # noqa: E402
+
+PDFS_MUESTRA = sorted(
+    glob.glob(os.path.join(BASE_DIR, "uploads", "1_ERP_FC", "*.pdf"))
+    + glob.glob(os.path.join(BASE_DIR, "uploads", "2__FC_MUISKA", "*.pdf"))
+)
+
+
+def medir(backend, rutas):
+    """Extrae todas las páginas de todos los PDFs; devuelve (páginas, segundos)"""
+    paginas = 0
+    inicio = time.perf_counter()
+    for ruta in rutas:
+        documento = backend.abrir(ruta)
+        try:
+            for i in range(backend.total_paginas(documento)):
+                backend.texto_pagina(documento, i)
+                paginas += 1
+        finally:
+            backend.cerrar(documento)
+    return paginas, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Páginas por segundo de cada backend de texto")
+    parser.add_argument("--pdfs", nargs="*", default=PDFS_MUESTRA)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    if not args.pdfs:
+        parser.error("no hay PDFs de muestra; indíquelos con --pdfs")
+
+    velocidades = {}
+    for nombre, backend in BACKENDS.items():
+        medir(backend, args.pdfs[:1])  # calentamiento: importaciones y fuentes
+        muestras = []
+        for _ in range(args.repeticiones):
+            paginas, segundos = medir(backend, args.pdfs)
+            muestras.append(paginas / segundos)
+        velocidades[nombre] = statistics.median(muestras)
+
+    print(f"📊 {len(args.pdfs)} PDFs, {args.repeticiones} repeticiones")
+    for nombre, velocidad in velocidades.items():
+        print(f"   {nombre:<11} {velocidad:8.1f} páginas/s")
+    ganancia = velocidades["pymupdf"] / velocidades["pdfplumber"]
+    print(f"   ⚡ PyMuPDF es {ganancia:.1f}x más rápido")
+
+
+if __name__ == "__main__":
+    main()
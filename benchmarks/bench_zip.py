@@ -0,0 +1,74 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+# ==============================================
+# ⏱️ BENCHMARK: ZIP AL VUELO VS ZIP ARMADO EN DISCO
+# ==============================================
+# Crea N PDFs y un Excel en una carpeta de resultados simulada y compara
+# zipfile escribiendo el archivo completo en disco (deflate para todo)
+# contra descarga_zip.PlanZip, que genera el ZIP por bloques: tiempo hasta
+# el primer byte, tiempo total y bytes escritos en disco.
+# Uso: python benchmarks/bench_zip.py [--pdfs 300] [--kb 200]
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from descarga_zip import PlanZip  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ZIP de resultados: en disco vs al vuelo")
+    parser.add_argument("--pdfs", type=int, default=300)
+    parser.add_argument("--kb", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as raiz:
+        archivos = []
+        contenido = os.urandom(args.kb * 1024)
+        for n in range(args.pdfs):
+            ruta = os.path.join(raiz, f"factura_{n:05d}.pdf")
+            with open(ruta, "wb") as archivo:
+                archivo.write(contenido)
+            archivos.append((os.path.basename(ruta), ruta))
+        ruta_excel = os.path.join(raiz, "resultado.csv")
+        with open(ruta_excel, "w") as archivo:
+            archivo.writelines(f"{n},factura_{n:05d}.pdf,1560000\n" for n in range(args.pdfs))
+        archivos.append(("resultado.csv", ruta_excel))
+
+        inicio = time.perf_counter()
+        destino = os.path.join(raiz, "resultados.zip")
+        with zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as zip_disco:
+            for nombre, ruta in archivos:
+                zip_disco.write(ruta, nombre)
+        primer_byte_disco = total_disco = time.perf_counter() - inicio
+        bytes_disco = os.path.getsize(destino)
+
+        inicio = time.perf_counter()
+        plan = PlanZip(archivos)
+        bloques = plan.leer()
+        enviados = len(next(bloques))
+        primer_byte = time.perf_counter() - inicio
+        enviados += sum(len(b) for b in bloques)
+        total = time.perf_counter() - inicio
+        segunda = medir_plan(archivos)
+
+    mb = 1024 * 1024
+    print(f"📊 ZIP de {args.pdfs} PDFs de {args.kb} KB + 1 CSV")
+    print(f"   zipfile en disco: primer byte {primer_byte_disco:6.3f}s | total {total_disco:6.3f}s | "
+          f"{bytes_disco / mb:7.1f} MB escritos en disco")
+    print(f"   PlanZip al vuelo: primer byte {primer_byte:6.3f}s | total {total:6.3f}s | "
+          f"   0.0 MB escritos en disco ({enviados / mb:.1f} MB enviados)")
+    print(f"   Segunda descarga (CRC en caché): {segunda:6.3f}s hasta el primer byte")
+
+
+def medir_plan(archivos):
+    inicio = time.perf_counter()
+    next(PlanZip(archivos).leer())
+    return time.perf_counter() - inicio
+
+
+if __name__ == "__main__":
+    main()
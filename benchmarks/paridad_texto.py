@@ -0,0 +1,98 @@
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+
+# ==============================================
+# ⚖️ PARIDAD: PDFPLUMBER VS PYMUPDF
+# ==============================================
+# Comprueba que los dos backends de texto den los mismos campos en los PDFs
+# de muestra de los scripts 1, 2 y 4. Sale con código 1 si alguno difiere.
+# Uso: python benchmarks/paridad_texto.py [--pdfs-erp ...] [--pdfs-muiska ...] [--pdfs-ce ...]
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+# Sin caché ni plantillas de regiones: cada backend debe leer de verdad el PDF
+os.environ["CACHE_PDF_MAX_MB"] = "0"
+os.environ["PLANTILLAS_MODO"] = "no"
+
+from motor import SCRIPTS_PATH, cargar_script  # noqa: E402
+
+sys.path.insert(0, SCRIPTS_PATH)
+
+UPLOADS = os.path.join(BASE_DIR, "uploads")
+BACKENDS = ("pdfplumber", "pymupdf")
+
+
+def muestras(*partes):
+    return sorted(glob.glob(os.path.join(UPLOADS, *partes, "*.pdf")))
+
+
+def campos_erp(modulo, ruta, backend):
+    campos = modulo.extraer_campos_factura(ruta, backend)
+    return {clave: campos[clave] for clave in ("proveedor", "subtotal", "fecha", "error")}
+
+
+def campos_muiska(modulo, ruta, backend):
+    campos = modulo.extraer_campos_pdf(ruta, backend) or {}
+    return {clave: campos.get(clave) for clave in ("fecha", "razon_social", "valor", "fuente")}
+
+
+def campos_ce(modulo, ruta, backend):
+    beneficiario, fecha, total = modulo.extraer_campos_comprobante(ruta, backend)
+    return {"beneficiario": beneficiario, "fecha": fecha, "total": total}
+
+
+def comparar(nombre, script, extractor, rutas):
+    """Extrae con cada backend y devuelve cuántos PDFs difieren"""
+    if not rutas:
+        print(f"⏭️ {nombre}: sin PDFs de muestra")
+        return 0
+
+    modulo = cargar_script(script)
+    diferencias = 0
+    for ruta in rutas:
+        resultados = {}
+        for backend in BACKENDS:
+            # Los scripts imprimen su progreso; aquí solo interesa el resultado
+            with contextlib.redirect_stdout(io.StringIO()):
+                resultados[backend] = extractor(modulo, ruta, backend)
+
+        referencia, rapido = (resultados[b] for b in BACKENDS)
+        archivo = os.path.basename(ruta)
+        if referencia == rapido:
+            print(f"   ✅ {nombre} | {archivo}")
+            continue
+
+        diferencias += 1
+        print(f"   ❌ {nombre} | {archivo}")
+        for clave in referencia:
+            if referencia[clave] != rapido.get(clave):
+                print(f"      {clave}: {referencia[clave]!r} != {rapido.get(clave)!r}")
+    return diferencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara los campos extraídos con pdfplumber y con PyMuPDF")
+    parser.add_argument("--pdfs-erp", nargs="*", default=muestras("1_ERP_FC"))
+    parser.add_argument("--pdfs-muiska", nargs="*", default=muestras("2__FC_MUISKA"))
+    parser.add_argument("--pdfs-ce", nargs="*", default=muestras("4_CE_ERP_CONTABLE", "ERP_COMPROBANTE_EGRESO"))
+    args = parser.parse_args()
+
+    print(f"⚖️ Paridad de backends de texto: {' vs '.join(BACKENDS)}")
+    diferencias = (
+        comparar("1.ERP FC", "1.ERP FC.py", campos_erp, args.pdfs_erp)
+        + comparar("2. FC MUISKA", "2. FC MUISKA.py", campos_muiska, args.pdfs_muiska)
+        + comparar("4.CE ERP CONTABLE", "4.CE ERP CONTABLE.py", campos_ce, args.pdfs_ce)
+    )
+
+    if diferencias:
+        print(f"\n❌ {diferencias} PDF(s) con campos distintos entre backends")
+        sys.exit(1)
+    print("\n✅ Ambos backends extraen los mismos campos")
+
+
+if __name__ == "__main__":
+    main()
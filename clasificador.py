@@ -0,0 +1,128 @@
+import os
+import subprocess
+import time
+import unicodedata
+
+import fitz  # PyMuPDF
+
+# ==============================================
+# 🧭 CLASIFICADOR DE DOCUMENTOS POR PRIMERA PÁGINA
+# ==============================================
+# Decide a qué script va un PDF leyendo solo la capa de texto de su primera
+# página y buscando las frases que los propios scripts usan como ancla. Si
+# la página no tiene texto (escaneado), se renderiza en gris a baja
+# resolución y se pasa por tesseract: basta para leer los encabezados.
+# Las anclas se comparan en minúsculas y sin tildes (el OCR suele perderlas).
+MIN_CARACTERES_TEXTO = 200  # como 3.CE DESPRENDIBLES: menos que esto es un escaneado
+PUNTAJE_MINIMO = 3
+CLASIFICADOR_DPI_POR_DEFECTO = 100
+CLASIFICADOR_TIMEOUT_POR_DEFECTO = 30  # segundos de tesseract por página: la subida espera la clasificación
+
+# Tipo de documento → script que lo procesa y anclas con su peso
+TIPOS_DOCUMENTO = {
+    "factura_erp": {
+        "script": "1.ERP FC.py",
+        "anclas": {"factura de compra": 3, "proveedo": 2, "por concepto de": 2, "documento externo": 1},
+    },
+    "factura_muiska": {
+        "script": "2. FC MUISKA.py",
+        "anclas": {
+            "datos del emisor / vendedor": 3, "datos del vendedor": 3, "cufe": 3, "cuds": 3,
+            "representacion grafica": 2, "documento soporte": 2, "factura electronica": 2,
+            "datos del adquiriente": 2, "razon social": 1,
+        },
+    },
+    "desprendible_banco": {
+        "script": "3.CE DESPRENDIBLES.py",
+        "anclas": {"dian - pse": 3, "transferencia": 2, "comprobante": 1, "referencia": 1, "identificacion": 1},
+    },
+    "comprobante_egreso_erp": {
+        "script": "4.CE ERP CONTABLE.py",
+        "anclas": {"comprobante de egreso": 3, "total del documento": 3, "beneficiario": 1},
+    },
+}
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes y con los espacios colapsados"""
+    sin_tildes = unicodedata.normalize("NFKD", texto)
+    sin_tildes = "".join(c for c in sin_tildes if not unicodedata.combining(c))
+    return " ".join(sin_tildes.lower().split())
+
+
+def clasificar_texto(texto):
+    """(tipo, puntajes por tipo) de un texto; tipo es None si no hay un ganador claro"""
+    normalizado = normalizar(texto)
+    puntajes = {
+        tipo: sum(peso for ancla, peso in definicion["anclas"].items() if ancla in normalizado)
+        for tipo, definicion in TIPOS_DOCUMENTO.items()
+    }
+    orden = sorted(puntajes.items(), key=lambda par: par[1], reverse=True)
+    mejor, puntaje = orden[0]
+    if puntaje < PUNTAJE_MINIMO or puntaje == orden[1][1]:
+        return None, puntajes
+    return mejor, puntajes
+
+
+def dpi_clasificador():
+    """Resolución del render para OCR del clasificador (variable CLASIFICADOR_DPI)"""
+    return int(os.environ.get("CLASIFICADOR_DPI", CLASIFICADOR_DPI_POR_DEFECTO))
+
+
+def timeout_ocr():
+    """Segundos máximos del OCR de una página (variable CLASIFICADOR_TIMEOUT)"""
+    return float(os.environ.get("CLASIFICADOR_TIMEOUT", CLASIFICADOR_TIMEOUT_POR_DEFECTO))
+
+
+def comando_tesseract():
+    if os.name == "nt":
+        return r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+    return "tesseract"
+
+
+def ocr_rapido(pagina, dpi):
+    """Texto de una página renderizada en gris a baja resolución (tesseract por stdin)"""
+    imagen = pagina.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY).tobytes("pnm")
+    try:
+        proceso = subprocess.run(
+            [comando_tesseract(), "stdin", "stdout", "-l", "spa", "--dpi", str(dpi)],
+            input=imagen,
+            capture_output=True,
+            timeout=timeout_ocr(),
+        )
+    except FileNotFoundError:
+        raise RuntimeError("PDF escaneado y tesseract no está instalado")
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"OCR de la primera página superó {timeout_ocr():g} s")
+    if proceso.returncode != 0:
+        raise RuntimeError(proceso.stderr.decode("utf-8", "replace").strip() or "tesseract falló")
+    return proceso.stdout.decode("utf-8", "replace")
+
+
+def clasificar_pdf(ruta, ocr=True, dpi=None):
+    """Clasifica un PDF por su primera página.
+
+    Devuelve un dict con "tipo" (None si no se reconoce), "script",
+    "fuente" ("texto" u "ocr"), "puntajes", "duracion" y "error". Sin
+    `ocr`, un escaneado queda sin clasificar en vez de pagar tesseract; si
+    tesseract no termina a tiempo también queda sin clasificar, con el error.
+    """
+    inicio = time.perf_counter()
+    resultado = {"tipo": None, "script": None, "fuente": "texto", "puntajes": {}, "error": None}
+    try:
+        with fitz.open(ruta) as documento:
+            if not documento.page_count:
+                raise ValueError("PDF sin páginas")
+            pagina = documento[0]
+            texto = pagina.get_text()
+            resultado["tipo"], resultado["puntajes"] = clasificar_texto(texto)
+            if resultado["tipo"] is None and ocr and len(texto.strip()) < MIN_CARACTERES_TEXTO:
+                resultado["fuente"] = "ocr"
+                texto = ocr_rapido(pagina, dpi or dpi_clasificador())
+                resultado["tipo"], resultado["puntajes"] = clasificar_texto(texto)
+    except Exception as e:
+        resultado["error"] = str(e)
+    if resultado["tipo"]:
+        resultado["script"] = TIPOS_DOCUMENTO[resultado["tipo"]]["script"]
+    resultado["duracion"] = time.perf_counter() - inicio
+    return resultado
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import struct
+import time
+import zlib
+from functools import lru_cache
+
+# ==============================================
+# 📦 ZIP DE RESULTADOS GENERADO AL VUELO
+# ==============================================
+# El ZIP nunca se escribe en disco: se arma como una lista de segmentos
+# (cabeceras en memoria y regiones de los archivos originales) y se envía
+# por partes. Como el resultado es determinista (mismo contenido → mismos
+# bytes), se conoce su tamaño total y se puede atender un Range desde
+# cualquier byte para reanudar una descarga cortada. Los PDFs van sin
+# comprimir (ya lo están por dentro) y los Excel/CSV con deflate.
+EXTENSIONES_DEFLATE = (".xlsx", ".xls", ".csv")
+TAMANO_BLOQUE = 1024 * 1024
+LIMITE_ZIP32 = 0xFFFFFFFF
+MAX_ENTRADAS_ZIP32 = 0xFFFF
+
+
+@lru_cache(maxsize=8192)
+def crc_archivo(ruta, inodo, modificado_ns, tamano):
+    """CRC-32 de un archivo; la caché es válida mientras no cambie (inodo, mtime, tamaño)"""
+    crc = 0
+    with open(ruta, "rb") as archivo:
+        while True:
+            bloque = archivo.read(TAMANO_BLOQUE)
+            if not bloque:
+                return crc
+            crc = zlib.crc32(bloque, crc)
+
+
+def linea_huella(nombre, info):
+    """Parte de la huella (ETag) del ZIP que aporta un archivo: cambia si se reescribe o reemplaza"""
+    return f"{nombre}\0{info.st_ino}\0{info.st_mtime_ns}\0{info.st_size}\0".encode("utf-8")
+
+
+def huella_archivos(archivos):
+    """ETag que tendría el PlanZip de `archivos`, solo con os.stat (sin leer ni comprimir nada)"""
+    huella = hashlib.sha256()
+    for nombre, ruta in archivos:
+        huella.update(linea_huella(nombre, os.stat(ruta)))
+    return huella.hexdigest()[:32]
+
+
+def fecha_dos(marca):
+    """(hora, fecha) en formato MS-DOS a partir de un timestamp"""
+    t = time.localtime(max(marca, 315532800))  # el formato empieza en 1980
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+
+class PlanZip:
+    """Disposición byte a byte de un ZIP con `archivos` = [(nombre en el ZIP, ruta)].
+
+    Calcula de antemano cabeceras, CRC y desplazamientos (y comprime los
+    Excel/CSV); `leer(inicio, fin)` genera solo los bytes del rango pedido.
+    Armarlo cuesta, así que se reutiliza mientras `etag` coincida con
+    huella_archivos. Lanza ValueError si el ZIP supera los límites del
+    formato sin ZIP64 (4 GiB o 65535 archivos).
+    """
+
+    def __init__(self, archivos):
+        if len(archivos) > MAX_ENTRADAS_ZIP32:
+            raise ValueError(f"Demasiados archivos para un ZIP ({len(archivos)})")
+        self.segmentos = []  # (inicio, longitud, bytes en memoria o ruta del archivo)
+        self.tamano = 0
+        huella = hashlib.sha256()
+        central = []
+
+        for nombre, ruta in archivos:
+            info = os.stat(ruta)
+            nombre_bytes = nombre.encode("utf-8")
+            hora, fecha = fecha_dos(info.st_mtime)
+            huella.update(linea_huella(nombre, info))
+
+            if nombre.lower().endswith(EXTENSIONES_DEFLATE):
+                metodo = 8
+                with open(ruta, "rb") as archivo:
+                    crudo = archivo.read()
+                crc = zlib.crc32(crudo)
+                compresor = zlib.compressobj(6, zlib.DEFLATED, -15)
+                datos = compresor.compress(crudo) + compresor.flush()
+                comprimido = len(datos)
+            else:
+                metodo = 0
+                crc = crc_archivo(ruta, info.st_ino, info.st_mtime_ns, info.st_size)
+                datos = ruta
+                comprimido = info.st_size
+
+            desplazamiento = self.tamano
+            # Bit 11: nombre en UTF-8 (tildes y ñ en los nombres de los PDFs)
+            local = struct.pack(
+                "<IHHHHHIIIHH", 0x04034B50, 20, 0x0800, metodo, hora, fecha,
+                crc, comprimido, info.st_size, len(nombre_bytes), 0
+            ) + nombre_bytes
+            self._agregar(local, len(local))
+            self._agregar(datos, comprimido)
+            central.append(struct.pack(
+                "<IHHHHHHIIIHHHHHII", 0x02014B50, (3 << 8) | 20, 20, 0x0800, metodo, hora, fecha,
+                crc, comprimido, info.st_size, len(nombre_bytes), 0, 0, 0, 0, 0o100644 << 16, desplazamiento
+            ) + nombre_bytes)
+
+        inicio_central = self.tamano
+        directorio = b"".join(central)
+        self._agregar(directorio, len(directorio))
+        fin = struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, len(central), len(central),
+                          len(directorio), inicio_central, 0)
+        self._agregar(fin, len(fin))
+        if self.tamano > LIMITE_ZIP32:
+            raise ValueError(f"El ZIP superaría 4 GiB ({self.tamano} bytes)")
+        self.etag = huella.hexdigest()[:32]
+
+    def _agregar(self, fuente, longitud):
+        if longitud:
+            self.segmentos.append((self.tamano, longitud, fuente))
+            self.tamano += longitud
+
+    def leer(self, inicio=0, fin=None):
+        """Genera los bytes [inicio, fin) del ZIP por bloques"""
+        fin = self.tamano if fin is None else min(fin, self.tamano)
+        for comienzo, longitud, fuente in self.segmentos:
+            if comienzo + longitud <= inicio:
+                continue
+            if comienzo >= fin:
+                break
+            desde = max(inicio, comienzo) - comienzo
+            hasta = min(fin, comienzo + longitud) - comienzo
+            if isinstance(fuente, bytes):
+                yield fuente[desde:hasta]
+                continue
+            with open(fuente, "rb") as archivo:
+                archivo.seek(desde)
+                pendiente = hasta - desde
+                while pendiente > 0:
+                    bloque = archivo.read(min(TAMANO_BLOQUE, pendiente))
+                    if not bloque:
+                        raise IOError(f"{fuente} cambió durante la descarga")
+                    pendiente -= len(bloque)
+                    yield bloque
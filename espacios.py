@@ -0,0 +1,166 @@
+import os
+import re
+import shutil
+import threading
+import time
+
+# ==============================================
+# 🗃️ ESPACIOS DE RESULTADOS POR EJECUCIÓN
+# ==============================================
+# Cada ejecución publica sus archivos en <raíz>/<id de ejecución>, así dos
+# ejecuciones (o dos usuarios) no se borran los resultados entre sí. Los
+# espacios viejos se eliminan por antigüedad (TTL) y, si la raíz supera la
+# cuota de disco, se eliminan los más antiguos hasta volver a entrar en
+# ella. Los espacios de ejecuciones en curso nunca se eliminan. Un archivo
+# publicado por hardlink en varios espacios ocupa disco una sola vez y se
+# cuenta una sola vez: en el espacio más reciente que lo tiene.
+PATRON_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+def enlazar(origen, destino):
+    """Publica `origen` en `destino` sin copiar bytes (hardlink); copia si el sistema no lo permite.
+
+    Reemplaza `destino` si ya existía. Devuelve True si quedó enlazado.
+    """
+    if os.path.lexists(destino):
+        os.unlink(destino)
+    try:
+        os.link(origen, destino)
+        return True
+    except OSError:
+        # Otro sistema de archivos o sin soporte de hardlinks
+        shutil.copy2(origen, destino)
+        return False
+
+
+def tamano_carpeta(ruta, vistos=None):
+    """Bytes ocupados por los archivos de una carpeta (recursivo).
+
+    Cada archivo (dispositivo, inodo) se cuenta una vez: los enlaces a uno
+    que ya está en `vistos` no suman, y los nuevos se agregan al conjunto.
+    """
+    if vistos is None:
+        vistos = set()
+    total = 0
+    for raiz, _, archivos in os.walk(ruta):
+        for nombre in archivos:
+            try:
+                info = os.stat(os.path.join(raiz, nombre))
+            except OSError:
+                continue
+            if (info.st_dev, info.st_ino) not in vistos:
+                vistos.add((info.st_dev, info.st_ino))
+                total += info.st_size
+    return total
+
+
+class EspaciosResultados:
+    """Carpetas de resultados por ejecución con recolección por TTL y cuota"""
+
+    def __init__(self, raiz, ttl_segundos=24 * 3600, cuota_bytes=1024 * 1024 * 1024):
+        self.raiz = raiz
+        self.ttl_segundos = ttl_segundos
+        self.cuota_bytes = cuota_bytes
+        self._activos = set()
+        self._lock = threading.Lock()
+        os.makedirs(raiz, exist_ok=True)
+
+    def ruta(self, ejecucion_id):
+        """Carpeta de una ejecución (None si el id no es válido o ya no existe)"""
+        if not PATRON_ID.match(ejecucion_id or ""):
+            return None
+        ruta = os.path.join(self.raiz, ejecucion_id)
+        return ruta if os.path.isdir(ruta) else None
+
+    def crear(self, ejecucion_id):
+        """Crea la carpeta de la ejecución (tras recolectar las viejas) y la marca como activa"""
+        if not PATRON_ID.match(ejecucion_id):
+            raise ValueError(f"Id de ejecución inválido: {ejecucion_id}")
+        self.recolectar()
+        ruta = os.path.join(self.raiz, ejecucion_id)
+        with self._lock:
+            self._activos.add(ejecucion_id)
+        os.makedirs(ruta, exist_ok=True)
+        return ruta
+
+    def liberar(self, ejecucion_id):
+        """La ejecución terminó: su carpeta ya puede recolectarse"""
+        with self._lock:
+            self._activos.discard(ejecucion_id)
+        # La fecha de modificación marca el inicio del TTL
+        ruta = self.ruta(ejecucion_id)
+        if ruta:
+            os.utime(ruta)
+
+    def listar(self, ejecucion_id):
+        """Archivos de una ejecución: [{"nombre", "tamaño"}] (None si no existe).
+
+        El nombre es relativo a la carpeta de la ejecución ("FC_EMPRESA/x.pdf").
+        """
+        ruta = self.ruta(ejecucion_id)
+        if ruta is None:
+            return None
+        archivos = []
+        for raiz, _, nombres in os.walk(ruta):
+            for nombre in nombres:
+                archivo = os.path.join(raiz, nombre)
+                relativo = os.path.relpath(archivo, ruta).replace(os.sep, "/")
+                archivos.append({"nombre": relativo, "tamaño": os.path.getsize(archivo)})
+        return sorted(archivos, key=lambda a: a["nombre"])
+
+    def mas_reciente(self):
+        """Id de la ejecución con la carpeta modificada más recientemente"""
+        espacios = self._espacios()
+        return max(espacios, key=lambda e: e[1])[0] if espacios else None
+
+    def _espacios(self):
+        """[(id, fecha de modificación, ruta)] de las carpetas de ejecución existentes"""
+        espacios = []
+        for nombre in os.listdir(self.raiz):
+            ruta = os.path.join(self.raiz, nombre)
+            if PATRON_ID.match(nombre) and os.path.isdir(ruta):
+                espacios.append((nombre, os.path.getmtime(ruta), ruta))
+        return espacios
+
+    def uso_bytes(self):
+        vistos = set()
+        return sum(tamano_carpeta(ruta, vistos) for _, _, ruta in self._espacios())
+
+    def recolectar(self):
+        """Elimina los espacios vencidos y, si se supera la cuota, los más antiguos.
+
+        Devuelve cuántos espacios se eliminaron.
+        """
+        with self._lock:
+            activos = set(self._activos)
+        ahora = time.time()
+        eliminados = 0
+        conservados = []
+        for ejecucion_id, modificado, ruta in sorted(self._espacios(), key=lambda e: e[1]):
+            if ejecucion_id not in activos and ahora - modificado > self.ttl_segundos:
+                shutil.rmtree(ruta, ignore_errors=True)
+                eliminados += 1
+            else:
+                conservados.append((ejecucion_id, ruta))
+
+        # Del más reciente al más antiguo: un archivo compartido se le cuenta al que más dura, así
+        # eliminar un espacio antiguo descuenta solo lo que de verdad libera
+        vistos = set()
+        tamanos = {ruta: tamano_carpeta(ruta, vistos) for _, ruta in reversed(conservados)}
+        conservados = [(ejecucion_id, ruta, tamanos[ruta]) for ejecucion_id, ruta in conservados]
+
+        uso = sum(tamano for _, _, tamano in conservados)
+        for ejecucion_id, ruta, tamano in conservados:
+            if uso <= self.cuota_bytes:
+                break
+            if ejecucion_id in activos:
+                continue
+            shutil.rmtree(ruta, ignore_errors=True)
+            uso -= tamano
+            eliminados += 1
+        if uso > self.cuota_bytes:
+            print(f"⚠️ Resultados en curso ocupan {uso / (1024 * 1024):.0f} MB, "
+                  f"más que la cuota de {self.cuota_bytes / (1024 * 1024):.0f} MB")
+        if eliminados:
+            print(f"🧹 {eliminados} espacio(s) de resultados eliminados (TTL/cuota)")
+        return eliminados
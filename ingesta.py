@@ -0,0 +1,115 @@
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+import zlib
+
+# ==============================================
+# 📦 LOTES ZIP/TAR DE PDFs
+# ==============================================
+# En vez de cientos de partes multipart, el cierre de mes llega como un solo
+# ZIP o TAR (también .tar.gz/.tgz/.tar.bz2/.tar.xz). Los miembros se leen uno
+# a uno por bloques, sin cargar el lote en memoria: un TAR se extrae a medida
+# que llega (modo stream de tarfile) y un ZIP, que tiene su índice al final,
+# se lee desde el temporal en disco de la subida. Solo interesan los PDFs;
+# la carpeta del lote decide la subcarpeta de destino (p. ej. ERP_FACTURAS/).
+TAMANO_BLOQUE = 1024 * 1024
+FIRMA_ZIP = b"PK"
+
+# Errores de un lote corrupto, truncado o cifrado
+ERRORES_LOTE = (zipfile.BadZipFile, zipfile.LargeZipFile, tarfile.TarError, zlib.error, EOFError, RuntimeError)
+
+
+class _ConPrefijo:
+    """Stream de solo lectura que devuelve primero unos bytes ya leídos y luego el resto de `stream`"""
+
+    def __init__(self, prefijo, stream):
+        self._prefijo = prefijo
+        self._stream = stream
+
+    def read(self, tamano=-1):
+        if not self._prefijo:
+            return self._stream.read(tamano)
+        if tamano is None or tamano < 0:
+            datos, self._prefijo = self._prefijo + self._stream.read(), b""
+            return datos
+        datos, self._prefijo = self._prefijo[:tamano], self._prefijo[tamano:]
+        if len(datos) < tamano:
+            datos += self._stream.read(tamano - len(datos))
+        return datos
+
+
+def _es_buscable(stream):
+    try:
+        return stream.seekable()
+    except (AttributeError, OSError):
+        return False
+
+
+def miembros_pdf(stream, temporales=None):
+    """Genera (ruta dentro del lote, stream) de cada PDF de un ZIP o TAR.
+
+    Cada stream debe leerse antes de pedir el siguiente miembro. Los
+    miembros que no son PDF (o son carpetas, enlaces, metadatos de macOS)
+    se omiten. Lanza ValueError si el contenido no es ZIP ni TAR.
+    """
+    cabecera = stream.read(len(FIRMA_ZIP))
+    if cabecera == FIRMA_ZIP:
+        yield from _miembros_zip(stream, cabecera, temporales)
+        return
+    try:
+        lote = tarfile.open(fileobj=_ConPrefijo(cabecera, stream), mode="r|*")
+    except tarfile.ReadError:
+        raise ValueError("El archivo no es un ZIP ni un TAR válido")
+    with lote:
+        for miembro in lote:
+            if miembro.isfile() and es_pdf(miembro.name):
+                yield miembro.name, lote.extractfile(miembro)
+
+
+def _miembros_zip(stream, cabecera, temporales):
+    if _es_buscable(stream):
+        stream.seek(0)
+        yield from _leer_zip(stream)
+        return
+    # El índice central está al final: un ZIP que llega sin temporal se pasa a disco primero
+    with tempfile.TemporaryFile(dir=temporales) as copia:
+        copia.write(cabecera)
+        shutil.copyfileobj(stream, copia, TAMANO_BLOQUE)
+        copia.seek(0)
+        yield from _leer_zip(copia)
+
+
+def _leer_zip(archivo):
+    with zipfile.ZipFile(archivo) as lote:
+        for info in lote.infolist():
+            if not info.is_dir() and es_pdf(info.filename):
+                with lote.open(info) as miembro:
+                    yield info.filename, miembro
+
+
+def es_pdf(ruta):
+    """PDF de verdad dentro de un lote (no los ._archivo.pdf ni __MACOSX/ que agrega macOS)"""
+    partes = ruta.replace("\\", "/").split("/")
+    return (
+        partes[-1].lower().endswith(".pdf")
+        and not partes[-1].startswith("._")
+        and "__MACOSX" not in partes
+    )
+
+
+def enrutar(ruta, subcarpetas):
+    """(subcarpeta, nombre) de destino de un miembro del lote.
+
+    Si alguna carpeta de la ruta es una de las `subcarpetas` del script
+    (sin importar mayúsculas), el PDF va allí; si no, a la carpeta del
+    script ("" ). Solo se conserva el nombre del archivo: una ruta del lote
+    nunca puede salir de la carpeta de destino.
+    """
+    partes = [parte for parte in ruta.replace("\\", "/").split("/") if parte not in ("", ".", "..")]
+    conocidas = {subcarpeta.upper(): subcarpeta for subcarpeta in subcarpetas}
+    for parte in reversed(partes[:-1]):
+        if parte.upper() in conocidas:
+            return conocidas[parte.upper()], partes[-1]
+    return "", partes[-1]
@@ -0,0 +1,251 @@
+import contextlib
+import importlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import queue
+import re
+import signal
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# ==============================================
+# 🔥 MOTOR DE EJECUCIÓN CON PROCESOS PRECALENTADOS
+# ==============================================
+# Cada proceso del pool importa una sola vez pandas, pdfplumber, fitz y
+# openpyxl (y los propios scripts); luego ejecuta run(carpeta) de cualquier
+# script sin pagar de nuevo el arranque del intérprete ni las importaciones.
+# Cada proceso es su propio ejecutor de un solo worker: si un script excede
+# su tiempo se mata solo ese proceso y se reemplaza por otro, sin romper los
+# scripts que corren en los demás. Un worker que muere solo (segfault, OOM)
+# también se reemplaza: el pool nunca pierde procesos.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_PATH = os.path.join(BASE_DIR, "scripts")
+
+LIBRERIAS_PRECARGADAS = ["pandas", "pdfplumber", "fitz", "openpyxl"]
+
+# Variable con el archivo donde el script deja sus eventos (ver scripts/comun/progreso.py)
+VARIABLE_PROGRESO = "PROGRESO_ARCHIVO"
+
+# Módulos de scripts ya importados en este proceso
+_modulos = {}
+
+
+def nombre_modulo(script):
+    """Nombre de módulo válido para un script (los archivos tienen espacios y puntos)"""
+    return "script_" + re.sub(r"\W", "_", os.path.splitext(script)[0])
+
+
+def cargar_script(script):
+    """Importa un script de scripts/ por su ruta y lo deja en caché"""
+    if script not in _modulos:
+        ruta = os.path.join(SCRIPTS_PATH, script)
+        spec = importlib.util.spec_from_file_location(nombre_modulo(script), ruta)
+        modulo = importlib.util.module_from_spec(spec)
+        # Registrado en sys.modules para que sus funciones se puedan enviar a otros procesos
+        sys.modules[spec.name] = modulo
+        spec.loader.exec_module(modulo)
+        _modulos[script] = modulo
+    return _modulos[script]
+
+
+def precargar(scripts):
+    """Inicializador de cada proceso del pool: deja librerías y scripts importados"""
+    if SCRIPTS_PATH not in sys.path:
+        sys.path.insert(0, SCRIPTS_PATH)
+    os.chdir(SCRIPTS_PATH)
+
+    for libreria in LIBRERIAS_PRECARGADAS:
+        try:
+            importlib.import_module(libreria)
+        except ImportError:
+            pass
+
+    for script in scripts:
+        try:
+            cargar_script(script)
+        except Exception as e:
+            print(f"⚠️ No se pudo precargar {script}: {e}")
+
+
+def ejecutar_en_proceso(script, carpeta, entorno=None):
+    """Ejecuta run(carpeta) del script capturando stdout y stderr.
+
+    `entorno` son variables de entorno solo para esta ejecución (el proceso
+    del pool corre un script a la vez, así que se pueden fijar y restaurar).
+    """
+    salida = io.StringIO()
+    errores = io.StringIO()
+    resultado = None
+    ok = True
+    inicio = time.perf_counter()
+    anteriores = {clave: os.environ.get(clave) for clave in (entorno or {})}
+    os.environ.update(entorno or {})
+
+    with contextlib.redirect_stdout(salida), contextlib.redirect_stderr(errores):
+        try:
+            resultado = cargar_script(script).run(carpeta)
+        except BaseException:
+            ok = False
+            traceback.print_exc()
+        finally:
+            for clave, valor in anteriores.items():
+                if valor is None:
+                    os.environ.pop(clave, None)
+                else:
+                    os.environ[clave] = valor
+
+    return {
+        "ok": ok,
+        "stdout": salida.getvalue(),
+        "stderr": errores.getvalue(),
+        "resultado": resultado,
+        "duracion": time.perf_counter() - inicio,
+    }
+
+
+def _latido():
+    return os.getpid()
+
+
+class LectorProgreso:
+    """Lee los eventos nuevos (líneas JSON completas) que un script agrega a su archivo de progreso"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._posicion = 0
+        self._pendiente = b""
+
+    def leer(self):
+        try:
+            with open(self.ruta, "rb") as archivo:
+                archivo.seek(self._posicion)
+                datos = archivo.read()
+        except FileNotFoundError:
+            return []
+        self._posicion += len(datos)
+        *lineas, self._pendiente = (self._pendiente + datos).split(b"\n")
+        eventos = []
+        for linea in lineas:
+            try:
+                eventos.append(json.loads(linea))
+            except ValueError:
+                continue
+        return eventos
+
+
+class _ProcesoMotor:
+    """Un proceso del motor: ejecutor de un solo worker y el PID de ese worker"""
+
+    def __init__(self, contexto, scripts):
+        self.pool = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=contexto,
+            initializer=precargar,
+            initargs=(scripts,),
+        )
+        self._latido = self.pool.submit(_latido)
+
+    @property
+    def pid(self):
+        # El primer trabajo del worker fue el latido: su resultado es el PID
+        return self._latido.result()
+
+    def matar(self):
+        """Termina el worker en el acto (aunque esté a mitad de un script) y cierra el ejecutor"""
+        try:
+            os.kill(self.pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+        except Exception:
+            pass  # El worker ya había terminado (o nunca arrancó)
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+class MotorScripts:
+    """Pool de procesos de larga vida que ejecutan los scripts en caliente"""
+
+    def __init__(self, scripts, max_procesos=1):
+        metodos = multiprocessing.get_all_start_methods()
+        if "forkserver" in metodos:
+            # El servidor de fork carga las librerías una sola vez y cada
+            # proceso nuevo nace ya con ellas en memoria
+            self._contexto = multiprocessing.get_context("forkserver")
+            self._contexto.set_forkserver_preload(LIBRERIAS_PRECARGADAS)
+        else:
+            self._contexto = multiprocessing.get_context("spawn")
+
+        self.max_procesos = max_procesos
+        self._scripts = list(scripts)
+        self._procesos = [_ProcesoMotor(self._contexto, self._scripts) for _ in range(max_procesos)]
+        self._libres = queue.Queue()
+        for proceso in self._procesos:
+            self._libres.put(proceso)
+        self._en_curso = {}  # futuro → proceso que lo ejecuta
+        self._lock = threading.Lock()
+
+    def precalentar(self, esperar=False):
+        """Arranca todos los procesos del pool antes de la primera ejecución"""
+        if esperar:
+            wait([proceso._latido for proceso in self._procesos])
+
+    def enviar(self, script, carpeta, entorno=None):
+        """Envía el script a un proceso libre (espera uno si están todos ocupados); devuelve el futuro"""
+        while True:
+            proceso = self._libres.get()
+            try:
+                futuro = proceso.pool.submit(ejecutar_en_proceso, script, carpeta, entorno)
+                break
+            except BrokenProcessPool:
+                # Su worker murió estando libre: se reemplaza y se prueba con otro
+                proceso.pool.shutdown(wait=False, cancel_futures=True)
+                self._libres.put(self._reemplazar(proceso))
+        with self._lock:
+            self._en_curso[futuro] = proceso
+        futuro.add_done_callback(self._al_terminar)
+        return futuro
+
+    def _reemplazar(self, proceso):
+        """Pone un proceso nuevo en el lugar de `proceso` y lo devuelve"""
+        reemplazo = _ProcesoMotor(self._contexto, self._scripts)
+        with self._lock:
+            self._procesos[self._procesos.index(proceso)] = reemplazo
+        return reemplazo
+
+    def _al_terminar(self, futuro):
+        with self._lock:
+            proceso = self._en_curso.pop(futuro, None)
+        # Un proceso abortado no vuelve: abortar() ya puso su reemplazo
+        if proceso is None:
+            return
+        if not futuro.cancelled() and isinstance(futuro.exception(), BrokenProcessPool):
+            # El worker murió a mitad del script. Esto corre en el hilo del ejecutor roto:
+            # se cierra sin esperarlo
+            proceso.pool.shutdown(wait=False, cancel_futures=True)
+            proceso = self._reemplazar(proceso)
+        self._libres.put(proceso)
+
+    def abortar(self, futuro):
+        """Mata el proceso que ejecuta `futuro` y lo reemplaza por uno nuevo.
+
+        Al volver, el script ya no corre: su carpeta se puede volver a usar.
+        """
+        with self._lock:
+            proceso = self._en_curso.pop(futuro, None)
+        if proceso is None:
+            return
+        reemplazo = self._reemplazar(proceso)
+        proceso.matar()
+        self._libres.put(reemplazo)
+
+    def ejecutar(self, script, carpeta, timeout=None, entorno=None):
+        """Ejecuta el script en un proceso del pool; bloquea hasta su resultado"""
+        return self.enviar(script, carpeta, entorno).result(timeout=timeout)
+
+    def cerrar(self):
+        for proceso in self._procesos:
+            proceso.pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,177 @@
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from espacios import enlazar
+from trabajos import ESTADO_COMPLETADO, ESTADO_EJECUTANDO, ESTADO_EN_COLA, ESTADO_ERROR
+
+# ==============================================
+# 🔀 PIPELINE DE SCRIPTS CON DEPENDENCIAS
+# ==============================================
+# Las facturas (1 y 2 → 5) y los comprobantes de egreso (3 y 4 → 6) no
+# comparten archivos, así que sus ramas pueden correr a la vez. Cada etapa
+# arranca cuando terminan las etapas de las que depende y recibe sus PDFs
+# enlazados (hardlink) en la subcarpeta donde el script los espera, sin
+# pasar por la carpeta de resultados.
+ESTADO_OMITIDO = "omitido"
+
+ESTADOS_FALLIDOS = (ESTADO_ERROR, ESTADO_OMITIDO)
+
+
+class Etapa:
+    """Un script del pipeline, de qué etapas recibe archivos y dónde deja los suyos.
+
+    `entradas` relaciona cada script previo con la subcarpeta (dentro de la
+    carpeta de este script) donde deben quedar los PDFs que produjo.
+    `salida` es la subcarpeta (dentro de la carpeta de este script) con los
+    PDFs que entrega a las etapas siguientes; "" es la propia carpeta.
+    """
+
+    def __init__(self, script, entradas=None, salida=""):
+        self.script = script
+        self.entradas = dict(entradas or {})
+        self.salida = salida
+
+    @property
+    def dependencias(self):
+        return list(self.entradas)
+
+
+def vincular_pdfs(origen, destino):
+    """Deja en `destino` los PDFs de `origen` (hardlink, o copia si el sistema no lo permite).
+
+    Los PDFs que ya había en `destino` se eliminan antes: son las entradas
+    de una ejecución anterior. Devuelve cuántos archivos se enlazaron.
+    """
+    os.makedirs(destino, exist_ok=True)
+    for nombre in os.listdir(destino):
+        ruta = os.path.join(destino, nombre)
+        if nombre.lower().endswith(".pdf") and os.path.isfile(ruta):
+            os.unlink(ruta)
+
+    if not os.path.isdir(origen):
+        return 0
+    enlazados = 0
+    for nombre in os.listdir(origen):
+        ruta = os.path.join(origen, nombre)
+        if not (nombre.lower().endswith(".pdf") and os.path.isfile(ruta)):
+            continue
+        enlazar(ruta, os.path.join(destino, nombre))
+        enlazados += 1
+    return enlazados
+
+
+# Orden de declaración = prioridad entre etapas listas: las dos ramas se intercalan
+ETAPAS_PIPELINE = [
+    Etapa("1.ERP FC.py"),
+    Etapa("3.CE DESPRENDIBLES.py", salida="BANCO_DESPRENDIBLES"),
+    Etapa("2. FC MUISKA.py"),
+    Etapa("4.CE ERP CONTABLE.py", salida="ERP_COMPROBANTE_EGRESO"),
+    Etapa("5.FC COMBINACION.py", entradas={"1.ERP FC.py": "ERP_FACTURAS", "2. FC MUISKA.py": "MUISKA_FACTURAS"}),
+    Etapa("6 CE COMBINADO.py", entradas={
+        "4.CE ERP CONTABLE.py": "ERP_COMPROBANTE_EGRESO", "3.CE DESPRENDIBLES.py": "BANCO_DESPRENDIBLES"
+    }),
+]
+
+
+class EjecucionPipeline:
+    """Estado por etapa de una ejecución del pipeline"""
+
+    def __init__(self, etapas):
+        self.etapas = list(etapas)
+        scripts = {etapa.script for etapa in self.etapas}
+        for etapa in self.etapas:
+            desconocidas = [d for d in etapa.dependencias if d not in scripts]
+            if desconocidas:
+                raise ValueError(f"La etapa {etapa.script} depende de etapas inexistentes: {', '.join(desconocidas)}")
+        self.estados = {
+            etapa.script: {"estado": ESTADO_EN_COLA, "inicio": None, "fin": None, "message": None, "error": None}
+            for etapa in self.etapas
+        }
+        self.resultados = {}
+        self._al_cambiar = None
+
+    def ejecutar(self, ejecutar_etapa, max_paralelo=2, al_cambiar=None):
+        """Corre cada etapa apenas terminan sus dependencias, hasta `max_paralelo` a la vez.
+
+        `ejecutar_etapa(etapa)` hace el trabajo y devuelve un dict (o lanza
+        una excepción). Las etapas que dependen de una fallida se omiten. A
+        igualdad, arrancan primero las etapas declaradas antes.
+        `al_cambiar(etapa, estado)` se llama cada vez que una etapa cambia de estado.
+        """
+        self._al_cambiar = al_cambiar
+        pendientes = list(self.etapas)
+        en_curso = {}
+        with ThreadPoolExecutor(max_workers=max_paralelo, thread_name_prefix="etapa") as executor:
+            while pendientes or en_curso:
+                for etapa in list(pendientes):
+                    previos = [self.estados[d]["estado"] for d in etapa.dependencias]
+                    if any(estado in ESTADOS_FALLIDOS for estado in previos):
+                        self._omitir(etapa)
+                        pendientes.remove(etapa)
+                    elif all(estado == ESTADO_COMPLETADO for estado in previos) and len(en_curso) < max_paralelo:
+                        self.estados[etapa.script]["estado"] = ESTADO_EJECUTANDO
+                        self._notificar(etapa)
+                        en_curso[executor.submit(self._correr, etapa, ejecutar_etapa)] = etapa
+                        pendientes.remove(etapa)
+
+                if not en_curso:
+                    # Dependencias circulares: nada puede arrancar
+                    for etapa in pendientes:
+                        self._omitir(etapa)
+                    break
+                terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    del en_curso[futuro]
+        return self.a_dict()
+
+    def _correr(self, etapa, ejecutar_etapa):
+        estado = self.estados[etapa.script]
+        estado["inicio"] = time.time()
+        try:
+            resultado = ejecutar_etapa(etapa) or {}
+            self.resultados[etapa.script] = resultado
+            estado["message"] = resultado.get("message")
+            estado["estado"] = ESTADO_COMPLETADO
+        except Exception as e:
+            traceback.print_exc()
+            estado["error"] = str(e)
+            estado["estado"] = ESTADO_ERROR
+        finally:
+            estado["fin"] = time.time()
+            self._notificar(etapa)
+
+    def _omitir(self, etapa):
+        estado = self.estados[etapa.script]
+        estado["estado"] = ESTADO_OMITIDO
+        estado["error"] = "Omitida: falló una etapa previa"
+        self._notificar(etapa)
+
+    def _notificar(self, etapa):
+        if self._al_cambiar:
+            self._al_cambiar(etapa, self.estados[etapa.script])
+
+    @property
+    def exitoso(self):
+        return all(estado["estado"] == ESTADO_COMPLETADO for estado in self.estados.values())
+
+    def a_dict(self):
+        """Estado serializable de cada etapa, en el orden declarado"""
+        etapas = []
+        for etapa in self.etapas:
+            estado = self.estados[etapa.script]
+            duracion = None
+            if estado["inicio"]:
+                duracion = round((estado["fin"] or time.time()) - estado["inicio"], 2)
+            etapas.append({
+                "script": etapa.script,
+                "dependencias": etapa.dependencias,
+                "estado": estado["estado"],
+                "inicio": estado["inicio"],
+                "fin": estado["fin"],
+                "duracion_segundos": duracion,
+                "message": estado["message"],
+                "error": estado["error"],
+            })
+        return {"etapas": etapas, "success": self.exitoso}
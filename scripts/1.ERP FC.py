@@ -1,35 +1,42 @@
-import pdfplumber
 import pandas as pd
 import os
 import re
+from contextlib import closing
 from datetime import datetime
 import sys
+import time
+
+from comun.manifiesto import Manifiesto
+from comun.paralelo import mapear_en_procesos, workers_configurados
+from comun.plantillas import MODO_APRENDER, aprender, modo_plantillas, plantilla_vigente
+from comun.progreso import emitir
+from comun.salidas import escritura_atomica
+from comun.texto_pdf import (
+    CONTADORES_PAGINAS, backend_configurado, cache_texto, extraccion_incremental, firma_extraccion,
+    resumen_paginas, sumar_paginas, textos_paginas,
+)
 
 # ======================================
 # 🔧 CONFIGURACIÓN GENERAL (COMPATIBLE CON FLASK, LOCAL Y RENDER)
 # ======================================
 
-# 🔥 PRIORIDAD 1: Si se pasa como argumento (desde Flask)
-if len(sys.argv) > 1:
-    BASE_FOLDER = sys.argv[1]
-    print(f"✅ Carpeta recibida por argumento: {BASE_FOLDER}")
-# 🔥 PRIORIDAD 2: Si existe variable de entorno (Render standalone)
-elif os.environ.get("UPLOAD_FOLDER"):
-    BASE_FOLDER = os.environ["UPLOAD_FOLDER"]
-    print(f"✅ Carpeta desde variable de entorno: {BASE_FOLDER}")
-# 🔥 PRIORIDAD 3: Modo local (Windows)
-else:
-    BASE_FOLDER = os.path.join(os.path.expanduser("~"), "Downloads", "uploads", "1_ERP_FC")
-    print(f"✅ Modo local - Carpeta: {BASE_FOLDER}")
-
-os.makedirs(BASE_FOLDER, exist_ok=True)
-print(f"📂 Carpeta activa: {BASE_FOLDER}")
-
-# Verificar si hay archivos PDF
-pdf_files = [f for f in os.listdir(BASE_FOLDER) if f.lower().endswith('.pdf')]
-print(f"📄 Archivos PDF encontrados: {len(pdf_files)}")
-if pdf_files:
-    print(f"   Archivos: {', '.join(pdf_files[:5])}{'...' if len(pdf_files) > 5 else ''}")
+OUTPUT_EXCEL = "ERP_Facturas_Resultados.xlsx"
+
+def resolver_carpeta_base():
+    """Carpeta de trabajo: argumento (Flask), variable de entorno (Render) o modo local"""
+    # 🔥 PRIORIDAD 1: Si se pasa como argumento (desde Flask)
+    if len(sys.argv) > 1:
+        carpeta = sys.argv[1]
+        print(f"✅ Carpeta recibida por argumento: {carpeta}")
+    # 🔥 PRIORIDAD 2: Si existe variable de entorno (Render standalone)
+    elif os.environ.get("UPLOAD_FOLDER"):
+        carpeta = os.environ["UPLOAD_FOLDER"]
+        print(f"✅ Carpeta desde variable de entorno: {carpeta}")
+    # 🔥 PRIORIDAD 3: Modo local (Windows)
+    else:
+        carpeta = os.path.join(os.path.expanduser("~"), "Downloads", "uploads", "1_ERP_FC")
+        print(f"✅ Modo local - Carpeta: {carpeta}")
+    return carpeta
 
 # ======================================
 # 🧹 LIMPIEZA DE NOMBRES DE ARCHIVOS
@@ -40,66 +47,217 @@ def limpiar_nombre_archivo(nombre):
         nombre = nombre.replace(char, '-')
     return nombre[:200]
 
+# ======================================
+# 🔍 EXTRACCIÓN DE CAMPOS DE UNA FACTURA
+# ======================================
+MESES = {
+    "enero": "1", "febrero": "2", "marzo": "3", "abril": "4",
+    "mayo": "5", "junio": "6", "julio": "7", "agosto": "8",
+    "septiembre": "9", "octubre": "10", "noviembre": "11", "diciembre": "12"
+}
+
+# 📐 Plantilla de regiones del formato de factura del ERP (ver comun/plantillas.py)
+TIPO_PLANTILLA = "factura_erp"
+ANCLAS_PLANTILLA = {"proveedor": "PROVEEDO", "subtotal": "SUBTOTAL", "fecha": "FECHA DOCUMENTO"}
+MAX_MUESTRAS_PLANTILLA = 20
+
+def campos_completos(campos):
+    return campos["proveedor"] != "No encontrado" and campos["subtotal"] is not None and campos["fecha"] != "No encontrada"
+
+def interpretar_subtotal(valor):
+    valor = valor.replace(".", "").replace(",", "")
+    return int(valor) if valor.isdigit() else None
+
+def interpretar_fecha(match_fecha):
+    dia, mes_texto, anio = match_fecha.groups()
+    mes = MESES.get(mes_texto, "0")
+    return f"{int(dia)}/{int(mes)}/{anio}"
+
+def campos_de_regiones(regiones):
+    """Proveedor, subtotal y fecha a partir del texto de las regiones de la plantilla"""
+    campos = {"proveedor": "No encontrado", "subtotal": None, "fecha": "No encontrada"}
+    if regiones["proveedor"]:
+        campos["proveedor"] = " ".join(regiones["proveedor"].split())
+    match_sub = re.search(r"[\d\.,]+", regiones["subtotal"] or "")
+    if match_sub:
+        campos["subtotal"] = interpretar_subtotal(match_sub.group(0))
+    match_fecha = re.search(r"(\d{1,2})\s*de\s*(\w+)\s*de\s*(\d{4})", (regiones["fecha"] or "").lower())
+    if match_fecha:
+        campos["fecha"] = interpretar_fecha(match_fecha)
+    return campos
+
+def extraer_campos_factura(pdf_path, backend=None, incremental=None):
+    """Extrae proveedor, subtotal y fecha de una factura (puede correr en otro proceso).
+
+    Si hay plantilla de regiones se leen solo esas regiones; si algún
+    campo no aparece ahí se lee la página completa. Leyendo todo, cada
+    campo queda con su valor en la última página que lo trae; en modo
+    incremental (EXTRACCION_INCREMENTAL=1) deja de leer en cuanto los tres
+    están resueltos, así que gana la primera. paginas_leidas/paginas_total
+    muestran lo que se omitió. En "crudos"
+    queda cada valor tal como aparece en el PDF (para aprender plantillas).
+    """
+    if backend is None:
+        backend = backend_configurado("ERP_FC_TEXTO_BACKEND")
+    if incremental is None:
+        incremental = extraccion_incremental()
+    inicio = time.perf_counter()
+    cache_antes = cache_texto.estadisticas()
+    progreso = {"paginas_total": 0, "paginas_leidas": 0}
+    campos = {
+        "proveedor": "No encontrado",
+        "subtotal": None,
+        "fecha": "No encontrada",
+        "error": None,
+        "plantilla": False,
+        "crudos": {},
+    }
+
+    if not extraer_con_plantilla(pdf_path, campos, progreso):
+        try:
+            extraer_de_paginas(pdf_path, backend, incremental, campos, progreso)
+        except Exception as e:
+            campos["error"] = str(e)
+
+    cache_despues = cache_texto.estadisticas()
+    campos["cache_aciertos"] = cache_despues["aciertos"] - cache_antes["aciertos"]
+    campos["cache_fallos"] = cache_despues["fallos"] - cache_antes["fallos"]
+    campos["paginas_leidas"] = progreso["paginas_leidas"]
+    campos["paginas_total"] = progreso["paginas_total"]
+    for contador in CONTADORES_PAGINAS:
+        campos[contador] = progreso.get(contador, 0)
+    campos["duracion"] = time.perf_counter() - inicio
+    return campos
+
+def extraer_con_plantilla(pdf_path, campos, progreso):
+    """Llena los campos desde las regiones de la plantilla; False si no hay plantilla o falta algún campo"""
+    plantilla = plantilla_vigente(TIPO_PLANTILLA)
+    if not plantilla:
+        return False
+    try:
+        lectura = plantilla.extraer(pdf_path)
+    except Exception as e:
+        print(f"    ⚠ Plantilla no aplicable a {os.path.basename(pdf_path)}: {e}")
+        return False
+    por_regiones = campos_de_regiones(lectura["campos"])
+    if not campos_completos(por_regiones):
+        return False
+    campos.update(por_regiones, plantilla=True)
+    progreso.update(paginas_leidas=lectura["paginas_leidas"], paginas_total=lectura["paginas_total"],
+                    paginas_texto=lectura["paginas_leidas"])
+    return True
+
+def extraer_de_paginas(pdf_path, backend, incremental, campos, progreso):
+    """Busca los campos en el texto completo de cada página"""
+    with closing(textos_paginas(pdf_path, backend, progreso)) as paginas:
+        for text in paginas:
+            if not text.strip():
+                continue
+
+            # ======= Extraer proveedor =======
+            match_prov = re.search(r"proveedo[r|ra]?\s*:?(.+?)(?=\n|por concepto|total|$)", text, re.IGNORECASE)
+            if match_prov:
+                campos["proveedor"] = match_prov.group(1).strip()
+                campos["crudos"]["proveedor"] = campos["proveedor"]
+
+            # ======= Extraer subtotal =======
+            match_sub = re.search(r"subtotal\s*[:\s]*([\d\.,]+)", text.lower())
+            if match_sub:
+                campos["subtotal"] = interpretar_subtotal(match_sub.group(1))
+                campos["crudos"]["subtotal"] = match_sub.group(1)
+
+            # ======= Extraer fecha =======
+            match_fecha = re.search(r"(\d{1,2})\s*de\s*(\w+)\s*de\s*(\d{4})", text.lower())
+            if match_fecha:
+                campos["fecha"] = interpretar_fecha(match_fecha)
+                campos["crudos"]["fecha"] = match_fecha.group(0)
+
+            # ======= Salida temprana: no leer el resto de páginas =======
+            if incremental and campos_completos(campos):
+                break
+
 # ======================================
 # 🧾 PROCESADOR PRINCIPAL DE FACTURAS ERP
 # ======================================
-def extraer_proveedores_subtotales(pdf_folder, output_excel):
+def filas_vigentes(pdf_folder, vigentes):
+    """Filas guardadas de las facturas sin cambios; completa el renombrado si quedó pendiente"""
+    filas = []
+    for file, nuevo_nombre, entrada in vigentes:
+        nuevo_path = os.path.join(pdf_folder, nuevo_nombre)
+        if file != nuevo_nombre and not os.path.exists(nuevo_path):
+            try:
+                os.rename(os.path.join(pdf_folder, file), nuevo_path)
+                print(f"   📝 Renombrado pendiente: {file[:40]} → {nuevo_nombre[:50]}...")
+            except Exception as e:
+                print(f"   ⚠️ No se pudo renombrar {file}: {e}")
+        filas.append(entrada["fila"])
+    return filas
+
+
+def extraer_proveedores_subtotales(pdf_folder, output_excel, workers=None):
+    """Extrae los campos de cada factura (en paralelo si workers > 1), renombra y genera el Excel.
+
+    Las facturas ya registradas en el manifiesto de la carpeta (mismo
+    contenido) no se vuelven a leer ni a renombrar: su fila sale del
+    manifiesto y se une a las de las facturas nuevas o modificadas.
+    """
     datos = []
     archivos_procesados = 0
     archivos_con_error = 0
+    tiempos = {}
 
-    pdf_files = [f for f in os.listdir(pdf_folder) if f.lower().endswith(".pdf")]
+    if workers is None:
+        workers = workers_configurados("ERP_FC_WORKERS")
+
+    manifiesto = Manifiesto(pdf_folder, "1.ERP FC", firma=firma_extraccion("ERP_FC_TEXTO_BACKEND"))
+    pendientes, vigentes = manifiesto.clasificar(f for f in os.listdir(pdf_folder) if f.lower().endswith(".pdf"))
+    datos.extend(filas_vigentes(pdf_folder, vigentes))
+
+    # Orden fijo para que las filas del Excel no dependan del sistema de archivos
+    pendientes.sort()
+    pdf_files = [file for file, _ in pendientes]
     total_archivos = len(pdf_files)
+    print(f"\n🗂️ Manifiesto: {len(vigentes)} factura(s) sin cambios omitidas, {total_archivos} por procesar")
     
-    print(f"\n🔄 Iniciando procesamiento de {total_archivos} archivos PDF...")
+    modo = f"paralelo ({min(workers, total_archivos)} procesos)" if workers > 1 and total_archivos > 1 else "secuencial"
+    print(f"\n🔄 Iniciando procesamiento de {total_archivos} archivos PDF en modo {modo}...")
+    print(f"📖 Backend de texto: {backend_configurado('ERP_FC_TEXTO_BACKEND')}"
+          f" - lectura {'incremental' if extraccion_incremental() else 'completa'}")
+    inicio_extraccion = time.perf_counter()
+    emitir("inicio", total=total_archivos, omitidos=len(vigentes))
 
-    for idx, file in enumerate(pdf_files, 1):
-        pdf_path = os.path.join(pdf_folder, file)
-        factura = os.path.splitext(file)[0]
-        proveedor = "No encontrado"
-        subtotal = None
-        fecha_formateada = "No encontrada"
+    def informar(indice, campos):
+        emitir("archivo", indice=indice, total=total_archivos, archivo=pdf_files[indice - 1],
+               duracion=round(campos["duracion"], 3), ok=not campos["error"],
+               campos={"proveedor": campos["proveedor"], "subtotal": campos["subtotal"], "fecha": campos["fecha"]},
+               error=campos["error"])
 
-        print(f"📄 [{idx}/{total_archivos}] Procesando: {file}")
+    rutas = [os.path.join(pdf_folder, file) for file in pdf_files]
+    resultados = mapear_en_procesos(extraer_campos_factura, rutas, workers, al_terminar=informar)
+    tiempo_extraccion = time.perf_counter() - inicio_extraccion
 
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text() or ""
-                    if not text.strip():
-                        continue
-
-                    # ======= Extraer proveedor =======
-                    match_prov = re.search(r"proveedo[r|ra]?\s*:?(.+?)(?=\n|por concepto|total|$)", text, re.IGNORECASE)
-                    if match_prov:
-                        proveedor = match_prov.group(1).strip()
-
-                    # ======= Extraer subtotal =======
-                    match_sub = re.search(r"subtotal\s*[:\s]*([\d\.,]+)", text.lower())
-                    if match_sub:
-                        valor = match_sub.group(1).replace(".", "").replace(",", "")
-                        subtotal = int(valor) if valor.isdigit() else None
-
-                    # ======= Extraer fecha =======
-                    match_fecha = re.search(r"(\d{1,2})\s*de\s*(\w+)\s*de\s*(\d{4})", text.lower())
-                    if match_fecha:
-                        dia, mes_texto, anio = match_fecha.groups()
-                        meses = {
-                            "enero": "1", "febrero": "2", "marzo": "3", "abril": "4",
-                            "mayo": "5", "junio": "6", "julio": "7", "agosto": "8",
-                            "septiembre": "9", "octubre": "10", "noviembre": "11", "diciembre": "12"
-                        }
-                        mes = meses.get(mes_texto, "0")
-                        fecha_formateada = f"{int(dia)}/{int(mes)}/{anio}"
-
-            archivos_procesados += 1
-            print(f"   ✅ Extraído - Proveedor: {proveedor[:30]}, Subtotal: {subtotal}, Fecha: {fecha_formateada}")
+    # ======= Renombrado y armado de filas en el proceso principal =======
+    muestras = []  # (ruta, valores crudos) de las facturas completas, para el modo aprender
+    for idx, ((file, huella), pdf_path, campos) in enumerate(zip(pendientes, rutas, resultados), 1):
+        # Un PDF ya renombrado conserva el número de factura de su nombre original
+        factura = os.path.splitext(manifiesto.nombre_original(file))[0]
+        proveedor = campos["proveedor"]
+        subtotal = campos["subtotal"]
+        fecha_formateada = campos["fecha"]
+        tiempos[file] = campos["duracion"]
 
-        except Exception as e:
+        print(f"📄 [{idx}/{total_archivos}] Procesando: {file}")
+
+        if campos["error"]:
             archivos_con_error += 1
-            print(f"   ❌ Error procesando {file}: {e}")
+            print(f"   ❌ Error procesando {file}: {campos['error']}")
             continue
 
+        archivos_procesados += 1
+        print(f"   ✅ Extraído - Proveedor: {proveedor[:30]}, Subtotal: {subtotal}, Fecha: {fecha_formateada} "
+              f"({campos['duracion']:.2f}s, {campos['paginas_leidas']}/{campos['paginas_total']} páginas"
+              f"{', plantilla' if campos['plantilla'] else ''})")
+
         # ======= Nuevo nombre =======
         nuevo_nombre = limpiar_nombre_archivo(f"{factura}_{fecha_formateada}_{proveedor}_{subtotal or 0}.pdf")
         nuevo_path = os.path.join(pdf_folder, nuevo_nombre)
@@ -111,30 +269,95 @@ def extraer_proveedores_subtotales(pdf_folder, output_excel):
         except Exception as e:
             print(f"   ⚠️ No se pudo renombrar: {e}")
 
-        datos.append([factura, fecha_formateada, proveedor, subtotal, nuevo_nombre])
+        fila = [factura, fecha_formateada, proveedor, subtotal, nuevo_nombre]
+        datos.append(fila)
+        if campos_completos(campos) and campos["crudos"]:
+            muestras.append((nuevo_path if os.path.exists(nuevo_path) else pdf_path, campos["crudos"]))
+        # Con páginas escaneadas sin leer (sin OCR) se vuelve a intentar en la próxima ejecución
+        if not campos["paginas_ocr_fallidas"]:
+            manifiesto.registrar(huella, manifiesto.nombre_original(file), nuevo_nombre, fila)
+
+    if modo_plantillas() == MODO_APRENDER:
+        aprender_plantilla(muestras[:MAX_MUESTRAS_PLANTILLA])
 
     # ======= Guardar resultados =======
+    datos.sort(key=lambda fila: str(fila[0]))
     df = pd.DataFrame(datos, columns=["Factura", "Fecha", "Proveedor", "Subtotal", "Archivo Renombrado"])
     output_path = os.path.join(pdf_folder, output_excel)
-    df.to_excel(output_path, index=False)
+    with escritura_atomica(output_path) as temporal:
+        df.to_excel(temporal, index=False)
+    manifiesto.guardar()
+    paginas = sumar_paginas(resultados)
+    emitir("fin", procesados=archivos_procesados, errores=archivos_con_error, omitidos=len(vigentes), **paginas)
+
+    aciertos = sum(c["cache_aciertos"] for c in resultados)
+    fallos = sum(c["cache_fallos"] for c in resultados)
+    paginas_leidas = sum(c["paginas_leidas"] for c in resultados)
+    paginas_total = sum(c["paginas_total"] for c in resultados)
 
     print(f"\n📊 RESUMEN DEL PROCESAMIENTO:")
     print(f"   ✅ Archivos procesados exitosamente: {archivos_procesados}")
+    print(f"   ⏭️ Archivos omitidos (sin cambios): {len(vigentes)}")
     print(f"   ❌ Archivos con error: {archivos_con_error}")
+    print(f"   ⚡ Caché de texto: {aciertos} aciertos / {fallos} fallos")
+    print(f"   📖 Páginas leídas: {paginas_leidas} de {paginas_total} ({paginas_total - paginas_leidas} omitidas)")
+    print(f"   🔬 Páginas: {resumen_paginas(paginas)}")
+    print(f"   📐 Leídas con plantilla de regiones: {sum(c['plantilla'] for c in resultados)} de {len(resultados)}")
+    if tiempos:
+        print(f"   ⏱️ Extracción: {tiempo_extraccion:.2f}s en modo {modo} "
+              f"(promedio {sum(tiempos.values()) / len(tiempos):.2f}s por archivo)")
+        print(f"   🐢 Archivos más lentos:")
+        for file, duracion in sorted(tiempos.items(), key=lambda t: t[1], reverse=True)[:5]:
+            print(f"      {duracion:.2f}s  {file}")
     print(f"   📁 Excel generado: {output_path}")
     print(f"   📂 Ubicación: {pdf_folder}")
 
-    return output_path
+    return output_path, tiempos, {"procesados": archivos_procesados, "omitidos": len(vigentes),
+                                  "errores": archivos_con_error, **paginas}
+
+def aprender_plantilla(muestras):
+    """Modo aprender (PLANTILLAS_MODO=aprender): infiere y guarda las regiones de la plantilla"""
+    if not muestras:
+        print("\n📐 Sin facturas completas para aprender la plantilla "
+              "(las omitidas por el manifiesto no cuentan: use OMITIR_PROCESADOS=0)")
+        return
+    plantilla = aprender(TIPO_PLANTILLA, ANCLAS_PLANTILLA, muestras)
+    ruta = plantilla.guardar()
+    print(f"\n📐 Plantilla '{TIPO_PLANTILLA}' aprendida de {len(muestras)} factura(s): "
+          f"campos {', '.join(plantilla.campos) or 'ninguno'} → {ruta}")
+
+# ======================================
+# 🔌 PUNTO DE ENTRADA COMÚN (Flask / motor de ejecución)
+# ======================================
+def run(folder):
+    """Procesa las facturas ERP de la carpeta y devuelve el resumen de la ejecución"""
+    os.makedirs(folder, exist_ok=True)
+    print(f"📂 Carpeta activa: {folder}")
+
+    # Verificar si hay archivos PDF
+    pdf_files = [f for f in os.listdir(folder) if f.lower().endswith('.pdf')]
+    print(f"📄 Archivos PDF encontrados: {len(pdf_files)}")
+    if pdf_files:
+        print(f"   Archivos: {', '.join(pdf_files[:5])}{'...' if len(pdf_files) > 5 else ''}")
+
+    resultado, tiempos, conteo = extraer_proveedores_subtotales(folder, OUTPUT_EXCEL)
+    return {
+        "carpeta": folder,
+        "archivos_generados": [resultado],
+        "tiempos_por_archivo": tiempos,
+        "archivos_procesados": conteo["procesados"],
+        "archivos_omitidos": conteo["omitidos"],
+        "paginas": {contador: conteo[contador] for contador in CONTADORES_PAGINAS},
+    }
 
 # ======================================
 # 🚀 EJECUCIÓN PRINCIPAL
 # ======================================
 if __name__ == "__main__":
-    pdf_folder = BASE_FOLDER
-    output_excel = "ERP_Facturas_Resultados.xlsx"
+    pdf_folder = resolver_carpeta_base()
     
     try:
-        resultado = extraer_proveedores_subtotales(pdf_folder, output_excel)
+        resultado = run(pdf_folder)["archivos_generados"][0]
         print(f"\n🎉 ¡PROCESO COMPLETADO EXITOSAMENTE!")
         print(f"📥 Archivo de resultados: {resultado}")
         
@@ -149,4 +372,4 @@ if __name__ == "__main__":
         print(f"\n❌ ERROR CRÍTICO: {e}")
         import traceback
         traceback.print_exc()
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
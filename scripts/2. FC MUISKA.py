@@ -1,34 +1,30 @@
 import os
+import sys
 import csv
 import re
-import pdfplumber
+import time
+from contextlib import closing
 from datetime import datetime
 
+from comun.anclas import ExtractorAnclado
+from comun.manifiesto import Manifiesto
+from comun.progreso import emitir
+from comun.salidas import escritura_atomica
+from comun.texto_pdf import backend_configurado, cache_texto, extraccion_incremental, firma_extraccion, resumen_cache, resumen_paginas, sumar_paginas, textos_paginas
+
 # ==============================================================
 # 📂 CONFIGURACIÓN AUTOMÁTICA DE RUTAS (compatible con Flask)
 # ==============================================================
 
-# Detectar carpeta del proyecto
-base_path = os.getcwd()
+NOMBRE_SCRIPT = os.path.basename(__file__).replace(".py", "")
 
-# Si Flask envía la ruta por argumento (al ejecutar el script)
-if len(sys.argv) > 1:
-    carpeta_documentos = sys.argv[1]
-else:
+def resolver_carpeta_documentos():
+    """Carpeta enviada por Flask como argumento o detectada según el nombre del script"""
+    if len(sys.argv) > 1:
+        return sys.argv[1]
     # Detectar automáticamente según el nombre del script
-    script_name = os.path.basename(__file__)
-    carpeta_nombre = "_" + script_name.replace(".py", "").replace(" ", "_").replace(".", "_")
-
-    carpeta_documentos = os.path.join(base_path, "uploads", carpeta_nombre)
-
-# Crear la carpeta si no existe
-os.makedirs(carpeta_documentos, exist_ok=True)
-
-# Ruta de salida (por ejemplo CSV o Excel)
-archivo_salida = os.path.join(carpeta_documentos, f"resultado_{os.path.basename(__file__).replace('.py', '')}.xlsx")
-
-print(f"📁 Carpeta de trabajo: {carpeta_documentos}")
-print(f"💾 Archivo de salida: {archivo_salida}")
+    carpeta_nombre = "_" + NOMBRE_SCRIPT.replace(" ", "_").replace(".", "_")
+    return os.path.join(os.getcwd(), "uploads", carpeta_nombre)
 
 # Expresiones regulares mejoradas para fechas
 patrones_fecha = [
@@ -57,7 +53,24 @@ patrones_valor = [
     (re.compile(r"COP\s*\$\s*([\d\.\,]+)(?:\s|$)", re.IGNORECASE), "Valor COP"),
 ]
 
-datos_extraidos = []
+# Respaldo del modo forzado: cualquier valor COP con $
+patron_cop_forzado = re.compile(r"COP\s*\$\s*([\d\.\,]+)", re.IGNORECASE)
+
+# Todos los patrones comparten un solo escaneo del texto: se ubican sus
+# palabras ancla ("Fecha de Emisión:", "Razón Social:", "Subtotal", ...) y
+# cada patrón solo se prueba donde aparece la suya, respetando la prioridad
+extractor_campos = ExtractorAnclado(
+    {
+        "fecha": patrones_fecha,
+        "razon_social": patrones_razon_social,
+        "valor": [patron for patron, _ in patrones_valor],
+        "cop_forzado": [patron_cop_forzado],
+    },
+    anclas_extra=["subtotal"],
+)
+
+def escanear_texto(texto):
+    return extractor_campos.escanear(texto)
 
 # Función para limpiar valores numéricos
 def limpiar_valor(valor):
@@ -71,49 +84,47 @@ def limpiar_valor(valor):
     except (ValueError, TypeError):
         return None
 
-# Función para extraer fecha
-def extraer_fecha(texto):
-    for patron in patrones_fecha:
+# Función para extraer fecha (reutiliza el escaneo del texto si se pasa)
+def extraer_fecha(texto, escaneo=None):
+    escaneo = escaneo or escanear_texto(texto)
+    for _, match in escaneo.coincidencias("fecha"):
         try:
-            match = patron.search(texto)
-            if match:
-                return match.group(1)
+            return match.group(1)
         except (AttributeError, IndexError):
             continue
     return None
 
 # Función para extraer razón social
-def extraer_razon_social(texto):
-    for patron in patrones_razon_social:
+def extraer_razon_social(texto, escaneo=None):
+    escaneo = escaneo or escanear_texto(texto)
+    for _, match in escaneo.coincidencias("razon_social"):
         try:
-            match = patron.search(texto)
-            if match:
-                razon_social = match.group(1).strip()
-                # Limpiar caracteres no deseados
-                razon_social = re.sub(r'[\n\r\t]+', ' ', razon_social)
-                razon_social = re.sub(r'\s+', ' ', razon_social)
-                return razon_social.strip()
+            razon_social = match.group(1).strip()
+            # Limpiar caracteres no deseados
+            razon_social = re.sub(r'[\n\r\t]+', ' ', razon_social)
+            razon_social = re.sub(r'\s+', ' ', razon_social)
+            return razon_social.strip()
         except (AttributeError, IndexError):
             continue
     return None
 
 # Función para extraer valor monetario
-def extraer_valor(texto):
-    for patron, fuente in patrones_valor:
+def extraer_valor(texto, escaneo=None):
+    escaneo = escaneo or escanear_texto(texto)
+    for indice, match in escaneo.coincidencias("valor"):
+        fuente = patrones_valor[indice][1]
         try:
-            match = patron.search(texto)
-            if match:
-                valor_texto = match.group(1)
-                valor_limpio = limpiar_valor(valor_texto)
-                if valor_limpio and valor_limpio > 1000:  # Filtrar valores muy pequeños
-                    return valor_limpio, fuente
+            valor_limpio = limpiar_valor(match.group(1))
+            if valor_limpio and valor_limpio > 1000:  # Filtrar valores muy pequeños
+                return valor_limpio, fuente
         except (AttributeError, IndexError):
             continue
     
     # Modo forzado: buscar números grandes después de "subtotal"
     try:
-        idx = texto.lower().find("subtotal")
-        if idx != -1:
+        subtotales = escaneo.posiciones("subtotal")
+        if subtotales:
+            idx = subtotales[0]
             posterior = texto[idx: idx + 500]
             # Buscar números con formato de moneda colombiana
             num_matches = re.findall(r"([\d\.\,]+)", posterior)
@@ -123,8 +134,8 @@ def extraer_valor(texto):
                     return valor_limpio, "Modo Forzado (Subtotal)"
         
         # Buscar directamente valores COP con $
-        cop_matches = re.findall(r"COP\s*\$\s*([\d\.\,]+)", texto, re.IGNORECASE)
-        for num in cop_matches:
+        for match in escaneo.todas(patron_cop_forzado):
+            num = match.group(1)
             valor_limpio = limpiar_valor(num)
             if valor_limpio and valor_limpio > 50000:
                 return valor_limpio, "Modo Forzado (COP)"
@@ -134,53 +145,111 @@ def extraer_valor(texto):
     
     return None, None
 
-# Función para extraer texto de manera más robusta
-def extraer_texto_pdf(ruta_pdf):
+# Texto en una sola línea, como lo esperan los patrones
+def normalizar_texto(texto_completo):
+    texto_limpio = re.sub(r'\s+', ' ', texto_completo)
+    return re.sub(r'(\w)(Subtotal)', r'\1 \2', texto_limpio)
+
+# Busca solo los campos que aún faltan; devuelve True si ya están todos
+def completar_campos(campos, texto_limpio):
+    escaneo = escanear_texto(texto_limpio)
+    if not campos["fecha"]:
+        campos["fecha"] = extraer_fecha(texto_limpio, escaneo)
+    if not campos["razon_social"]:
+        campos["razon_social"] = extraer_razon_social(texto_limpio, escaneo)
+    if not campos["valor"]:
+        campos["valor"], campos["fuente"] = extraer_valor(texto_limpio, escaneo)
+    return bool(campos["fecha"] and campos["razon_social"] and campos["valor"])
+
+# Lee el PDF página a página y extrae fecha, razón social y valor.
+# En modo incremental (opcional) los campos que faltan se buscan en el texto
+# de cada página nueva y la lectura se detiene cuando están los tres; lo que
+# siga faltando al final se busca en el texto completo. Si no, se lee todo y
+# se busca una sola vez (comportamiento original).
+def extraer_campos_pdf(ruta_pdf, backend=None, incremental=None):
+    if backend is None:
+        backend = backend_configurado("FC_MUISKA_TEXTO_BACKEND")
+    if incremental is None:
+        incremental = extraccion_incremental()
+
+    campos = {"fecha": None, "razon_social": None, "valor": None, "fuente": None,
+              "texto": "", "paginas_total": 0, "paginas_leidas": 0}
+    texto_completo = ""
+    completos = False
     try:
-        with pdfplumber.open(ruta_pdf) as pdf:
-            texto_completo = ""
-            for i, page in enumerate(pdf.pages):
-                try:
-                    page_text = page.extract_text()
-                    if page_text:
-                        texto_completo += page_text + "\n"
-                except Exception as e:
-                    print(f"    ⚠ Error en página {i+1}: {str(e)}")
+        with closing(textos_paginas(ruta_pdf, backend, campos)) as paginas:
+            for page_text in paginas:
+                if not page_text:
                     continue
-            return texto_completo
+                texto_completo += page_text + "\n"
+                if incremental and completar_campos(campos, normalizar_texto(page_text)):
+                    completos = True
+                    break
     except Exception as e:
         print(f"    ❌ Error abriendo PDF: {str(e)}")
         return None
 
+    campos["texto"] = normalizar_texto(texto_completo)
+    if not completos:
+        completar_campos(campos, campos["texto"])
+    return campos
+
 # Procesar PDFs
-print("🔄 Iniciando procesamiento de PDFs...")
-archivos_procesados = 0
-archivos_exitosos = 0
+def procesar_pdfs(carpeta_documentos):
+    """Extrae fecha, razón social y valor de cada PDF nuevo o modificado de la carpeta.
+
+    Los PDFs registrados en el manifiesto de la carpeta (mismo contenido)
+    no se vuelven a leer: su fila guardada se une a las de los demás.
+    Devuelve las filas, los archivos procesados, las extracciones exitosas
+    y los archivos omitidos.
+    """
+    print("🔄 Iniciando procesamiento de PDFs...")
+    print(f"📖 Backend de texto: {backend_configurado('FC_MUISKA_TEXTO_BACKEND')}"
+          f" - lectura {'incremental' if extraccion_incremental() else 'completa'}")
+    cache_texto.reiniciar_estadisticas()
+    archivos_procesados = 0
+    archivos_exitosos = 0
+    paginas_leidas = 0
+    paginas_total = 0
+    conteos_paginas = []
 
-for archivo in os.listdir(carpeta_documentos):
-    if archivo.lower().endswith(".pdf"):
+    manifiesto = Manifiesto(carpeta_documentos, NOMBRE_SCRIPT, firma=firma_extraccion("FC_MUISKA_TEXTO_BACKEND"))
+    pendientes, vigentes = manifiesto.clasificar(
+        archivo for archivo in os.listdir(carpeta_documentos) if archivo.lower().endswith(".pdf")
+    )
+    datos_extraidos = [entrada["fila"] for _, _, entrada in vigentes]
+    print(f"🗂️ Manifiesto: {len(vigentes)} PDF(s) sin cambios omitidos, {len(pendientes)} por procesar")
+    emitir("inicio", total=len(pendientes), omitidos=len(vigentes))
+
+    for archivo, huella in pendientes:
         archivos_procesados += 1
         ruta_pdf = os.path.join(carpeta_documentos, archivo)
         print(f"\n📄 Procesando [{archivos_procesados}]: {archivo}")
         
-        # Extraer texto del PDF
-        texto_completo = extraer_texto_pdf(ruta_pdf)
+        # Extraer texto e información del PDF
+        inicio = time.perf_counter()
+        campos = extraer_campos_pdf(ruta_pdf)
+        if campos:
+            conteos_paginas.append(campos)
+        encontrados = {clave: campos[clave] for clave in ("fecha", "razon_social", "valor")} if campos else {}
+        emitir("archivo", indice=archivos_procesados, total=len(pendientes), archivo=archivo,
+               duracion=round(time.perf_counter() - inicio, 3), ok=bool(encontrados) and all(encontrados.values()),
+               campos=encontrados)
         
-        if not texto_completo or not texto_completo.strip():
+        if not campos or not campos["texto"].strip():
             print(f"  ⚠ Archivo sin texto extraíble")
             continue
         
-        # Limpiar y normalizar texto
-        texto_limpio = re.sub(r'\s+', ' ', texto_completo)
-        texto_limpio = re.sub(r'(\w)(Subtotal)', r'\1 \2', texto_limpio)
+        paginas_leidas += campos["paginas_leidas"]
+        paginas_total += campos["paginas_total"]
+        texto_limpio = campos["texto"]
+        fecha_expedicion = campos["fecha"]
+        razon_social = campos["razon_social"]
+        valor_extraido, fuente_valor = campos["valor"], campos["fuente"]
         
         # Debug: mostrar una muestra del texto extraído
         print(f"  📝 Muestra del texto: {texto_limpio[:200]}...")
-        
-        # Extraer información
-        fecha_expedicion = extraer_fecha(texto_limpio)
-        razon_social = extraer_razon_social(texto_limpio)
-        valor_extraido, fuente_valor = extraer_valor(texto_limpio)
+        print(f"  📖 Páginas leídas: {campos['paginas_leidas']}/{campos['paginas_total']}")
         
         # Mostrar resultados de extracción
         print(f"  📅 Fecha extraída: {fecha_expedicion}")
@@ -199,13 +268,19 @@ for archivo in os.listdir(carpeta_documentos):
                     print(f"  ⚠ Error al convertir fecha: {fecha_expedicion}")
                     continue
             
-            datos_extraidos.append([
+            fila = [
                 fecha_final, 
                 razon_social, 
                 valor_extraido, 
                 fuente_valor, 
                 archivo
-            ])
+            ]
+            datos_extraidos.append(fila)
+            try:
+                nombre_salida = nombre_renombrado(fecha_final, razon_social, valor_extraido)
+            except (TypeError, ValueError):
+                nombre_salida = archivo
+            manifiesto.registrar(huella, archivo, nombre_salida, fila)
             archivos_exitosos += 1
             print(f"  ✅ Procesado exitosamente")
         else:
@@ -219,10 +294,20 @@ for archivo in os.listdir(carpeta_documentos):
                 print(f"  🔍 Texto completo para debug:")
                 print(f"      {texto_limpio[:500]}...")
 
-print(f"\n📊 Resumen del procesamiento:")
-print(f"   - Archivos totales: {archivos_procesados}")
-print(f"   - Procesados exitosamente: {archivos_exitosos}")
-print(f"   - Fallidos: {archivos_procesados - archivos_exitosos}")
+    paginas = sumar_paginas(conteos_paginas)
+    emitir("fin", procesados=archivos_exitosos, errores=archivos_procesados - archivos_exitosos, omitidos=len(vigentes),
+           **paginas)
+    print(f"\n📊 Resumen del procesamiento:")
+    print(f"   - Archivos totales: {archivos_procesados}")
+    print(f"   - Omitidos (sin cambios): {len(vigentes)}")
+    print(f"   - Procesados exitosamente: {archivos_exitosos}")
+    print(f"   - Fallidos: {archivos_procesados - archivos_exitosos}")
+    print(f"   - Caché de texto: {resumen_cache()}")
+    print(f"   - Páginas leídas: {paginas_leidas} de {paginas_total} ({paginas_total - paginas_leidas} omitidas)")
+    print(f"   - Páginas: {resumen_paginas(paginas)}")
+
+    manifiesto.guardar()
+    return datos_extraidos, archivos_procesados, archivos_exitosos, len(vigentes)
 
 # Ordenar por fecha
 def convertir_fecha(fecha_str):
@@ -234,97 +319,153 @@ def convertir_fecha(fecha_str):
         except ValueError:
             return datetime.min
 
-if datos_extraidos:
-    datos_extraidos.sort(key=lambda x: convertir_fecha(x[0]))
+# Nombre final de cada PDF: "fecha - razón social - $subtotal.pdf"
+def nombre_renombrado(fecha, razon_social, subtotal):
+    fecha = str(fecha).strip().replace("/", "-")
+    subtotal = str(int(float(subtotal))).strip()  # Convertir a entero para nombres más limpios
+
+    # Limpiar razón social para nombre de archivo
+    razon_social_limpia = re.sub(r'[<>:"/\\|?*]', '', str(razon_social).strip())
+    razon_social_limpia = re.sub(r'\s+', ' ', razon_social_limpia)
+    razon_social_limpia = razon_social_limpia[:60]  # Limitar longitud
+
+    return f"{fecha} - {razon_social_limpia} - ${subtotal}.pdf"
 
 # Guardar CSV
-if datos_extraidos:
+def escribir_csv(datos_extraidos, archivo_salida):
+    with escritura_atomica(archivo_salida) as temporal, open(temporal, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file, delimiter=",", quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(["Fecha", "Razón Social Proveedores", "Subtotal/Total", "Fuente del Valor", "Nombre del Archivo",
+                         "Archivo Renombrado"])
+        for fila in datos_extraidos:
+            # Con el nombre final, los combinadores pueden ubicar el PDF desde la tabla
+            try:
+                renombrado = nombre_renombrado(fila[0], fila[1], fila[2])
+            except (TypeError, ValueError):
+                renombrado = ""
+            writer.writerow(list(fila) + [renombrado])
+
+def guardar_csv(datos_extraidos, archivo_salida):
+    """Guarda los resultados; devuelve False si no se pudo escribir el archivo"""
     try:
-        with open(archivo_salida, mode="w", newline="", encoding="utf-8") as file:
-            writer = csv.writer(file, delimiter=",", quotechar='"', quoting=csv.QUOTE_MINIMAL)
-            writer.writerow(["Fecha", "Razón Social Proveedores", "Subtotal/Total", "Fuente del Valor", "Nombre del Archivo"])
-            writer.writerows(datos_extraidos)
+        escribir_csv(datos_extraidos, archivo_salida)
         print(f"\n✅ Archivo CSV generado exitosamente en: {archivo_salida}")
+        return True
     except PermissionError:
         print("\n⚠ ERROR: El archivo CSV está abierto en otro programa.")
+        # Solo se puede esperar al usuario cuando hay una consola interactiva
+        if not sys.stdin or not sys.stdin.isatty():
+            return False
         input("Cierra el archivo CSV y presiona Enter para continuar...")
         try:
-            with open(archivo_salida, mode="w", newline="", encoding="utf-8") as file:
-                writer = csv.writer(file, delimiter=",", quotechar='"', quoting=csv.QUOTE_MINIMAL)
-                writer.writerow(["Fecha", "Razón Social Proveedores", "Subtotal/Total", "Fuente del Valor", "Nombre del Archivo"])
-                writer.writerows(datos_extraidos)
+            escribir_csv(datos_extraidos, archivo_salida)
             print(f"✅ Archivo CSV generado exitosamente en: {archivo_salida}")
+            return True
         except Exception as e:
             print(f"❌ Error final al guardar CSV: {str(e)}")
-            exit()
+            return False
     except Exception as e:
         print(f"❌ Error al guardar CSV: {str(e)}")
-        exit()
-else:
-    print("\n⚠ No se encontraron documentos válidos para procesar.")
-    print("💡 Revisa que los PDFs contengan facturas electrónicas válidas.")
-    exit()
+        return False
 
 # Renombrar PDFs
-print("\n🔄 Iniciando renombrado de archivos...")
-
-nombres_archivos = {}
-try:
-    with open(archivo_salida, mode="r", encoding="utf-8") as file:
-        reader = csv.reader(file)
-        next(reader)  # Saltar encabezado
-        
-        for fila in reader:
-            if len(fila) >= 5:
-                fecha = fila[0].strip().replace("/", "-")
-                razon_social = fila[1].strip()
-                subtotal = str(int(float(fila[2]))).strip()  # Convertir a entero para nombres más limpios
-                nombre_archivo = fila[4].strip()
-                
-                # Limpiar razón social para nombre de archivo
-                razon_social_limpia = re.sub(r'[<>:"/\\|?*]', '', razon_social)
-                razon_social_limpia = re.sub(r'\s+', ' ', razon_social_limpia)
-                razon_social_limpia = razon_social_limpia[:60]  # Limitar longitud
-                
-                if nombre_archivo:
-                    nuevo_nombre = f"{fecha} - {razon_social_limpia} - ${subtotal}.pdf"
-                    nombres_archivos[nombre_archivo] = nuevo_nombre
+def renombrar_pdfs(carpeta_documentos, archivo_salida):
+    print("\n🔄 Iniciando renombrado de archivos...")
 
-    # Renombrar archivos
+    nombres_archivos = {}
     archivos_renombrados = 0
-    for archivo in os.listdir(carpeta_documentos):
-        if archivo.lower().endswith(".pdf"):
-            if archivo in nombres_archivos:
-                ruta_original = os.path.join(carpeta_documentos, archivo)
-                nuevo_nombre = nombres_archivos[archivo]
-                ruta_nueva = os.path.join(carpeta_documentos, nuevo_nombre)
-                
-                if os.path.exists(ruta_nueva):
-                    print(f"✅ Ya tiene nombre correcto: {nuevo_nombre}")
-                    continue
-                
-                try:
-                    os.rename(ruta_original, ruta_nueva)
-                    print(f"✅ Renombrado: {archivo} → {nuevo_nombre}")
-                    archivos_renombrados += 1
-                except Exception as e:
-                    print(f"❌ Error renombrando {archivo}: {str(e)}")
-
-    print(f"\n📁 Archivos renombrados: {archivos_renombrados}")
-
-except Exception as e:
-    print(f"❌ Error durante el renombrado: {str(e)}")
-
-print(f"\n🎉 Proceso completado.")
-print(f"📊 Resumen final:")
-print(f"   - Archivos procesados: {archivos_procesados}")
-print(f"   - Extracciones exitosas: {archivos_exitosos}")
-print(f"   - Archivos renombrados: {archivos_renombrados if 'archivos_renombrados' in locals() else 0}")
-print(f"   - Archivo CSV: {archivo_salida}")
-
-# Intentar abrir la carpeta
-try:
-    os.startfile(carpeta_documentos)
-    print(f"📂 Carpeta abierta: {carpeta_documentos}")
-except Exception as e:
-    print(f"⚠ Abre manualmente: {carpeta_documentos}")
+    try:
+        with open(archivo_salida, mode="r", encoding="utf-8") as file:
+            reader = csv.reader(file)
+            next(reader)  # Saltar encabezado
+            
+            for fila in reader:
+                if len(fila) >= 5:
+                    nuevo_nombre = nombre_renombrado(fila[0], fila[1], fila[2])
+                    nombre_archivo = fila[4].strip()
+                    
+                    if nombre_archivo:
+                        nombres_archivos[nombre_archivo] = nuevo_nombre
+
+        # Renombrar archivos
+        for archivo in os.listdir(carpeta_documentos):
+            if archivo.lower().endswith(".pdf"):
+                if archivo in nombres_archivos:
+                    ruta_original = os.path.join(carpeta_documentos, archivo)
+                    nuevo_nombre = nombres_archivos[archivo]
+                    ruta_nueva = os.path.join(carpeta_documentos, nuevo_nombre)
+                    
+                    if os.path.exists(ruta_nueva):
+                        print(f"✅ Ya tiene nombre correcto: {nuevo_nombre}")
+                        continue
+                    
+                    try:
+                        os.rename(ruta_original, ruta_nueva)
+                        print(f"✅ Renombrado: {archivo} → {nuevo_nombre}")
+                        archivos_renombrados += 1
+                    except Exception as e:
+                        print(f"❌ Error renombrando {archivo}: {str(e)}")
+
+        print(f"\n📁 Archivos renombrados: {archivos_renombrados}")
+
+    except Exception as e:
+        print(f"❌ Error durante el renombrado: {str(e)}")
+
+    return archivos_renombrados
+
+# Punto de entrada común (Flask / motor de ejecución)
+def run(folder):
+    """Procesa las facturas MUISKA de la carpeta y devuelve el resumen de la ejecución"""
+    carpeta_documentos = folder
+    os.makedirs(carpeta_documentos, exist_ok=True)
+
+    # Ruta de salida (por ejemplo CSV o Excel)
+    archivo_salida = os.path.join(carpeta_documentos, f"resultado_{NOMBRE_SCRIPT}.xlsx")
+
+    print(f"📁 Carpeta de trabajo: {carpeta_documentos}")
+    print(f"💾 Archivo de salida: {archivo_salida}")
+
+    datos_extraidos, archivos_procesados, archivos_exitosos, archivos_omitidos = procesar_pdfs(carpeta_documentos)
+    resumen = {
+        "carpeta": carpeta_documentos,
+        "archivos_generados": [],
+        "archivos_procesados": archivos_procesados,
+        "archivos_omitidos": archivos_omitidos,
+        "extracciones_exitosas": archivos_exitosos,
+    }
+
+    if not datos_extraidos:
+        print("\n⚠ No se encontraron documentos válidos para procesar.")
+        print("💡 Revisa que los PDFs contengan facturas electrónicas válidas.")
+        return resumen
+
+    datos_extraidos.sort(key=lambda x: convertir_fecha(x[0]))
+
+    if not guardar_csv(datos_extraidos, archivo_salida):
+        return resumen
+    resumen["archivos_generados"].append(archivo_salida)
+
+    archivos_renombrados = renombrar_pdfs(carpeta_documentos, archivo_salida)
+    resumen["archivos_renombrados"] = archivos_renombrados
+
+    print(f"\n🎉 Proceso completado.")
+    print(f"📊 Resumen final:")
+    print(f"   - Archivos procesados: {archivos_procesados}")
+    print(f"   - Archivos omitidos (sin cambios): {archivos_omitidos}")
+    print(f"   - Extracciones exitosas: {archivos_exitosos}")
+    print(f"   - Archivos renombrados: {archivos_renombrados}")
+    print(f"   - Archivo CSV: {archivo_salida}")
+
+    return resumen
+
+if __name__ == "__main__":
+    carpeta_documentos = resolver_carpeta_documentos()
+    resumen = run(carpeta_documentos)
+
+    # Intentar abrir la carpeta (solo en Windows local)
+    if os.name == "nt" and resumen["archivos_generados"]:
+        try:
+            os.startfile(carpeta_documentos)
+            print(f"📂 Carpeta abierta: {carpeta_documentos}")
+        except Exception as e:
+            print(f"⚠ Abre manualmente: {carpeta_documentos}")
@@ -1,26 +1,13 @@
 import os
 import re
-import pytesseract
+import sys
 import fitz  # PyMuPDF
-from PIL import Image
 import pandas as pd
-import time
 
-# Carpeta base dinámica (se adapta a local o nube)
-BASE_FOLDER = os.environ.get("UPLOAD_FOLDER", "/tmp")
-
-# Subcarpeta para los documentos bancarios
-carpeta_pdfs = os.path.join(BASE_FOLDER, "BANCO_DESPRENDIBLES")
-os.makedirs(carpeta_pdfs, exist_ok=True)
-
-# Archivo Excel de salida dentro del mismo entorno
-ruta_salida_excel = os.path.join(BASE_FOLDER, "Bancos_Pagos_CE.xlsx")
-
-print(f"📂 Carpeta de PDFs: {carpeta_pdfs}")
-print(f"📊 Archivo de salida: {ruta_salida_excel}")
-
-# Configuración OCR
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+from comun.ocr import cache_ocr, dpi_configurado, ocr_paginas, resumen_cache_ocr
+from comun.salidas import escritura_atomica
+from comun.sonda import OCR, TEXTO, sondear_pagina
+from comun.texto_pdf import CONTADORES_PAGINAS, resumen_paginas
 
 # Diccionario meses (formato OCR)
 meses = {
@@ -33,113 +20,133 @@ fecha_regex = re.compile(r"\d{4}/\d{2}/\d{2}")
 valor_regex = re.compile(r"\$\d{1,3}(?:,\d{3})*(?:\.\d{2})?")
 beneficiario_regex = re.compile(r"Identificación\s+([A-Za-zÁÉÍÓÚáéíóúÑñ ]+)")
 
-# Lista para guardar los resultados
-datos = []
-
-# Recorremos los archivos PDF
-for archivo in os.listdir(carpeta_pdfs):
-    if not archivo.lower().endswith(".pdf"):
-        continue
-
-    ruta_pdf = os.path.join(carpeta_pdfs, archivo)
-    fecha_pago = "No encontrado"
-    beneficiario = "No encontrado"
-    valor_pagar = 0.0
-
-    try:
-        doc = fitz.open(ruta_pdf)
-        texto = doc[0].get_text().replace('\n', ' ')
-        
-        # Caso 1: PDF con texto estructurado
-        if len(texto) > 200:
-            fecha_match = fecha_regex.search(texto)
-            valores_match = valor_regex.findall(texto)
-            beneficiario_match = beneficiario_regex.search(texto)
-
-            if fecha_match:
-                partes = fecha_match.group(0).split("/")
-                if len(partes) == 3:
-                    fecha_pago = f"{partes[2]}/{partes[1]}/{partes[0]}"
-                else:
-                    fecha_pago = fecha_match.group(0)
-            else:
-                fecha_pago = "No encontrado"
-
-            valores_numericos = [float(v.replace(",", "").replace("$", "")) for v in valores_match]
-            valor_pagar = sum(valores_numericos) if valores_numericos else 0.00
-
-            if "DIAN - PSE - AÑO:" in texto:
-                beneficiario = "DIAN - PSE - AÑO: 2025 PERIODO: 1"
-            else:
-                beneficiario = beneficiario_match.group(1).strip() if beneficiario_match else "No encontrado"
-                beneficiario = re.sub(r"Beneficiario.*", "", beneficiario).strip()
+def interpretar_texto(texto):
+    """Fecha, beneficiario y valor de un desprendible con texto estructurado"""
+    fecha_match = fecha_regex.search(texto)
+    valores_match = valor_regex.findall(texto)
+    beneficiario_match = beneficiario_regex.search(texto)
 
+    if fecha_match:
+        partes = fecha_match.group(0).split("/")
+        if len(partes) == 3:
+            fecha_pago = f"{partes[2]}/{partes[1]}/{partes[0]}"
         else:
-            # Caso 2: PDF con imagen (OCR)
-            pix = doc[0].get_pixmap(dpi=300)
-            img_path = "temp.png"
-            pix.save(img_path)
-
-            imagen = Image.open(img_path)
-            ocr_lineas = pytesseract.image_to_string(imagen, lang='spa').split('\n')
-            ocr_lineas = [linea.strip() for linea in ocr_lineas if linea.strip()]
-            os.remove(img_path)
-
-            valor_detectado = "0"
-
-            for i, linea in enumerate(ocr_lineas):
-                if "comprobante" in linea.lower():
-                    for j in range(i+1, min(i+5, len(ocr_lineas))):
-                        match = re.search(r"(\d{1,2})\s+(ene|feb|mar|abr|may|jun|jul|ago|sep|oct|nov|dic)\s+(\d{4})", ocr_lineas[j].lower())
-                        if match:
-                            dia, mes_texto, anio = match.groups()
-                            mes_num = meses[mes_texto]
-                            fecha_pago = f"{dia.zfill(2)}/{mes_num}/{anio}"
-                            break
-
-                if "transferencia" in linea.lower():
-                    for j in range(i+1, min(i+5, len(ocr_lineas))):
-                        if "$" in ocr_lineas[j] or any(char.isdigit() for char in ocr_lineas[j]):
-                            valor_detectado = ocr_lineas[j].replace("$", "").replace(".", "").replace(",", "").strip()
-                            break
-
-                if "referencia" in linea.lower() and i + 1 < len(ocr_lineas):
-                    beneficiario = ocr_lineas[i+1].strip()
-
-            try:
-                valor_pagar = float(valor_detectado)
-            except:
-                valor_pagar = 0.0
-
-        # Agregar resultado
-        datos.append({
-            "Fecha de Pago": fecha_pago,
-            "Beneficiario": beneficiario,
-            "Valor a Pagar": valor_pagar,
-            "Nombre Archivo": archivo
-        })
-
-    except Exception as e:
-        print(f"⚠️ Error procesando {archivo}: {e}")
-        continue
-
-# Guardar Excel en la ruta definitiva con nombre correcto
-df = pd.DataFrame(datos)
-df.to_excel(ruta_salida_excel, index=False)
-
-print(f"\n✅ Proceso completado. Archivo guardado como:\n{ruta_salida_excel}")
+            fecha_pago = fecha_match.group(0)
+    else:
+        fecha_pago = "No encontrado"
 
+    valores_numericos = [float(v.replace(",", "").replace("$", "")) for v in valores_match]
+    valor_pagar = sum(valores_numericos) if valores_numericos else 0.00
 
-print("Esperando 0.1 minuto antes de continuar...") 
-time.sleep(3)
+    if "DIAN - PSE - AÑO:" in texto:
+        beneficiario = "DIAN - PSE - AÑO: 2025 PERIODO: 1"
+    else:
+        beneficiario = beneficiario_match.group(1).strip() if beneficiario_match else "No encontrado"
+        beneficiario = re.sub(r"Beneficiario.*", "", beneficiario).strip()
 
+    return fecha_pago, beneficiario, valor_pagar
 
-import os
-import pandas as pd
+def interpretar_lineas_ocr(ocr_lineas):
+    """Fecha, beneficiario y valor a partir de las líneas OCR de un desprendible escaneado"""
+    fecha_pago = "No encontrado"
+    beneficiario = "No encontrado"
+    valor_detectado = "0"
+
+    for i, linea in enumerate(ocr_lineas):
+        if "comprobante" in linea.lower():
+            for j in range(i+1, min(i+5, len(ocr_lineas))):
+                match = re.search(r"(\d{1,2})\s+(ene|feb|mar|abr|may|jun|jul|ago|sep|oct|nov|dic)\s+(\d{4})", ocr_lineas[j].lower())
+                if match:
+                    dia, mes_texto, anio = match.groups()
+                    mes_num = meses[mes_texto]
+                    fecha_pago = f"{dia.zfill(2)}/{mes_num}/{anio}"
+                    break
+
+        if "transferencia" in linea.lower():
+            for j in range(i+1, min(i+5, len(ocr_lineas))):
+                if "$" in ocr_lineas[j] or any(char.isdigit() for char in ocr_lineas[j]):
+                    valor_detectado = ocr_lineas[j].replace("$", "").replace(".", "").replace(",", "").strip()
+                    break
+
+        if "referencia" in linea.lower() and i + 1 < len(ocr_lineas):
+            beneficiario = ocr_lineas[i+1].strip()
 
-# Rutas
-ruta_excel = os.path.join(user_profile, r"OneDrive\2 PROYECTOS TECNOLOGIA\2 AUTOMAIZACION TECNOLOGIA\2.RESULTADOS\1.DIGITALIZACION\Bancos_Pagos_CE.xlsx")
-carpeta_documentos = os.path.join(user_profile, r"OneDrive\2 PROYECTOS TECNOLOGIA\2 AUTOMAIZACION TECNOLOGIA\2.RESULTADOS\1.DIGITALIZACION\2.1 BANCO DESPRENDIBLES")
+    try:
+        valor_pagar = float(valor_detectado)
+    except:
+        valor_pagar = 0.0
+
+    return fecha_pago, beneficiario, valor_pagar
+
+def extraer_datos_desprendibles(carpeta_pdfs, dpi=None, workers=None):
+    """Lee cada desprendible (texto u OCR) y devuelve fecha, beneficiario y valor.
+
+    La sonda de capa de texto (comun.sonda) decide por la primera página:
+    los PDF con texto se leen al recorrer la carpeta; los escaneados se
+    acumulan y pasan juntos por el pool de OCR (OCR_WORKERS procesos,
+    OCR_DPI de resolución). Las filas conservan el orden de la carpeta.
+    """
+    dpi = dpi or dpi_configurado()
+    cache_ocr.reiniciar_estadisticas()
+    # Lista para guardar los resultados
+    datos = []
+    pendientes_ocr = []  # (posición en datos, ruta del PDF)
+    paginas = dict.fromkeys(CONTADORES_PAGINAS, 0)
+
+    # Recorremos los archivos PDF
+    for archivo in os.listdir(carpeta_pdfs):
+        if not archivo.lower().endswith(".pdf"):
+            continue
+
+        ruta_pdf = os.path.join(carpeta_pdfs, archivo)
+        fila = {
+            "Fecha de Pago": "No encontrado",
+            "Beneficiario": "No encontrado",
+            "Valor a Pagar": 0.0,
+            "Nombre Archivo": archivo
+        }
+
+        try:
+            with fitz.open(ruta_pdf) as doc:
+                tipo = sondear_pagina(doc[0])["tipo"]
+                texto = doc[0].get_text().replace('\n', ' ') if tipo == TEXTO else ""
+
+            # Caso 1: PDF con capa de texto
+            if tipo == TEXTO:
+                paginas["paginas_texto"] += 1
+                fila["Fecha de Pago"], fila["Beneficiario"], fila["Valor a Pagar"] = interpretar_texto(texto)
+            elif tipo == OCR:
+                # Caso 2: PDF escaneado (OCR en el pool, más abajo)
+                paginas["paginas_ocr"] += 1
+                pendientes_ocr.append((len(datos), ruta_pdf))
+            else:
+                paginas["paginas_vacias"] += 1
+                print(f"⚠️ {archivo}: la primera página está en blanco")
+
+            # Agregar resultado
+            datos.append(fila)
+
+        except Exception as e:
+            print(f"⚠️ Error procesando {archivo}: {e}")
+            continue
+
+    if pendientes_ocr:
+        print(f"🔎 OCR de {len(pendientes_ocr)} desprendible(s) escaneado(s) a {dpi} DPI...")
+        resultados = ocr_paginas([(ruta, 0) for _, ruta in pendientes_ocr], dpi=dpi, workers=workers)
+        for (posicion, _), resultado in zip(pendientes_ocr, resultados):
+            fila = datos[posicion]
+            if resultado["error"]:
+                paginas["paginas_ocr_fallidas"] += 1
+                print(f"⚠️ Error procesando {fila['Nombre Archivo']}: {resultado['error']}")
+                datos[posicion] = None
+                continue
+            fila["Fecha de Pago"], fila["Beneficiario"], fila["Valor a Pagar"] = interpretar_lineas_ocr(resultado["lineas"])
+            origen = "desde caché" if resultado["cache"] else f"en {resultado['duracion']:.2f}s"
+            print(f"   {fila['Nombre Archivo']}: OCR {origen}")
+        print(f"⚡ Caché de OCR: {resumen_cache_ocr()}")
+    print(f"🔬 Páginas: {resumen_paginas(paginas)}")
+
+    return [fila for fila in datos if fila is not None]
 
 # Función para limpiar nombres eliminando caracteres no permitidos en archivos
 def limpiar_nombre(nombre):
@@ -148,23 +155,27 @@ def limpiar_nombre(nombre):
         nombre = nombre.replace(c, "")
     return nombre.strip()
 
-# Cargar el archivo Excel en un DataFrame
-df = pd.read_excel(ruta_excel)
+# Nombre final de cada PDF: "fecha - beneficiario - valor.pdf"
+def nombre_renombrado(fecha, beneficiario, valor):
+    fecha = str(fecha).strip().replace("/", "-")  # Reemplazar / con - en la fecha
+    return f"{fecha} - {limpiar_nombre(str(beneficiario))} - {str(valor).strip()}.pdf"
+
+def renombrar_pdfs(ruta_excel, carpeta_documentos):
+    # Cargar el archivo Excel en un DataFrame
+    df = pd.read_excel(ruta_excel)
+
+    # Verificar que el archivo tiene al menos 4 columnas
+    if df.shape[1] < 4:
+        print("❌ El archivo Excel no tiene suficientes columnas.")
+        return
 
-# Verificar que el archivo tiene al menos 4 columnas
-if df.shape[1] < 4:
-    print("❌ El archivo Excel no tiene suficientes columnas.")
-else:
     nombres_archivos = {}
     
     for _, fila in df.iterrows():
-        fecha = str(fila[0]).strip().replace("/", "-")  # Reemplazar / con - en la fecha
-        razon_social = limpiar_nombre(str(fila[1]))  # Limpiar razón social
-        subtotal = str(fila[2]).strip()  # Subtotal
-        nombre_archivo = str(fila[3]).strip()  # Nombre de archivo original en Excel
+        nombre_archivo = str(fila.iloc[3]).strip()  # Nombre de archivo original en Excel
 
         if nombre_archivo and nombre_archivo.lower().endswith(".pdf"):  # Verificar que sea un PDF
-            nuevo_nombre = f"{fecha} - {razon_social} - {subtotal}.pdf"
+            nuevo_nombre = nombre_renombrado(fila.iloc[0], fila.iloc[1], fila.iloc[2])
             nombres_archivos[nombre_archivo] = os.path.join(carpeta_documentos, nuevo_nombre)
     
     # Recorrer los archivos en la carpeta y renombrarlos
@@ -189,5 +200,50 @@ else:
 
     print("🔄 Proceso completado.")
 
-os.startfile(carpeta_documentos)
-
+# Punto de entrada común (Flask / motor de ejecución)
+def run(folder):
+    """Procesa los desprendibles bancarios de la carpeta y devuelve el resumen"""
+    # Subcarpeta para los documentos bancarios
+    carpeta_pdfs = os.path.join(folder, "BANCO_DESPRENDIBLES")
+    os.makedirs(carpeta_pdfs, exist_ok=True)
+
+    # Archivo Excel de salida dentro del mismo entorno
+    ruta_salida_excel = os.path.join(folder, "Bancos_Pagos_CE.xlsx")
+
+    print(f"📂 Carpeta de PDFs: {carpeta_pdfs}")
+    print(f"📊 Archivo de salida: {ruta_salida_excel}")
+
+    datos = extraer_datos_desprendibles(carpeta_pdfs)
+
+    # Guardar Excel en la ruta definitiva con nombre correcto
+    df = pd.DataFrame(datos)
+    if not df.empty:
+        # Con el nombre final, 6 CE COMBINADO puede ubicar el PDF desde la tabla
+        df["Archivo Renombrado"] = [
+            nombre_renombrado(fila["Fecha de Pago"], fila["Beneficiario"], fila["Valor a Pagar"]) for fila in datos
+        ]
+    with escritura_atomica(ruta_salida_excel) as temporal:
+        df.to_excel(temporal, index=False)
+
+    print(f"\n✅ Proceso completado. Archivo guardado como:\n{ruta_salida_excel}")
+
+    renombrar_pdfs(ruta_salida_excel, carpeta_pdfs)
+
+    return {
+        "carpeta": carpeta_pdfs,
+        "archivos_generados": [ruta_salida_excel],
+        "archivos_procesados": len(datos),
+        "cache_ocr": cache_ocr.estadisticas(),
+    }
+
+if __name__ == "__main__":
+    # Carpeta base dinámica (argumento desde Flask, variable de entorno o /tmp)
+    if len(sys.argv) > 1:
+        BASE_FOLDER = sys.argv[1]
+    else:
+        BASE_FOLDER = os.environ.get("UPLOAD_FOLDER", "/tmp")
+
+    resumen = run(BASE_FOLDER)
+
+    if os.name == "nt":
+        os.startfile(resumen["carpeta"])
@@ -1,31 +1,23 @@
 import os
-import pdfplumber
+import sys
 import pandas as pd
 import re
 from datetime import datetime
 import locale
-# Carpeta base dinámica (válida para local y Render)
-BASE_FOLDER = os.environ.get("UPLOAD_FOLDER", "/tmp")
 
-# Crear subcarpeta específica para los comprobantes de egreso
-pdf_folder = os.path.join(BASE_FOLDER, "ERP_COMPROBANTE_EGRESO")
-os.makedirs(pdf_folder, exist_ok=True)
-
-# Definir la ruta de salida del archivo Excel dentro del mismo entorno
-output_excel = os.path.join(BASE_FOLDER, "ERP_Comprobante_Egreso.xlsx")
-
-# Mostrar rutas para depuración
-print(f"📂 Carpeta de PDFs: {pdf_folder}")
-print(f"📊 Archivo Excel de salida: {output_excel}")
+from comun.plantillas import MODO_APRENDER, aprender, modo_plantillas, plantilla_vigente
+from comun.salidas import escritura_atomica
+from comun.texto_pdf import backend_configurado, cache_texto, resumen_cache, resumen_paginas, sumar_paginas, textos_paginas
 
 # Establecer el idioma español para reconocer los meses
-try:
-    locale.setlocale(locale.LC_TIME, 'es_ES.UTF-8')  # Linux/macOS
-except:
+def configurar_idioma():
     try:
-        locale.setlocale(locale.LC_TIME, 'Spanish_Spain')  # Windows
+        locale.setlocale(locale.LC_TIME, 'es_ES.UTF-8')  # Linux/macOS
     except:
-        print("⚠️ No se pudo establecer el idioma español. La lectura de fechas podría fallar.")
+        try:
+            locale.setlocale(locale.LC_TIME, 'Spanish_Spain')  # Windows
+        except:
+            print("⚠️ No se pudo establecer el idioma español. La lectura de fechas podría fallar.")
 
 # 🔧 FUNCION PARA FORMATEAR LA FECHA (ej: 31-03-2025)
 def formatear_fecha(fecha_texto):
@@ -42,66 +34,162 @@ def formatear_fecha(fecha_texto):
         print(f"⚠️ No se pudo convertir la fecha: '{fecha_texto}' -> {e}")
         return "Formato inválido"
 
+# 📐 Plantilla de regiones del comprobante (ver comun/plantillas.py): el valor va en la línea bajo el ancla
+TIPO_PLANTILLA = "comprobante_egreso_erp"
+ANCLAS_PLANTILLA = {"beneficiario": "BENEFICIARIO", "fecha": "FECHA DOCUMENTO", "total": "TOTAL DEL DOCUMENTO"}
+MAX_MUESTRAS_PLANTILLA = 20
+
+def primer_valor(texto):
+    valores = re.findall(r"\d{1,3}(?:[.,]\d{3})*(?:[.,]\d{2})?", texto)
+    return float(valores[0].replace(".", "").replace(",", ".")) if valores else None
+
+def campos_completos(beneficiario, fecha_documento, total_documento):
+    return beneficiario != "No encontrado" and fecha_documento not in ("No encontrada", "Formato inválido") and total_documento is not None
+
+# 🔧 CAMPOS DESDE LA PLANTILLA (solo las regiones recortadas; None si no aplica)
+def extraer_con_plantilla(pdf_path, progreso=None):
+    plantilla = plantilla_vigente(TIPO_PLANTILLA)
+    if not plantilla:
+        return None
+    try:
+        lectura = plantilla.extraer(pdf_path)
+    except Exception as e:
+        print(f"⚠️ Plantilla no aplicable a {os.path.basename(pdf_path)}: {e}")
+        return None
+    regiones = lectura["campos"]
+    if not all(regiones.get(campo) for campo in ANCLAS_PLANTILLA):
+        return None
+    beneficiario = " ".join(regiones["beneficiario"].split())
+    fecha_documento = formatear_fecha(regiones["fecha"])
+    total_documento = primer_valor(regiones["total"])
+    if not campos_completos(beneficiario, fecha_documento, total_documento):
+        return None
+    if progreso is not None:
+        progreso["paginas_texto"] = progreso.get("paginas_texto", 0) + lectura["paginas_leidas"]
+        progreso["plantilla"] = True
+    return beneficiario, fecha_documento, total_documento
+
+# 🔧 CAMPOS DE UN COMPROBANTE (beneficiario, fecha y total)
+def extraer_campos_comprobante(pdf_path, backend=None, progreso=None, crudos=None):
+    """Primero con la plantilla de regiones y, si no aplica, con el texto completo.
+
+    En `crudos` (si se pasa un dict) quedan las líneas bajo cada ancla, tal
+    como aparecen en el PDF, para aprender la plantilla.
+    """
+    por_regiones = extraer_con_plantilla(pdf_path, progreso)
+    if por_regiones:
+        return por_regiones
+    if backend is None:
+        backend = backend_configurado("CE_ERP_TEXTO_BACKEND")
+    if crudos is None:
+        crudos = {}
+    beneficiario = "No encontrado"
+    total_documento = None
+    fecha_documento = "No encontrada"
+
+    for text in textos_paginas(pdf_path, backend, progreso):
+        if text:
+            lineas = text.split("\n")
+
+            # 📌 Buscar beneficiario
+            for i, linea in enumerate(lineas):
+                if "BENEFICIARIO" in linea and i + 1 < len(lineas):
+                    beneficiario = lineas[i + 1].strip()
+                    crudos["beneficiario"] = beneficiario
+                    break
+            
+            # 📌 Buscar fecha del documento
+            for i, linea in enumerate(lineas):
+                if "FECHA DOCUMENTO" in linea and i + 1 < len(lineas):
+                    fecha_cruda = lineas[i + 1].strip()
+                    crudos["fecha"] = fecha_cruda
+                    print(f"🕒 Fecha encontrada: {fecha_cruda}")
+                    fecha_documento = formatear_fecha(fecha_cruda)
+                    break
+            
+            # 📌 Buscar total del documento
+            total_encontrado = False
+            for i, linea in enumerate(lineas):
+                if "TOTAL DEL DOCUMENTO" in linea and i + 1 < len(lineas):
+                    valores = re.findall(r"\d{1,3}(?:[.,]\d{3})*(?:[.,]\d{2})?", lineas[i + 1])
+                    if valores:
+                        total_documento = float(valores[0].replace(".", "").replace(",", "."))  # Convertir a float
+                        crudos["total"] = lineas[i + 1].strip()
+                        total_encontrado = True
+                        break
+            if not total_encontrado:
+                valores = re.findall(r"\d{1,3}(?:[.,]\d{3})*(?:[.,]\d{2})?", text)
+                if valores:
+                    total_documento = float(valores[-1].replace(".", "").replace(",", "."))  # Convertir a float
+
+    return beneficiario, fecha_documento, total_documento
+
 # 🔧 FUNCION PRINCIPAL
-def extraer_totales(pdf_folder, output_excel):
+def extraer_totales(pdf_folder, output_path):
     datos = []
+    conteos_paginas = []
+    muestras = []  # (ruta, líneas crudas) de los comprobantes completos, para el modo aprender
+    con_plantilla = 0
+    cache_texto.reiniciar_estadisticas()
+    print(f"📖 Backend de texto: {backend_configurado('CE_ERP_TEXTO_BACKEND')}")
     
     for file in os.listdir(pdf_folder):
         if file.endswith(".pdf"):
             pdf_path = os.path.join(pdf_folder, file)
             factura = file
             factura_sin_extension = file.replace(".pdf", "")
-            beneficiario = "No encontrado"
-            total_documento = None
-            fecha_documento = "No encontrada"
-            
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        lineas = text.split("\n")
-
-                        # 📌 Buscar beneficiario
-                        for i, linea in enumerate(lineas):
-                            if "BENEFICIARIO" in linea and i + 1 < len(lineas):
-                                beneficiario = lineas[i + 1].strip()
-                                break
-                        
-                        # 📌 Buscar fecha del documento
-                        for i, linea in enumerate(lineas):
-                            if "FECHA DOCUMENTO" in linea and i + 1 < len(lineas):
-                                fecha_cruda = lineas[i + 1].strip()
-                                print(f"🕒 Fecha encontrada: {fecha_cruda}")
-                                fecha_documento = formatear_fecha(fecha_cruda)
-                                break
-                        
-                        # 📌 Buscar total del documento
-                        total_encontrado = False
-                        for i, linea in enumerate(lineas):
-                            if "TOTAL DEL DOCUMENTO" in linea and i + 1 < len(lineas):
-                                valores = re.findall(r"\d{1,3}(?:[.,]\d{3})*(?:[.,]\d{2})?", lineas[i + 1])
-                                if valores:
-                                    total_documento = float(valores[0].replace(".", "").replace(",", "."))  # Convertir a float
-                                    total_encontrado = True
-                                    break
-                        if not total_encontrado:
-                            valores = re.findall(r"\d{1,3}(?:[.,]\d{3})*(?:[.,]\d{2})?", text)
-                            if valores:
-                                total_documento = float(valores[-1].replace(".", "").replace(",", "."))  # Convertir a float
+            conteos_paginas.append({})
+            crudos = {}
+            beneficiario, fecha_documento, total_documento = extraer_campos_comprobante(
+                pdf_path, progreso=conteos_paginas[-1], crudos=crudos
+            )
+            con_plantilla += conteos_paginas[-1].get("plantilla", False)
+            if campos_completos(beneficiario, fecha_documento, total_documento) and len(crudos) == len(ANCLAS_PLANTILLA):
+                muestras.append((pdf_path, crudos))
 
             # Agregar a la tabla
             datos.append([factura, factura_sin_extension, fecha_documento, beneficiario, total_documento])
     
+    if modo_plantillas() == MODO_APRENDER:
+        aprender_plantilla(muestras[:MAX_MUESTRAS_PLANTILLA])
+
     # 📤 Crear DataFrame
     df = pd.DataFrame(datos, columns=["Nombre Archivo", "Factura","Fecha Documento" ,"Beneficiario", "Total"])
+
+    # Nombre final de cada PDF, para que 6 CE COMBINADO lo ubique desde la tabla
+    renombrados = []
+    for _, row in df.iterrows():
+        try:
+            renombrados.append(nombre_renombrado(row["Factura"], row["Fecha Documento"], row["Beneficiario"], row["Total"]))
+        except (TypeError, ValueError):
+            renombrados.append("")
+    df["Archivo Renombrado"] = renombrados
     
     # 📁 Guardar en Excel
-    output_path = os.path.join(output_excel, "ERP_Com_Egreso.xlsx")
-    df.to_excel(output_path, index=False)
+    with escritura_atomica(output_path) as temporal:
+        df.to_excel(temporal, index=False)
     print(f"\n✅ Archivo guardado exitosamente en:\n{output_path}")
+    print(f"⚡ Caché de texto: {resumen_cache()}")
+    print(f"🔬 Páginas: {resumen_paginas(sumar_paginas(conteos_paginas))}")
+    print(f"📐 Leídos con plantilla de regiones: {con_plantilla} de {len(datos)}")
+    return output_path
 
-# Ejecutar la extracción de datos
-extraer_totales(pdf_folder, output_excel)
+# 🎓 MODO APRENDER (PLANTILLAS_MODO=aprender): infiere y guarda las regiones de la plantilla
+def aprender_plantilla(muestras):
+    if not muestras:
+        print("📐 Sin comprobantes completos para aprender la plantilla")
+        return
+    plantilla = aprender(TIPO_PLANTILLA, ANCLAS_PLANTILLA, muestras)
+    ruta = plantilla.guardar()
+    print(f"📐 Plantilla '{TIPO_PLANTILLA}' aprendida de {len(muestras)} comprobante(s): "
+          f"campos {', '.join(plantilla.campos) or 'ninguno'} → {ruta}")
+
+# Nombre final de cada PDF: "factura - fecha - beneficiario - total.pdf"
+def nombre_renombrado(factura, fecha_documento, beneficiario, total):
+    factura = str(factura).strip().lower()
+    fecha_doc = pd.to_datetime(fecha_documento).strftime("%d-%m-%Y")
+    beneficiario = str(beneficiario).strip()
+    return f"{factura} - {fecha_doc} - {beneficiario} - {total}.pdf"
 
 # Parte del código para renombrar los PDFs
 def renombrar_pdfs(excel_path, pdf_folder):
@@ -117,13 +205,9 @@ def renombrar_pdfs(excel_path, pdf_folder):
     # Recorrer cada fila del DataFrame
     for index, row in df.iterrows():
         nombre_actual = row["Nombre Archivo"]
-        factura = str(row["Factura"]).strip().lower()
-        fecha_doc = pd.to_datetime(row["Fecha Documento"]).strftime("%d-%m-%Y")
-        beneficiario = str(row["Beneficiario"]).strip()
-        total = row["Total"]
 
         # Crear nuevo nombre con formato: factura - fecha - beneficiario - total.pdf
-        nuevo_nombre = f"{factura} - {fecha_doc} - {beneficiario} - {total}.pdf"
+        nuevo_nombre = nombre_renombrado(row["Factura"], row["Fecha Documento"], row["Beneficiario"], row["Total"])
 
         # Construir rutas completas
         actual_path = os.path.join(pdf_folder, nombre_actual)
@@ -136,9 +220,42 @@ def renombrar_pdfs(excel_path, pdf_folder):
         else:
             print(f"⚠️ No encontrado: {nombre_actual}")
 
-# Ejecutar la renombración de archivos PDF
-excel_path = os.path.join(output_excel, "ERP_Com_Egreso.xlsx")
-renombrar_pdfs(excel_path, pdf_folder)
+# 🔌 PUNTO DE ENTRADA COMÚN (Flask / motor de ejecución)
+def run(folder):
+    """Procesa los comprobantes de egreso de la carpeta y devuelve el resumen"""
+    configurar_idioma()
+
+    # Crear subcarpeta específica para los comprobantes de egreso
+    pdf_folder = os.path.join(folder, "ERP_COMPROBANTE_EGRESO")
+    os.makedirs(pdf_folder, exist_ok=True)
+
+    # Definir la ruta de salida del archivo Excel dentro del mismo entorno
+    excel_path = os.path.join(folder, "ERP_Com_Egreso.xlsx")
+
+    # Mostrar rutas para depuración
+    print(f"📂 Carpeta de PDFs: {pdf_folder}")
+    print(f"📊 Archivo Excel de salida: {excel_path}")
+
+    # Ejecutar la extracción de datos
+    extraer_totales(pdf_folder, excel_path)
+
+    # Ejecutar la renombración de archivos PDF
+    renombrar_pdfs(excel_path, pdf_folder)
+
+    return {
+        "carpeta": pdf_folder,
+        "archivos_generados": [excel_path],
+    }
+
+if __name__ == "__main__":
+    # Carpeta base dinámica (argumento desde Flask, variable de entorno o /tmp)
+    if len(sys.argv) > 1:
+        BASE_FOLDER = sys.argv[1]
+    else:
+        BASE_FOLDER = os.environ.get("UPLOAD_FOLDER", "/tmp")
+
+    resumen = run(BASE_FOLDER)
 
-# Abrir la carpeta con los PDFs
-os.startfile(pdf_folder)
+    # Abrir la carpeta con los PDFs
+    if os.name == "nt":
+        os.startfile(resumen["carpeta"])
@@ -1,38 +1,13 @@
 import os
-import fitz  # PyMuPDF
+import sys
 import re
 import shutil
 from unidecode import unidecode
 
-# =====================================================
-# 🌎 CONFIGURACIÓN UNIVERSAL DE RUTAS DINÁMICAS
-# =====================================================
-
-# Carpeta base dinámica (usa variable de entorno si existe, o /tmp por defecto)
-BASE_FOLDER = os.environ.get("UPLOAD_FOLDER", "/tmp")
-
-# Crear subcarpetas para organización del procesamiento
-carpeta_erp = os.path.join(BASE_FOLDER, "ERP_FACTURAS")
-carpeta_documentos_soporte = os.path.join(BASE_FOLDER, "MUISKA_FACTURAS")
-carpeta_combinados = os.path.join(BASE_FOLDER, "FC_EMPRESA")
-carpeta_faltantes = os.path.join(BASE_FOLDER, "FALTANTES")
-
-# Crear todas las carpetas si no existen (solo afecta localmente)
-for folder in [carpeta_erp, carpeta_documentos_soporte, carpeta_combinados, carpeta_faltantes]:
-    os.makedirs(folder, exist_ok=True)
-
-# =====================================================
-# 🧾 VERIFICAR LAS RUTAS CONFIGURADAS
-# =====================================================
-print("📁 RUTAS CONFIGURADAS:")
-print(f"🧾 ERP Facturas:            {carpeta_erp}")
-print(f"📄 Documentos de Soporte:   {carpeta_documentos_soporte}")
-print(f"🏢 FC Empresa Combinados:   {carpeta_combinados}")
-print(f"⚠️  Archivos Faltantes:     {carpeta_faltantes}")
-
-# Crear las carpetas de salida si no existen
-os.makedirs(carpeta_combinados, exist_ok=True)
-os.makedirs(carpeta_faltantes, exist_ok=True)
+from comun.combinar_pdf import combinar_pares, resumen_combinacion
+from comun.emparejamiento import emparejar, modo_configurado
+from comun.salidas import escritura_atomica
+from comun.tablas import FUENTE_TABLAS, cargar_tabla, carpetas_tabla, emparejar_con_tablas, fuente_configurada
 
 def normalizar_fecha(fecha_raw):
     """Normaliza fecha a formato YYYY-MM-DD"""
@@ -131,238 +106,334 @@ def procesar_archivo(nombre_archivo, ruta_completa):
         'nombres_personas': nombres_personas
     }
 
-def encontrar_coincidencias_precisas(archivos_erp, archivos_soporte):
-    """Encuentra coincidencias usando criterios flexibles para facturas"""
-    coincidencias = []
-    indices_soporte_usados = set()
+def conjuntos_archivo(archivo):
+    """Claves de comparación de un archivo, como conjuntos armados una sola vez"""
+    return {
+        'fecha': archivo['fecha'],
+        'valores': set(archivo['valores']['valores_decimales']),
+        'codigos': set(archivo['valores']['codigos']),
+        'nombres': set(archivo['nombres_personas']),
+        'otros': set(archivo['valores']['otros']),
+    }
+
+def puntuar_par(claves_erp, claves_soporte, con_criterios=True):
+    """Puntuación y criterios cumplidos por un par ERP / soporte.
+
+    Con con_criterios=False no se arman los textos de criterios (lo costoso
+    cuando se puntúan muchos candidatos) y se devuelve una lista vacía.
+    """
+    puntuacion = 0
+    criterios_cumplidos = []
     
-    for i, archivo_erp in enumerate(archivos_erp):
-        mejor_coincidencia = None
-        mejor_puntuacion = 0
-        mejor_criterios = []
-        
-        for j, archivo_soporte in enumerate(archivos_soporte):
-            if j in indices_soporte_usados:  # Ya fue usado
-                continue
-                
-            puntuacion = 0
-            criterios_cumplidos = []
-            
-            # CRITERIO 1: Fecha (flexible - no obligatorio si ambos tienen)
-            fecha_coincide = True
-            if archivo_erp['fecha'] and archivo_soporte['fecha']:
-                if archivo_erp['fecha'] == archivo_soporte['fecha']:
-                    puntuacion += 50
-                    criterios_cumplidos.append(f"Fecha: {archivo_erp['fecha']}")
-                else:
-                    # En lugar de descartar, reducir puntuación pero permitir continuar
-                    puntuacion -= 10
-                    fecha_coincide = False
-            elif archivo_erp['fecha'] or archivo_soporte['fecha']:
-                # Solo uno tiene fecha, dar puntos menores
-                fecha_disponible = archivo_erp['fecha'] or archivo_soporte['fecha']
-                puntuacion += 20
-                criterios_cumplidos.append(f"Fecha disponible: {fecha_disponible}")
-            
-            # CRITERIO 2: Valores decimales (montos) - IMPORTANTE para facturas
-            valores_erp = set(archivo_erp['valores']['valores_decimales'])
-            valores_soporte = set(archivo_soporte['valores']['valores_decimales'])
-            valores_comunes = valores_erp & valores_soporte
-            
-            if valores_comunes:
-                puntuacion += 40 * len(valores_comunes)
-                criterios_cumplidos.append(f"Valores: {', '.join(map(str, sorted(valores_comunes)))}")
-            
-            # CRITERIO 3: Códigos importantes (4-6 dígitos)
-            codigos_erp = set(archivo_erp['valores']['codigos'])
-            codigos_soporte = set(archivo_soporte['valores']['codigos'])
-            codigos_comunes = codigos_erp & codigos_soporte
-            
-            if codigos_comunes:
-                puntuacion += 30 * len(codigos_comunes)
-                criterios_cumplidos.append(f"Códigos: {', '.join(sorted(codigos_comunes))}")
-            
-            # CRITERIO 4: Nombres de personas (flexible - no obligatorio)
-            nombres_erp = set(archivo_erp['nombres_personas'])
-            nombres_soporte = set(archivo_soporte['nombres_personas'])
-            nombres_comunes = nombres_erp & nombres_soporte
-            
-            if nombres_comunes:
-                puntuacion += 35 * len(nombres_comunes)
-                criterios_cumplidos.append(f"Nombres: {', '.join(nombres_comunes)}")
-            
-            # CRITERIO 5: Otros valores numéricos
-            otros_erp = set(archivo_erp['valores']['otros'])
-            otros_soporte = set(archivo_soporte['valores']['otros'])
-            otros_comunes = otros_erp & otros_soporte
-            
-            if otros_comunes:
-                puntuacion += 15 * len(otros_comunes)
-                criterios_cumplidos.append(f"Otros valores: {', '.join(sorted(otros_comunes))}")
-            
-            # Requiere al menos 40 puntos para ser considerado válido (más flexible)
-            if puntuacion >= 40 and puntuacion > mejor_puntuacion:
-                mejor_puntuacion = puntuacion
-                mejor_coincidencia = {
-                    'archivo_soporte': archivo_soporte,
-                    'puntuacion': puntuacion,
-                    'criterios': criterios_cumplidos,
-                    'indice_soporte': j
-                }
-        
-        if mejor_coincidencia:
-            coincidencias.append({
-                'archivo_erp': archivo_erp,
-                'archivo_soporte': mejor_coincidencia['archivo_soporte'],
-                'puntuacion': mejor_coincidencia['puntuacion'],
-                'criterios': mejor_coincidencia['criterios'],
-                'indice_erp': i,
-                'indice_soporte': mejor_coincidencia['indice_soporte']
-            })
-            indices_soporte_usados.add(mejor_coincidencia['indice_soporte'])
+    # CRITERIO 1: Fecha (flexible - no obligatorio si ambos tienen)
+    if claves_erp['fecha'] and claves_soporte['fecha']:
+        if claves_erp['fecha'] == claves_soporte['fecha']:
+            puntuacion += 50
+            if con_criterios:
+                criterios_cumplidos.append(f"Fecha: {claves_erp['fecha']}")
+        else:
+            # En lugar de descartar, reducir puntuación pero permitir continuar
+            puntuacion -= 10
+    elif claves_erp['fecha'] or claves_soporte['fecha']:
+        # Solo uno tiene fecha, dar puntos menores
+        fecha_disponible = claves_erp['fecha'] or claves_soporte['fecha']
+        puntuacion += 20
+        if con_criterios:
+            criterios_cumplidos.append(f"Fecha disponible: {fecha_disponible}")
     
-    return coincidencias
-
-# Procesar archivos de ambas carpetas
-print("🔍 PROCESANDO ARCHIVOS FACTURAS...")
-
-archivos_erp = []
-for archivo in os.listdir(carpeta_erp):
-    if archivo.lower().endswith('.pdf'):
-        ruta_completa = os.path.join(carpeta_erp, archivo)
-        info = procesar_archivo(archivo, ruta_completa)
-        archivos_erp.append(info)
-
-archivos_soporte = []
-for archivo in os.listdir(carpeta_documentos_soporte):
-    if archivo.lower().endswith('.pdf'):
-        ruta_completa = os.path.join(carpeta_documentos_soporte, archivo)
-        info = procesar_archivo(archivo, ruta_completa)
-        archivos_soporte.append(info)
-
-print(f"📁 Archivos ERP: {len(archivos_erp)} | Archivos MUISKA: {len(archivos_soporte)}")
-
-# Mostrar información extraída de forma organizada
-print(f"\n📋 ANÁLISIS DE ARCHIVOS ERP:")
-for archivo in archivos_erp:
-    info_linea = []
-    if archivo['fecha']:
-        info_linea.append(f"📅 {archivo['fecha']}")
-    if archivo['nombres_personas']:
-        info_linea.append(f"👤 {', '.join(archivo['nombres_personas'])}")
-    if archivo['valores']['valores_decimales']:
-        info_linea.append(f"💰 {', '.join(map(str, archivo['valores']['valores_decimales']))}")
-    if archivo['valores']['codigos']:
-        info_linea.append(f"🔢 {', '.join(archivo['valores']['codigos'])}")
+    # CRITERIO 2: Valores decimales (montos) - IMPORTANTE para facturas
+    valores_comunes = claves_erp['valores'] & claves_soporte['valores']
+    if valores_comunes:
+        puntuacion += 40 * len(valores_comunes)
+        if con_criterios:
+            criterios_cumplidos.append(f"Valores: {', '.join(map(str, sorted(valores_comunes)))}")
     
-    print(f"   • {archivo['nombre_archivo']}")
-    if info_linea:
-        print(f"     └─ {' | '.join(info_linea)}")
-
-print(f"\n📋 ANÁLISIS DE ARCHIVOS MUISKA:")
-for archivo in archivos_soporte:
-    info_linea = []
-    if archivo['fecha']:
-        info_linea.append(f"📅 {archivo['fecha']}")
-    if archivo['nombres_personas']:
-        info_linea.append(f"👤 {', '.join(archivo['nombres_personas'])}")
-    if archivo['valores']['valores_decimales']:
-        info_linea.append(f"💰 {', '.join(map(str, archivo['valores']['valores_decimales']))}")
-    if archivo['valores']['codigos']:
-        info_linea.append(f"🔢 {', '.join(archivo['valores']['codigos'])}")
+    # CRITERIO 3: Códigos importantes (4-6 dígitos)
+    codigos_comunes = claves_erp['codigos'] & claves_soporte['codigos']
+    if codigos_comunes:
+        puntuacion += 30 * len(codigos_comunes)
+        if con_criterios:
+            criterios_cumplidos.append(f"Códigos: {', '.join(sorted(codigos_comunes))}")
     
-    print(f"   • {archivo['nombre_archivo']}")
-    if info_linea:
-        print(f"     └─ {' | '.join(info_linea)}")
-
-# Encontrar coincidencias precisas
-print(f"\n🎯 BUSCANDO COINCIDENCIAS FLEXIBLES...")
-coincidencias = encontrar_coincidencias_precisas(archivos_erp, archivos_soporte)
-
-if coincidencias:
-    print(f"\n✅ COINCIDENCIAS ENCONTRADAS: {len(coincidencias)}")
-    for i, coincidencia in enumerate(coincidencias, 1):
-        print(f"\n{i}. EMPAREJAMIENTO (Puntuación: {coincidencia['puntuacion']})")
-        print(f"   📄 ERP: {coincidencia['archivo_erp']['nombre_archivo']}")
-        print(f"   📄 MUISKA: {coincidencia['archivo_soporte']['nombre_archivo']}")
-        print(f"   ✓ Criterios: {' | '.join(coincidencia['criterios'])}")
-else:
-    print(f"\n❌ NO SE ENCONTRARON COINCIDENCIAS VÁLIDAS")
-
-# Combinar archivos usando PyMuPDF
-combinados_exitosos = 0
-errores = 0
-
-if coincidencias:
-    print(f"\n🔄 COMBINANDO ARCHIVOS...")
-    for coincidencia in coincidencias:
-        archivo_erp = coincidencia['archivo_erp']
-        archivo_soporte = coincidencia['archivo_soporte']
-        
-        # Crear nombre de salida
-        nombre_base = os.path.splitext(archivo_erp['nombre_archivo'])[0]
-        nombre_salida = f"{nombre_base} - COMBINADO.pdf"
-        
-        ruta_salida = os.path.join(carpeta_combinados, nombre_salida)
-        
-        try:
-            # Combinar PDFs usando PyMuPDF
-            salida_pdf = fitz.open()
-            salida_pdf.insert_pdf(fitz.open(archivo_erp['ruta_completa']))
-            salida_pdf.insert_pdf(fitz.open(archivo_soporte['ruta_completa']))
-            
-            salida_pdf.save(ruta_salida)
-            salida_pdf.close()
-            
-            print(f"✅ {nombre_salida}")
-            combinados_exitosos += 1
-        except Exception as e:
-            print(f"❌ Error: {archivo_erp['nombre_archivo']} - {e}")
-            errores += 1
+    # CRITERIO 4: Nombres de personas (flexible - no obligatorio)
+    nombres_comunes = claves_erp['nombres'] & claves_soporte['nombres']
+    if nombres_comunes:
+        puntuacion += 35 * len(nombres_comunes)
+        if con_criterios:
+            criterios_cumplidos.append(f"Nombres: {', '.join(nombres_comunes)}")
+    
+    # CRITERIO 5: Otros valores numéricos
+    otros_comunes = claves_erp['otros'] & claves_soporte['otros']
+    if otros_comunes:
+        puntuacion += 15 * len(otros_comunes)
+        if con_criterios:
+            criterios_cumplidos.append(f"Otros valores: {', '.join(sorted(otros_comunes))}")
+    
+    return puntuacion, criterios_cumplidos
 
-# Mostrar archivos sin pareja y moverlos a carpeta FALTANTES
-archivos_erp_usados = set(c['indice_erp'] for c in coincidencias)
-archivos_soporte_usados = set(c['indice_soporte'] for c in coincidencias)
+# =====================================================
+# 🗂️ ÍNDICE INVERTIDO DE CANDIDATOS
+# =====================================================
+# Solo se puntúan los archivos de soporte que comparten con el ERP alguna
+# clave capaz de llevar el par a 40 puntos. Qué claves bastan depende de
+# las fechas (montos 40, nombres 35, códigos 30, otros números 15):
+#   - ambos con fecha: la misma fecha (50), o sin ella al menos 50 puntos
+#     más: un monto, un nombre, dos códigos o dos "otros" números
+#   - uno solo con fecha (20 de base): un monto, código o nombre, o dos otros
+#   - ninguno con fecha: un monto, código o nombre, o dos otros
+# Así un código presente en casi todos los nombres (el año "2025") no
+# convierte cada archivo en candidato de todos, y el resultado es idéntico
+# al de comparar contra todos.
+TIPOS_POR_CASO = {
+    # (ERP con fecha, soporte con fecha): tipos de clave a consultar
+    (True, True): ('fecha', 'valor', 'nombre', 'par_codigos', 'par_otros'),
+    (True, False): ('valor', 'codigo', 'nombre', 'par_otros'),
+    (False, True): ('valor', 'codigo', 'nombre', 'par_otros'),
+    (False, False): ('valor', 'codigo', 'nombre', 'par_otros'),
+}
+UMBRAL_PUNTUACION = 40  # Requiere al menos 40 puntos para ser considerado válido (más flexible)
 
-archivos_erp_sin_pareja = [archivos_erp[i] for i in range(len(archivos_erp)) if i not in archivos_erp_usados]
-archivos_soporte_sin_pareja = [archivos_soporte[i] for i in range(len(archivos_soporte)) if i not in archivos_soporte_usados]
+# Tablas de resultados de 1.ERP FC y 2. FC MUISKA (FUENTE_EMPAREJAMIENTO=tablas)
+TABLA_ERP = {
+    "patrones": ("ERP_Facturas_Resultados.xlsx",),
+    "monto": "Subtotal",
+    "fecha": "Fecha",
+    "nombre": "Proveedor",
+    "archivo": ("Archivo Renombrado",),
+}
+TABLA_SOPORTE = {
+    "patrones": ("resultado_*.xlsx", "resultado_*.csv"),
+    "monto": "Subtotal/Total",
+    "fecha": "Fecha",
+    "nombre": "Razón Social Proveedores",
+    "archivo": ("Archivo Renombrado", "Nombre del Archivo"),
+}
 
-# Mover archivos sin pareja a carpeta FALTANTES
-archivos_movidos = 0
+def encontrar_coincidencias_precisas(archivos_erp, archivos_soporte, modo=None):
+    """Encuentra coincidencias usando criterios flexibles para facturas.
+
+    En modo "voraz" (por defecto) cada ERP toma, en orden, el soporte libre
+    de mayor puntuación; en modo "optimo" se elige la asignación de mayor
+    puntuación total. En ambos solo se puntúan los candidatos del índice
+    invertido. El modo también sale de la variable MODO_EMPAREJAMIENTO.
+    """
+    claves_erp = [conjuntos_archivo(archivo) for archivo in archivos_erp]
+    claves_soporte = [conjuntos_archivo(archivo) for archivo in archivos_soporte]
+    parejas = emparejar(claves_erp, claves_soporte, puntuar_par, UMBRAL_PUNTUACION, TIPOS_POR_CASO, modo)
+
+    coincidencias = []
+    for i, j, _ in parejas:
+        # Los criterios se arman solo para las parejas elegidas
+        puntuacion, criterios_cumplidos = puntuar_par(claves_erp[i], claves_soporte[j])
+        coincidencias.append({
+            'archivo_erp': archivos_erp[i],
+            'archivo_soporte': archivos_soporte[j],
+            'puntuacion': puntuacion,
+            'criterios': criterios_cumplidos,
+            'indice_erp': i,
+            'indice_soporte': j
+        })
+    
+    return coincidencias
+
+# =====================================================
+# 🔌 PUNTO DE ENTRADA COMÚN (Flask / motor de ejecución)
+# =====================================================
+def run(folder):
+    """Empareja facturas ERP con documentos MUISKA y combina cada pareja en un PDF"""
+    # Crear subcarpetas para organización del procesamiento
+    carpeta_erp = os.path.join(folder, "ERP_FACTURAS")
+    carpeta_documentos_soporte = os.path.join(folder, "MUISKA_FACTURAS")
+    carpeta_combinados = os.path.join(folder, "FC_EMPRESA")
+    carpeta_faltantes = os.path.join(folder, "FALTANTES")
+
+    # Crear todas las carpetas si no existen (solo afecta localmente)
+    for carpeta in [carpeta_erp, carpeta_documentos_soporte, carpeta_combinados, carpeta_faltantes]:
+        os.makedirs(carpeta, exist_ok=True)
+
+    # =====================================================
+    # 🧾 VERIFICAR LAS RUTAS CONFIGURADAS
+    # =====================================================
+    print("📁 RUTAS CONFIGURADAS:")
+    print(f"🧾 ERP Facturas:            {carpeta_erp}")
+    print(f"📄 Documentos de Soporte:   {carpeta_documentos_soporte}")
+    print(f"🏢 FC Empresa Combinados:   {carpeta_combinados}")
+    print(f"⚠️  Archivos Faltantes:     {carpeta_faltantes}")
+
+    # Procesar archivos de ambas carpetas
+    print("🔍 PROCESANDO ARCHIVOS FACTURAS...")
+
+    archivos_erp = []
+    for archivo in os.listdir(carpeta_erp):
+        if archivo.lower().endswith('.pdf'):
+            ruta_completa = os.path.join(carpeta_erp, archivo)
+            info = procesar_archivo(archivo, ruta_completa)
+            archivos_erp.append(info)
+
+    archivos_soporte = []
+    for archivo in os.listdir(carpeta_documentos_soporte):
+        if archivo.lower().endswith('.pdf'):
+            ruta_completa = os.path.join(carpeta_documentos_soporte, archivo)
+            info = procesar_archivo(archivo, ruta_completa)
+            archivos_soporte.append(info)
+
+    print(f"📁 Archivos ERP: {len(archivos_erp)} | Archivos MUISKA: {len(archivos_soporte)}")
+
+    # Mostrar información extraída de forma organizada
+    print(f"\n📋 ANÁLISIS DE ARCHIVOS ERP:")
+    for archivo in archivos_erp:
+        info_linea = []
+        if archivo['fecha']:
+            info_linea.append(f"📅 {archivo['fecha']}")
+        if archivo['nombres_personas']:
+            info_linea.append(f"👤 {', '.join(archivo['nombres_personas'])}")
+        if archivo['valores']['valores_decimales']:
+            info_linea.append(f"💰 {', '.join(map(str, archivo['valores']['valores_decimales']))}")
+        if archivo['valores']['codigos']:
+            info_linea.append(f"🔢 {', '.join(archivo['valores']['codigos'])}")
 
-if archivos_erp_sin_pareja:
-    print(f"\n⚠️ ARCHIVOS ERP SIN PAREJA ({len(archivos_erp_sin_pareja)}):")
-    for archivo in archivos_erp_sin_pareja:
         print(f"   • {archivo['nombre_archivo']}")
-        try:
-            destino = os.path.join(carpeta_faltantes, archivo['nombre_archivo'])
-            shutil.copy2(archivo['ruta_completa'], destino)
-            archivos_movidos += 1
-        except Exception as e:
-            print(f"     ❌ Error moviendo: {e}")
-
-if archivos_soporte_sin_pareja:
-    print(f"\n⚠️ ARCHIVOS MUISKA SIN PAREJA ({len(archivos_soporte_sin_pareja)}):")
-    for archivo in archivos_soporte_sin_pareja:
+        if info_linea:
+            print(f"     └─ {' | '.join(info_linea)}")
+
+    print(f"\n📋 ANÁLISIS DE ARCHIVOS MUISKA:")
+    for archivo in archivos_soporte:
+        info_linea = []
+        if archivo['fecha']:
+            info_linea.append(f"📅 {archivo['fecha']}")
+        if archivo['nombres_personas']:
+            info_linea.append(f"👤 {', '.join(archivo['nombres_personas'])}")
+        if archivo['valores']['valores_decimales']:
+            info_linea.append(f"💰 {', '.join(map(str, archivo['valores']['valores_decimales']))}")
+        if archivo['valores']['codigos']:
+            info_linea.append(f"🔢 {', '.join(archivo['valores']['codigos'])}")
+
         print(f"   • {archivo['nombre_archivo']}")
-        try:
-            destino = os.path.join(carpeta_faltantes, archivo['nombre_archivo'])
-            shutil.copy2(archivo['ruta_completa'], destino)
-            archivos_movidos += 1
-        except Exception as e:
-            print(f"     ❌ Error moviendo: {e}")
-
-if archivos_movidos > 0:
-    print(f"\n📁 Se movieron {archivos_movidos} archivos sin pareja a FALTANTES")
-
-print(f"\n🎉 RESUMEN:")
-print(f"   ✅ Combinados: {combinados_exitosos}")
-print(f"   ❌ Errores: {errores}")
-print(f"   📊 Tasa de éxito: {combinados_exitosos}/{len(archivos_erp)} archivos ERP")
-
-# Abrir carpeta si se crearon archivos
-if combinados_exitosos > 0:
-    print(f"\n🚀 Abriendo carpeta de resultados...")
-    os.startfile(carpeta_combinados)
-
-print("\n🔍 Proceso finalizado.")
\ No newline at end of file
+        if info_linea:
+            print(f"     └─ {' | '.join(info_linea)}")
+
+    # Encontrar coincidencias precisas
+    modo = modo_configurado()
+    fuente = fuente_configurada()
+    print(f"\n🎯 BUSCANDO COINCIDENCIAS FLEXIBLES (modo {modo}, fuente {fuente})...")
+    if fuente == FUENTE_TABLAS:
+        # Campos de las tablas de resultados; los sobrantes, por nombre de archivo
+        tabla_erp = cargar_tabla(carpetas_tabla(folder, carpeta_erp, "1_ERP_FC"), TABLA_ERP, "ERP")
+        tabla_soporte = cargar_tabla(carpetas_tabla(folder, carpeta_documentos_soporte, "2__FC_MUISKA"), TABLA_SOPORTE, "MUISKA")
+        coincidencias, origen = emparejar_con_tablas(
+            archivos_erp, archivos_soporte, (tabla_erp, TABLA_ERP), (tabla_soporte, TABLA_SOPORTE),
+            lambda erp, soporte: encontrar_coincidencias_precisas(erp, soporte, modo),
+        )
+        print(f"📊 Parejas por tabla: {origen['por_tabla']} | por nombre de archivo: {origen['por_nombre']}")
+    else:
+        coincidencias = encontrar_coincidencias_precisas(archivos_erp, archivos_soporte, modo)
+
+    if coincidencias:
+        puntuacion_total = sum(c['puntuacion'] for c in coincidencias)
+        print(f"\n✅ COINCIDENCIAS ENCONTRADAS: {len(coincidencias)} (puntuación total: {puntuacion_total})")
+        for i, coincidencia in enumerate(coincidencias, 1):
+            print(f"\n{i}. EMPAREJAMIENTO (Puntuación: {coincidencia['puntuacion']})")
+            print(f"   📄 ERP: {coincidencia['archivo_erp']['nombre_archivo']}")
+            print(f"   📄 MUISKA: {coincidencia['archivo_soporte']['nombre_archivo']}")
+            print(f"   ✓ Criterios: {' | '.join(coincidencia['criterios'])}")
+    else:
+        print(f"\n❌ NO SE ENCONTRARON COINCIDENCIAS VÁLIDAS")
+
+    # Combinar archivos en paralelo (PyMuPDF, cada documento se cierra al terminar)
+    combinados_exitosos = 0
+    errores = 0
+    archivos_generados = []
+    lote = None
+
+    if coincidencias:
+        print(f"\n🔄 COMBINANDO ARCHIVOS...")
+        tareas = []
+        for coincidencia in coincidencias:
+            archivo_erp = coincidencia['archivo_erp']
+            archivo_soporte = coincidencia['archivo_soporte']
+
+            # Crear nombre de salida
+            nombre_base = os.path.splitext(archivo_erp['nombre_archivo'])[0]
+            nombre_salida = f"{nombre_base} - COMBINADO.pdf"
+
+            ruta_salida = os.path.join(carpeta_combinados, nombre_salida)
+            tareas.append((archivo_erp['ruta_completa'], archivo_soporte['ruta_completa'], ruta_salida))
+
+        lote = combinar_pares(tareas)
+        for coincidencia, resultado in zip(coincidencias, lote["resultados"]):
+            if resultado["error"]:
+                print(f"❌ Error: {coincidencia['archivo_erp']['nombre_archivo']} - {resultado['error']}")
+                errores += 1
+            else:
+                print(f"✅ {os.path.basename(resultado['ruta_salida'])}")
+                archivos_generados.append(resultado["ruta_salida"])
+                combinados_exitosos += 1
+        print(f"📎 Combinación: {resumen_combinacion(lote)}")
+
+    # Mostrar archivos sin pareja y moverlos a carpeta FALTANTES
+    archivos_erp_usados = set(c['indice_erp'] for c in coincidencias)
+    archivos_soporte_usados = set(c['indice_soporte'] for c in coincidencias)
+
+    archivos_erp_sin_pareja = [archivos_erp[i] for i in range(len(archivos_erp)) if i not in archivos_erp_usados]
+    archivos_soporte_sin_pareja = [archivos_soporte[i] for i in range(len(archivos_soporte)) if i not in archivos_soporte_usados]
+
+    # Mover archivos sin pareja a carpeta FALTANTES
+    archivos_movidos = 0
+
+    if archivos_erp_sin_pareja:
+        print(f"\n⚠️ ARCHIVOS ERP SIN PAREJA ({len(archivos_erp_sin_pareja)}):")
+        for archivo in archivos_erp_sin_pareja:
+            print(f"   • {archivo['nombre_archivo']}")
+            try:
+                destino = os.path.join(carpeta_faltantes, archivo['nombre_archivo'])
+                with escritura_atomica(destino) as temporal:
+                    shutil.copy2(archivo['ruta_completa'], temporal)
+                archivos_movidos += 1
+            except Exception as e:
+                print(f"     ❌ Error moviendo: {e}")
+
+    if archivos_soporte_sin_pareja:
+        print(f"\n⚠️ ARCHIVOS MUISKA SIN PAREJA ({len(archivos_soporte_sin_pareja)}):")
+        for archivo in archivos_soporte_sin_pareja:
+            print(f"   • {archivo['nombre_archivo']}")
+            try:
+                destino = os.path.join(carpeta_faltantes, archivo['nombre_archivo'])
+                with escritura_atomica(destino) as temporal:
+                    shutil.copy2(archivo['ruta_completa'], temporal)
+                archivos_movidos += 1
+            except Exception as e:
+                print(f"     ❌ Error moviendo: {e}")
+
+    if archivos_movidos > 0:
+        print(f"\n📁 Se movieron {archivos_movidos} archivos sin pareja a FALTANTES")
+
+    print(f"\n🎉 RESUMEN:")
+    print(f"   ✅ Combinados: {combinados_exitosos}")
+    print(f"   ❌ Errores: {errores}")
+    print(f"   📊 Tasa de éxito: {combinados_exitosos}/{len(archivos_erp)} archivos ERP")
+
+    print("\n🔍 Proceso finalizado.")
+
+    return {
+        "carpeta": carpeta_combinados,
+        "archivos_generados": archivos_generados,
+        "combinados": combinados_exitosos,
+        "errores": errores,
+        "faltantes": archivos_movidos,
+        "mb_por_segundo": round(lote["mb_por_segundo"], 2) if lote else 0.0,
+        "memoria_pico_mb": lote["memoria_pico_mb"] if lote else None,
+    }
+
+if __name__ == "__main__":
+    # Carpeta base dinámica (argumento desde Flask, variable de entorno o /tmp)
+    if len(sys.argv) > 1:
+        BASE_FOLDER = sys.argv[1]
+    else:
+        BASE_FOLDER = os.environ.get("UPLOAD_FOLDER", "/tmp")
+
+    resumen = run(BASE_FOLDER)
+
+    # Abrir carpeta si se crearon archivos
+    if resumen["combinados"] > 0 and os.name == "nt":
+        print(f"\n🚀 Abriendo carpeta de resultados...")
+        os.startfile(resumen["carpeta"])
@@ -1,16 +1,10 @@
 import os
-import PyPDF2
+import sys
 import re
-from app import BASE_PATHS  # si está dentro del mismo repo
-import os
-
-# Usar las rutas dinámicas centralizadas
-carpeta_erp = os.path.join(BASE_PATHS["DIGITALIZACION"], "1.1 ERP COMPROBANTE DE EGRESO")
-carpeta_documentos_soporte = os.path.join(BASE_PATHS["DIGITALIZACION"], "2.1 BANCO DESPRENDIBLES")
-carpeta_combinados = os.path.join(BASE_PATHS["DIGITALIZACION"], "3 CE EMPRESA")
 
-# Crear la carpeta de salida si no existe
-os.makedirs(carpeta_combinados, exist_ok=True)
+from comun.combinar_pdf import combinar_pares, resumen_combinacion
+from comun.emparejamiento import emparejar, modo_configurado
+from comun.tablas import FUENTE_TABLAS, cargar_tabla, carpetas_tabla, emparejar_con_tablas, fuente_configurada
 
 def extraer_fecha(nombre):
     """Extrae la fecha en formato YYYY-MM-DD del nombre del archivo"""
@@ -71,214 +65,278 @@ def procesar_archivo(nombre_archivo, ruta_completa):
         'nombres_personas': extraer_nombres_persona(nombre_archivo)
     }
 
-def encontrar_coincidencias_precisas(archivos_erp, archivos_soporte):
-    """Encuentra coincidencias usando criterios precisos"""
-    coincidencias = []
-    indices_soporte_usados = set()
+def conjuntos_archivo(archivo):
+    """Claves de comparación de un archivo, como conjuntos armados una sola vez"""
+    return {
+        'fecha': archivo['fecha'],
+        'codigos': set(archivo['valores']['codigos']),
+        'otros': set(archivo['valores']['otros']),
+        'nombres': set(archivo['nombres_personas']),
+    }
+
+def puntuar_par(claves_erp, claves_soporte, con_criterios=True):
+    """Puntuación y criterios cumplidos por un par ERP / soporte.
+
+    Si ambos tienen fecha y no coinciden, el par se descarta con puntuación 0.
+    Con con_criterios=False no se arman los textos de criterios.
+    """
+    puntuacion = 0
+    criterios_cumplidos = []
     
-    for i, archivo_erp in enumerate(archivos_erp):
-        mejor_coincidencia = None
-        mejor_puntuacion = 0
-        mejor_criterios = []
-        
-        for j, archivo_soporte in enumerate(archivos_soporte):
-            if j in indices_soporte_usados:  # Ya fue usado
-                continue
-                
-            puntuacion = 0
-            criterios_cumplidos = []
-            
-            # CRITERIO 1: Fecha exacta (obligatorio si ambos tienen fecha)
-            fecha_coincide = True
-            if archivo_erp['fecha'] and archivo_soporte['fecha']:
-                if archivo_erp['fecha'] == archivo_soporte['fecha']:
-                    puntuacion += 50
-                    criterios_cumplidos.append(f"Fecha: {archivo_erp['fecha']}")
-                else:
-                    fecha_coincide = False  # Si ambos tienen fecha y no coinciden, descartar
-            elif archivo_erp['fecha'] or archivo_soporte['fecha']:
-                # Solo uno tiene fecha, dar puntos menores
-                fecha_disponible = archivo_erp['fecha'] or archivo_soporte['fecha']
-                puntuacion += 20
-                criterios_cumplidos.append(f"Fecha disponible: {fecha_disponible}")
-            
-            if not fecha_coincide:
-                continue  # Descartar si las fechas no coinciden
-            
-            # CRITERIO 2: Códigos importantes (4-6 dígitos)
-            codigos_erp = set(archivo_erp['valores']['codigos'])
-            codigos_soporte = set(archivo_soporte['valores']['codigos'])
-            codigos_comunes = codigos_erp & codigos_soporte
-            
-            if codigos_comunes:
-                puntuacion += 40 * len(codigos_comunes)
-                criterios_cumplidos.append(f"Códigos: {', '.join(sorted(codigos_comunes))}")
-            
-            # CRITERIO 3: Otros valores numéricos
-            otros_erp = set(archivo_erp['valores']['otros'])
-            otros_soporte = set(archivo_soporte['valores']['otros'])
-            otros_comunes = otros_erp & otros_soporte
-            
-            if otros_comunes:
-                puntuacion += 10 * len(otros_comunes)
-                criterios_cumplidos.append(f"Otros valores: {', '.join(sorted(otros_comunes))}")
-            
-            # CRITERIO 4: Nombres de personas (coincidencia exacta)
-            nombres_erp = set(archivo_erp['nombres_personas'])
-            nombres_soporte = set(archivo_soporte['nombres_personas'])
-            nombres_comunes = nombres_erp & nombres_soporte
-            
-            if nombres_comunes:
-                puntuacion += 30 * len(nombres_comunes)
-                criterios_cumplidos.append(f"Nombres: {', '.join(nombres_comunes)}")
-            
-            # Requiere al menos 60 puntos para ser considerado válido
-            if puntuacion >= 60 and puntuacion > mejor_puntuacion:
-                mejor_puntuacion = puntuacion
-                mejor_coincidencia = {
-                    'archivo_soporte': archivo_soporte,
-                    'puntuacion': puntuacion,
-                    'criterios': criterios_cumplidos,
-                    'indice_soporte': j
-                }
-        
-        if mejor_coincidencia:
-            coincidencias.append({
-                'archivo_erp': archivo_erp,
-                'archivo_soporte': mejor_coincidencia['archivo_soporte'],
-                'puntuacion': mejor_coincidencia['puntuacion'],
-                'criterios': mejor_coincidencia['criterios'],
-                'indice_erp': i,
-                'indice_soporte': mejor_coincidencia['indice_soporte']
-            })
-            indices_soporte_usados.add(mejor_coincidencia['indice_soporte'])
+    # CRITERIO 1: Fecha exacta (obligatorio si ambos tienen fecha)
+    if claves_erp['fecha'] and claves_soporte['fecha']:
+        if claves_erp['fecha'] != claves_soporte['fecha']:
+            return 0, []  # Si ambos tienen fecha y no coinciden, descartar
+        puntuacion += 50
+        if con_criterios:
+            criterios_cumplidos.append(f"Fecha: {claves_erp['fecha']}")
+    elif claves_erp['fecha'] or claves_soporte['fecha']:
+        # Solo uno tiene fecha, dar puntos menores
+        fecha_disponible = claves_erp['fecha'] or claves_soporte['fecha']
+        puntuacion += 20
+        if con_criterios:
+            criterios_cumplidos.append(f"Fecha disponible: {fecha_disponible}")
     
-    return coincidencias
-
-# Procesar archivos de ambas carpetas
-print("🔍 PROCESANDO ARCHIVOS...")
-
-archivos_erp = []
-for archivo in os.listdir(carpeta_erp):
-    if archivo.lower().endswith('.pdf'):
-        ruta_completa = os.path.join(carpeta_erp, archivo)
-        info = procesar_archivo(archivo, ruta_completa)
-        archivos_erp.append(info)
-
-archivos_soporte = []
-for archivo in os.listdir(carpeta_documentos_soporte):
-    if archivo.lower().endswith('.pdf'):
-        ruta_completa = os.path.join(carpeta_documentos_soporte, archivo)
-        info = procesar_archivo(archivo, ruta_completa)
-        archivos_soporte.append(info)
-
-print(f"📁 Archivos ERP: {len(archivos_erp)} | Archivos Soporte: {len(archivos_soporte)}")
-
-# Mostrar información extraída de forma organizada
-print(f"\n📋 ANÁLISIS DE ARCHIVOS ERP:")
-for archivo in archivos_erp:
-    info_linea = []
-    if archivo['fecha']:
-        info_linea.append(f"📅 {archivo['fecha']}")
-    if archivo['valores']['codigos']:
-        info_linea.append(f"🔢 {', '.join(archivo['valores']['codigos'])}")
-    if archivo['nombres_personas']:
-        info_linea.append(f"👤 {', '.join(archivo['nombres_personas'])}")
+    # CRITERIO 2: Códigos importantes (4-6 dígitos)
+    codigos_comunes = claves_erp['codigos'] & claves_soporte['codigos']
+    if codigos_comunes:
+        puntuacion += 40 * len(codigos_comunes)
+        if con_criterios:
+            criterios_cumplidos.append(f"Códigos: {', '.join(sorted(codigos_comunes))}")
     
-    print(f"   • {archivo['nombre_archivo']}")
-    if info_linea:
-        print(f"     └─ {' | '.join(info_linea)}")
-
-print(f"\n📋 ANÁLISIS DE ARCHIVOS SOPORTE:")
-for archivo in archivos_soporte:
-    info_linea = []
-    if archivo['fecha']:
-        info_linea.append(f"📅 {archivo['fecha']}")
-    if archivo['valores']['codigos']:
-        info_linea.append(f"🔢 {', '.join(archivo['valores']['codigos'])}")
-    if archivo['nombres_personas']:
-        info_linea.append(f"👤 {', '.join(archivo['nombres_personas'])}")
+    # CRITERIO 3: Otros valores numéricos
+    otros_comunes = claves_erp['otros'] & claves_soporte['otros']
+    if otros_comunes:
+        puntuacion += 10 * len(otros_comunes)
+        if con_criterios:
+            criterios_cumplidos.append(f"Otros valores: {', '.join(sorted(otros_comunes))}")
     
-    print(f"   • {archivo['nombre_archivo']}")
-    if info_linea:
-        print(f"     └─ {' | '.join(info_linea)}")
-
-# Encontrar coincidencias precisas
-print(f"\n🎯 BUSCANDO COINCIDENCIAS PRECISAS...")
-coincidencias = encontrar_coincidencias_precisas(archivos_erp, archivos_soporte)
-
-if coincidencias:
-    print(f"\n✅ COINCIDENCIAS ENCONTRADAS: {len(coincidencias)}")
-    for i, coincidencia in enumerate(coincidencias, 1):
-        print(f"\n{i}. EMPAREJAMIENTO (Puntuación: {coincidencia['puntuacion']})")
-        print(f"   📄 ERP: {coincidencia['archivo_erp']['nombre_archivo']}")
-        print(f"   📄 Soporte: {coincidencia['archivo_soporte']['nombre_archivo']}")
-        print(f"   ✓ Criterios: {' | '.join(coincidencia['criterios'])}")
-else:
-    print(f"\n❌ NO SE ENCONTRARON COINCIDENCIAS VÁLIDAS")
-
-# Combinar archivos
-combinados_exitosos = 0
-errores = 0
-
-if coincidencias:
-    print(f"\n🔄 COMBINANDO ARCHIVOS...")
-    for coincidencia in coincidencias:
-        archivo_erp = coincidencia['archivo_erp']
-        archivo_soporte = coincidencia['archivo_soporte']
-        
-        # Crear nombre de salida usando la fecha del soporte (prioritaria) o del ERP
-        fecha_para_nombre = archivo_soporte['fecha'] or archivo_erp['fecha']
-        nombre_base = archivo_erp['nombre_archivo'][:-4]  # Quitar .pdf
-        
-        if fecha_para_nombre:
-            nombre_salida = f"{nombre_base}-{fecha_para_nombre}.pdf"
-        else:
-            nombre_salida = f"{nombre_base}-COMBINADO.pdf"
-        
-        ruta_salida = os.path.join(carpeta_combinados, nombre_salida)
-        
-        try:
-            # Crear el PDF combinado
-            pdf_merger = PyPDF2.PdfMerger()
-            pdf_merger.append(archivo_erp['ruta_completa'])
-            pdf_merger.append(archivo_soporte['ruta_completa'])
-            pdf_merger.write(ruta_salida)
-            pdf_merger.close()
-            
-            print(f"✅ {nombre_salida}")
-            combinados_exitosos += 1
-        except Exception as e:
-            print(f"❌ Error: {archivo_erp['nombre_archivo']} - {e}")
-            errores += 1
-
-# Mostrar archivos sin pareja
-archivos_erp_usados = set(c['indice_erp'] for c in coincidencias)
-archivos_soporte_usados = set(c['indice_soporte'] for c in coincidencias)
-
-archivos_erp_sin_pareja = [archivos_erp[i] for i in range(len(archivos_erp)) if i not in archivos_erp_usados]
-archivos_soporte_sin_pareja = [archivos_soporte[i] for i in range(len(archivos_soporte)) if i not in archivos_soporte_usados]
-
-if archivos_erp_sin_pareja:
-    print(f"\n⚠️ ARCHIVOS ERP SIN PAREJA ({len(archivos_erp_sin_pareja)}):")
-    for archivo in archivos_erp_sin_pareja:
+    # CRITERIO 4: Nombres de personas (coincidencia exacta)
+    nombres_comunes = claves_erp['nombres'] & claves_soporte['nombres']
+    if nombres_comunes:
+        puntuacion += 30 * len(nombres_comunes)
+        if con_criterios:
+            criterios_cumplidos.append(f"Nombres: {', '.join(nombres_comunes)}")
+    
+    return puntuacion, criterios_cumplidos
+
+# Solo se puntúan los soportes que comparten con el ERP alguna clave capaz
+# de llevar el par a 60 puntos (códigos 40, nombres 30, otros números 10):
+#   - ambos con fecha: tiene que ser la misma (si no, el par se descarta)
+#   - uno solo con fecha (20 de base): un código o nombre, o dos otros
+#   - ninguno con fecha: dos códigos, un nombre, o dos otros
+TIPOS_POR_CASO = {
+    # (ERP con fecha, soporte con fecha): tipos de clave a consultar
+    (True, True): ('fecha',),
+    (True, False): ('codigo', 'nombre', 'par_otros'),
+    (False, True): ('codigo', 'nombre', 'par_otros'),
+    (False, False): ('par_codigos', 'nombre', 'par_otros'),
+}
+UMBRAL_PUNTUACION = 60  # Requiere al menos 60 puntos para ser considerado válido
+
+# Tablas de resultados de 4.CE ERP CONTABLE y 3.CE DESPRENDIBLES (FUENTE_EMPAREJAMIENTO=tablas)
+TABLA_ERP = {
+    "patrones": ("ERP_Com_Egreso.xlsx",),
+    "monto": "Total",
+    "fecha": "Fecha Documento",
+    "nombre": "Beneficiario",
+    "archivo": ("Archivo Renombrado", "Nombre Archivo"),
+}
+TABLA_SOPORTE = {
+    "patrones": ("Bancos_Pagos_CE.xlsx",),
+    "monto": "Valor a Pagar",
+    "fecha": "Fecha de Pago",
+    "nombre": "Beneficiario",
+    "archivo": ("Archivo Renombrado", "Nombre Archivo"),
+}
+
+def encontrar_coincidencias_precisas(archivos_erp, archivos_soporte, modo=None):
+    """Encuentra coincidencias usando criterios precisos.
+
+    En modo "voraz" (por defecto) cada ERP toma, en orden, el soporte libre
+    de mayor puntuación; en modo "optimo" se elige la asignación de mayor
+    puntuación total (variable MODO_EMPAREJAMIENTO).
+    """
+    claves_erp = [conjuntos_archivo(archivo) for archivo in archivos_erp]
+    claves_soporte = [conjuntos_archivo(archivo) for archivo in archivos_soporte]
+    parejas = emparejar(claves_erp, claves_soporte, puntuar_par, UMBRAL_PUNTUACION, TIPOS_POR_CASO, modo)
+
+    coincidencias = []
+    for i, j, _ in parejas:
+        puntuacion, criterios_cumplidos = puntuar_par(claves_erp[i], claves_soporte[j])
+        coincidencias.append({
+            'archivo_erp': archivos_erp[i],
+            'archivo_soporte': archivos_soporte[j],
+            'puntuacion': puntuacion,
+            'criterios': criterios_cumplidos,
+            'indice_erp': i,
+            'indice_soporte': j
+        })
+    
+    return coincidencias
+
+# 🔌 PUNTO DE ENTRADA COMÚN (Flask / motor de ejecución)
+def run(folder):
+    """Empareja comprobantes de egreso ERP con desprendibles y combina cada pareja"""
+    # Carpetas de entrada (salidas de los procesos 3 y 4) y de salida
+    carpeta_erp = os.path.join(folder, "ERP_COMPROBANTE_EGRESO")
+    carpeta_documentos_soporte = os.path.join(folder, "BANCO_DESPRENDIBLES")
+    carpeta_combinados = os.path.join(folder, "CE_EMPRESA")
+
+    # Crear las carpetas si no existen
+    for carpeta in [carpeta_erp, carpeta_documentos_soporte, carpeta_combinados]:
+        os.makedirs(carpeta, exist_ok=True)
+
+    # Procesar archivos de ambas carpetas
+    print("🔍 PROCESANDO ARCHIVOS...")
+
+    archivos_erp = []
+    for archivo in os.listdir(carpeta_erp):
+        if archivo.lower().endswith('.pdf'):
+            ruta_completa = os.path.join(carpeta_erp, archivo)
+            info = procesar_archivo(archivo, ruta_completa)
+            archivos_erp.append(info)
+
+    archivos_soporte = []
+    for archivo in os.listdir(carpeta_documentos_soporte):
+        if archivo.lower().endswith('.pdf'):
+            ruta_completa = os.path.join(carpeta_documentos_soporte, archivo)
+            info = procesar_archivo(archivo, ruta_completa)
+            archivos_soporte.append(info)
+
+    print(f"📁 Archivos ERP: {len(archivos_erp)} | Archivos Soporte: {len(archivos_soporte)}")
+
+    # Mostrar información extraída de forma organizada
+    print(f"\n📋 ANÁLISIS DE ARCHIVOS ERP:")
+    for archivo in archivos_erp:
+        info_linea = []
+        if archivo['fecha']:
+            info_linea.append(f"📅 {archivo['fecha']}")
+        if archivo['valores']['codigos']:
+            info_linea.append(f"🔢 {', '.join(archivo['valores']['codigos'])}")
+        if archivo['nombres_personas']:
+            info_linea.append(f"👤 {', '.join(archivo['nombres_personas'])}")
+
         print(f"   • {archivo['nombre_archivo']}")
+        if info_linea:
+            print(f"     └─ {' | '.join(info_linea)}")
+
+    print(f"\n📋 ANÁLISIS DE ARCHIVOS SOPORTE:")
+    for archivo in archivos_soporte:
+        info_linea = []
+        if archivo['fecha']:
+            info_linea.append(f"📅 {archivo['fecha']}")
+        if archivo['valores']['codigos']:
+            info_linea.append(f"🔢 {', '.join(archivo['valores']['codigos'])}")
+        if archivo['nombres_personas']:
+            info_linea.append(f"👤 {', '.join(archivo['nombres_personas'])}")
 
-if archivos_soporte_sin_pareja:
-    print(f"\n⚠️ ARCHIVOS SOPORTE SIN PAREJA ({len(archivos_soporte_sin_pareja)}):")
-    for archivo in archivos_soporte_sin_pareja:
         print(f"   • {archivo['nombre_archivo']}")
+        if info_linea:
+            print(f"     └─ {' | '.join(info_linea)}")
+
+    # Encontrar coincidencias precisas
+    modo = modo_configurado()
+    fuente = fuente_configurada()
+    print(f"\n🎯 BUSCANDO COINCIDENCIAS PRECISAS (modo {modo}, fuente {fuente})...")
+    if fuente == FUENTE_TABLAS:
+        # Campos de las tablas de resultados; los sobrantes, por nombre de archivo
+        tabla_erp = cargar_tabla(carpetas_tabla(folder, carpeta_erp, "4_CE_ERP_CONTABLE"), TABLA_ERP, "ERP")
+        tabla_soporte = cargar_tabla(carpetas_tabla(folder, carpeta_documentos_soporte, "3_CE_DESPRENDIBLES"), TABLA_SOPORTE, "Soporte")
+        coincidencias, origen = emparejar_con_tablas(
+            archivos_erp, archivos_soporte, (tabla_erp, TABLA_ERP), (tabla_soporte, TABLA_SOPORTE),
+            lambda erp, soporte: encontrar_coincidencias_precisas(erp, soporte, modo),
+        )
+        print(f"📊 Parejas por tabla: {origen['por_tabla']} | por nombre de archivo: {origen['por_nombre']}")
+    else:
+        coincidencias = encontrar_coincidencias_precisas(archivos_erp, archivos_soporte, modo)
 
-print(f"\n🎉 RESUMEN:")
-print(f"   ✅ Combinados: {combinados_exitosos}")
-print(f"   ❌ Errores: {errores}")
-print(f"   📊 Tasa de éxito: {combinados_exitosos}/{len(archivos_erp)} archivos ERP")
+    if coincidencias:
+        puntuacion_total = sum(c['puntuacion'] for c in coincidencias)
+        print(f"\n✅ COINCIDENCIAS ENCONTRADAS: {len(coincidencias)} (puntuación total: {puntuacion_total})")
+        for i, coincidencia in enumerate(coincidencias, 1):
+            print(f"\n{i}. EMPAREJAMIENTO (Puntuación: {coincidencia['puntuacion']})")
+            print(f"   📄 ERP: {coincidencia['archivo_erp']['nombre_archivo']}")
+            print(f"   📄 Soporte: {coincidencia['archivo_soporte']['nombre_archivo']}")
+            print(f"   ✓ Criterios: {' | '.join(coincidencia['criterios'])}")
+    else:
+        print(f"\n❌ NO SE ENCONTRARON COINCIDENCIAS VÁLIDAS")
 
-# Ruta de la carpeta con los archivos combinados
-carpeta_combinados = os.path.join(os.getenv('USERPROFILE'), r"OneDrive\2 PROYECTOS TECNOLOGIA\2 AUTOMAIZACION TECNOLOGIA\2.RESULTADOS\1.DIGITALIZACION\3 CE EMPRESA")
+    # Combinar archivos en paralelo con el motor compartido (PyMuPDF)
+    combinados_exitosos = 0
+    errores = 0
+    archivos_generados = []
+    lote = None
+
+    if coincidencias:
+        print(f"\n🔄 COMBINANDO ARCHIVOS...")
+        tareas = []
+        for coincidencia in coincidencias:
+            archivo_erp = coincidencia['archivo_erp']
+            archivo_soporte = coincidencia['archivo_soporte']
+
+            # Crear nombre de salida usando la fecha del soporte (prioritaria) o del ERP
+            fecha_para_nombre = archivo_soporte['fecha'] or archivo_erp['fecha']
+            nombre_base = archivo_erp['nombre_archivo'][:-4]  # Quitar .pdf
+
+            if fecha_para_nombre:
+                nombre_salida = f"{nombre_base}-{fecha_para_nombre}.pdf"
+            else:
+                nombre_salida = f"{nombre_base}-COMBINADO.pdf"
+
+            ruta_salida = os.path.join(carpeta_combinados, nombre_salida)
+            tareas.append((archivo_erp['ruta_completa'], archivo_soporte['ruta_completa'], ruta_salida))
+
+        lote = combinar_pares(tareas)
+        for coincidencia, resultado in zip(coincidencias, lote["resultados"]):
+            if resultado["error"]:
+                print(f"❌ Error: {coincidencia['archivo_erp']['nombre_archivo']} - {resultado['error']}")
+                errores += 1
+            else:
+                print(f"✅ {os.path.basename(resultado['ruta_salida'])}")
+                archivos_generados.append(resultado["ruta_salida"])
+                combinados_exitosos += 1
+        print(f"📎 Combinación: {resumen_combinacion(lote)}")
+
+    # Mostrar archivos sin pareja
+    archivos_erp_usados = set(c['indice_erp'] for c in coincidencias)
+    archivos_soporte_usados = set(c['indice_soporte'] for c in coincidencias)
+
+    archivos_erp_sin_pareja = [archivos_erp[i] for i in range(len(archivos_erp)) if i not in archivos_erp_usados]
+    archivos_soporte_sin_pareja = [archivos_soporte[i] for i in range(len(archivos_soporte)) if i not in archivos_soporte_usados]
+
+    if archivos_erp_sin_pareja:
+        print(f"\n⚠️ ARCHIVOS ERP SIN PAREJA ({len(archivos_erp_sin_pareja)}):")
+        for archivo in archivos_erp_sin_pareja:
+            print(f"   • {archivo['nombre_archivo']}")
+
+    if archivos_soporte_sin_pareja:
+        print(f"\n⚠️ ARCHIVOS SOPORTE SIN PAREJA ({len(archivos_soporte_sin_pareja)}):")
+        for archivo in archivos_soporte_sin_pareja:
+            print(f"   • {archivo['nombre_archivo']}")
+
+    print(f"\n🎉 RESUMEN:")
+    print(f"   ✅ Combinados: {combinados_exitosos}")
+    print(f"   ❌ Errores: {errores}")
+    print(f"   📊 Tasa de éxito: {combinados_exitosos}/{len(archivos_erp)} archivos ERP")
+
+    return {
+        "carpeta": carpeta_combinados,
+        "archivos_generados": archivos_generados,
+        "combinados": combinados_exitosos,
+        "errores": errores,
+        "mb_por_segundo": round(lote["mb_por_segundo"], 2) if lote else 0.0,
+        "memoria_pico_mb": lote["memoria_pico_mb"] if lote else None,
+    }
 
-# Crear la carpeta si no existe
-if not os.path.exists(carpeta_combinados):
-    os.makedirs(carpeta_combinados)
+if __name__ == "__main__":
+    # Carpeta base dinámica (argumento desde Flask, variable de entorno o /tmp)
+    if len(sys.argv) > 1:
+        BASE_FOLDER = sys.argv[1]
+    else:
+        BASE_FOLDER = os.environ.get("UPLOAD_FOLDER", "/tmp")
 
+    resumen = run(BASE_FOLDER)
 
+    if resumen["combinados"] > 0 and os.name == "nt":
+        os.startfile(resumen["carpeta"])
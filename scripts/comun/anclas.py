@@ -0,0 +1,157 @@
+import re
+
+# ==============================================
+# ⚓ EXTRACCIÓN DE CAMPOS ANCLADA A PALABRAS CLAVE
+# ==============================================
+# Cada patrón empieza con un literal ("Subtotal", "Razón Social:", ...).
+# En vez de lanzar patron.search() de cada patrón sobre todo el texto, el
+# texto se pasa una sola vez a minúsculas, se ubican todas las anclas y cada
+# patrón solo se prueba (patron.match) donde aparece su ancla. El resultado
+# es el mismo que el de search(): la coincidencia más a la izquierda del
+# patrón de mayor prioridad.
+METACARACTERES = set(".^$*+?{}[]|()")
+
+
+def _alternativa_en_raiz(fuente):
+    """True si el patrón tiene un "|" fuera de grupos (no empieza siempre igual)"""
+    profundidad = 0
+    en_clase = False
+    i = 0
+    while i < len(fuente):
+        c = fuente[i]
+        if c == "\\":
+            i += 2
+            continue
+        if en_clase:
+            en_clase = c != "]"
+        elif c == "[":
+            en_clase = True
+        elif c == "(":
+            profundidad += 1
+        elif c == ")":
+            profundidad -= 1
+        elif c == "|" and profundidad == 0:
+            return True
+        i += 1
+    return False
+
+
+def ancla_literal(patron):
+    """Texto literal con el que empieza toda coincidencia del patrón ("" si no hay)"""
+    fuente = patron.pattern
+    if patron.flags & re.VERBOSE or _alternativa_en_raiz(fuente):
+        return ""
+
+    literal = []
+    i = 0
+    while i < len(fuente):
+        c = fuente[i]
+        if c == "\\":
+            # \( \$ \. son literales; \s \d \w son clases y cortan el ancla
+            if i + 1 < len(fuente) and not fuente[i + 1].isalnum():
+                literal.append(fuente[i + 1])
+                i += 2
+                continue
+            break
+        if c in METACARACTERES:
+            break
+        literal.append(c)
+        i += 1
+
+    # Un cuantificador detrás del último carácter lo vuelve opcional
+    if i < len(fuente) and fuente[i] in "*?{" and literal:
+        literal.pop()
+    return "".join(literal)
+
+
+class ExtractorAnclado:
+    """Campos con patrones en orden de prioridad, resueltos con un solo escaneo.
+
+    `campos` es un dict {nombre: [patron compilado, ...]}. `anclas_extra`
+    son palabras adicionales cuyas posiciones se quieren conocer (por
+    ejemplo para una búsqueda de respaldo).
+    """
+
+    def __init__(self, campos, anclas_extra=()):
+        self.campos = {nombre: list(patrones) for nombre, patrones in campos.items()}
+        self.anclas = {
+            id(patron): ancla_literal(patron).lower()
+            for patrones in self.campos.values()
+            for patron in patrones
+        }
+        self.palabras = sorted({a for a in self.anclas.values() if a} | {a.lower() for a in anclas_extra})
+
+    def escanear(self, texto, anclado=True):
+        """Ubica todas las anclas del texto; con anclado=False se usa search() patrón a patrón"""
+        return EscaneoAnclas(self, texto, anclado)
+
+
+class EscaneoAnclas:
+    """Resultado del escaneo de un texto: anclas encontradas y coincidencias por campo"""
+
+    def __init__(self, extractor, texto, anclado=True):
+        self.extractor = extractor
+        self.texto = texto
+        self._minusculas = None
+        self._posiciones = {}
+        # lower() puede cambiar la longitud con algunos caracteres Unicode;
+        # entonces las posiciones no servirían y se usa search() directamente
+        self.anclado = anclado and len(self.minusculas) == len(texto)
+        if self.anclado:
+            for palabra in extractor.palabras:
+                self.posiciones(palabra)
+
+    @property
+    def minusculas(self):
+        if self._minusculas is None:
+            self._minusculas = self.texto.lower()
+        return self._minusculas
+
+    def posiciones(self, palabra):
+        """Posiciones (ascendentes) donde aparece la palabra, sin distinguir mayúsculas"""
+        palabra = palabra.lower()
+        if palabra not in self._posiciones:
+            encontradas = []
+            i = self.minusculas.find(palabra) if palabra else -1
+            while i != -1:
+                encontradas.append(i)
+                i = self.minusculas.find(palabra, i + 1)
+            self._posiciones[palabra] = encontradas
+        return self._posiciones[palabra]
+
+    def buscar(self, patron):
+        """Equivale a patron.search(texto), probando solo en las posiciones del ancla"""
+        ancla = self.extractor.anclas.get(id(patron), "")
+        if not self.anclado or not ancla:
+            return patron.search(self.texto)
+        for posicion in self.posiciones(ancla):
+            match = patron.match(self.texto, posicion)
+            if match:
+                return match
+        return None
+
+    def todas(self, patron):
+        """Equivale a patron.finditer(texto): coincidencias sin solaparse, de izquierda a derecha"""
+        ancla = self.extractor.anclas.get(id(patron), "")
+        if not self.anclado or not ancla:
+            yield from patron.finditer(self.texto)
+            return
+        fin = 0
+        for posicion in self.posiciones(ancla):
+            if posicion < fin:
+                continue
+            match = patron.match(self.texto, posicion)
+            if match:
+                fin = match.end()
+                yield match
+
+    def coincidencias(self, campo):
+        """(índice del patrón, match) de cada patrón que coincide, en orden de prioridad"""
+        for indice, patron in enumerate(self.extractor.campos[campo]):
+            match = self.buscar(patron)
+            if match:
+                yield indice, match
+
+    def primera(self, campo):
+        """Coincidencia del patrón de mayor prioridad, o (None, None)"""
+        return next(self.coincidencias(campo), (None, None))
@@ -0,0 +1,129 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+# ==============================================
+# 🗄️ CACHÉ PERSISTENTE EN SQLITE CON EXPULSIÓN LRU
+# ==============================================
+# El tamaño total vive en la tabla "total" y lo mantienen triggers, así
+# cada escritura lee una fila en vez de sumar la tabla completa, y el valor
+# es el mismo para todos los procesos que comparten el archivo.
+CARPETA_CACHE = os.environ.get(
+    "CACHE_PDF_PATH", os.path.join(tempfile.gettempdir(), "procesador_pdf_cache")
+)
+
+
+class CacheLRU:
+    """Caché clave/valor (JSON) en SQLite, acotada por tamaño total en bytes"""
+
+    def __init__(self, ruta, max_bytes):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self._conexion = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def activa(self):
+        return self.max_bytes > 0
+
+    def _conectar(self):
+        # Una conexión por proceso: los procesos del pool no comparten la del padre
+        if self._conexion is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+            conexion = sqlite3.connect(self.ruta, timeout=30, isolation_level=None, check_same_thread=False)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS entradas ("
+                " clave TEXT PRIMARY KEY,"
+                " valor TEXT NOT NULL,"
+                " tamano INTEGER NOT NULL,"
+                " ultimo_acceso REAL NOT NULL)"
+            )
+            conexion.execute("CREATE INDEX IF NOT EXISTS idx_ultimo_acceso ON entradas (ultimo_acceso)")
+            self._crear_total(conexion)
+            self._conexion = conexion
+            self._pid = os.getpid()
+        return self._conexion
+
+    @staticmethod
+    def _crear_total(conexion):
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS total (id INTEGER PRIMARY KEY CHECK (id = 1), bytes INTEGER NOT NULL)"
+            )
+            conexion.execute(
+                "CREATE TRIGGER IF NOT EXISTS total_insertar AFTER INSERT ON entradas BEGIN"
+                " UPDATE total SET bytes = bytes + NEW.tamano WHERE id = 1; END"
+            )
+            conexion.execute(
+                "CREATE TRIGGER IF NOT EXISTS total_eliminar AFTER DELETE ON entradas BEGIN"
+                " UPDATE total SET bytes = bytes - OLD.tamano WHERE id = 1; END"
+            )
+            conexion.execute(
+                "CREATE TRIGGER IF NOT EXISTS total_actualizar AFTER UPDATE OF tamano ON entradas BEGIN"
+                " UPDATE total SET bytes = bytes + NEW.tamano - OLD.tamano WHERE id = 1; END"
+            )
+            # Una caché creada antes de la tabla "total" parte de la suma actual
+            if conexion.execute("SELECT 1 FROM total WHERE id = 1").fetchone() is None:
+                conexion.execute("INSERT INTO total (id, bytes) SELECT 1, COALESCE(SUM(tamano), 0) FROM entradas")
+            conexion.execute("COMMIT")
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+
+    def obtener(self, clave):
+        """Devuelve el valor guardado o None; marca la entrada como usada"""
+        if not self.activa:
+            return None
+        with self._lock:
+            conexion = self._conectar()
+            fila = conexion.execute("SELECT valor FROM entradas WHERE clave = ?", (clave,)).fetchone()
+            if fila is None:
+                self.fallos += 1
+                return None
+            conexion.execute("UPDATE entradas SET ultimo_acceso = ? WHERE clave = ?", (time.time(), clave))
+            self.aciertos += 1
+            return json.loads(fila[0])
+
+    def guardar(self, clave, valor):
+        if not self.activa:
+            return
+        texto = json.dumps(valor, ensure_ascii=False)
+        with self._lock:
+            conexion = self._conectar()
+            # Upsert en vez de INSERT OR REPLACE: el borrado implícito de REPLACE no dispara triggers
+            conexion.execute(
+                "INSERT INTO entradas (clave, valor, tamano, ultimo_acceso) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (clave) DO UPDATE SET"
+                " valor = excluded.valor, tamano = excluded.tamano, ultimo_acceso = excluded.ultimo_acceso",
+                (clave, texto, len(texto.encode("utf-8")), time.time()),
+            )
+            self._expulsar(conexion)
+
+    def _expulsar(self, conexion):
+        """Elimina las entradas usadas hace más tiempo hasta volver bajo el límite"""
+        total = conexion.execute("SELECT bytes FROM total WHERE id = 1").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        exceso = total - self.max_bytes
+        claves = []
+        for clave, tamano in conexion.execute("SELECT clave, tamano FROM entradas ORDER BY ultimo_acceso"):
+            claves.append((clave,))
+            exceso -= tamano
+            if exceso <= 0:
+                break
+        conexion.executemany("DELETE FROM entradas WHERE clave = ?", claves)
+
+    def estadisticas(self):
+        return {"aciertos": self.aciertos, "fallos": self.fallos}
+
+    def reiniciar_estadisticas(self):
+        self.aciertos = 0
+        self.fallos = 0
@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+
+import fitz  # PyMuPDF
+
+from comun.paralelo import mapear_en_procesos, workers_configurados
+from comun.salidas import escritura_atomica
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ==============================================
+# 📎 COMBINACIÓN DE PDFs EN PARALELO
+# ==============================================
+# Motor único de 5.FC COMBINACION y 6 CE COMBINADO. Cada tarea une varios
+# PDFs en uno con fitz.insert_pdf y cierra todos los documentos apenas
+# termina, así la memoria depende del par más grande y no del tamaño del
+# lote. Las tareas se reparten en un pool acotado de procesos.
+
+
+def compresion_configurada():
+    """Si la salida se guarda con garbage + deflate (variable COMBINAR_COMPRIMIR, activa por defecto)"""
+    return os.environ.get("COMBINAR_COMPRIMIR", "1").strip().lower() not in ("0", "no", "false")
+
+
+def memoria_pico_mb():
+    """RSS máximo alcanzado por este proceso, en MB (None si el sistema no lo expone)"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KB y macOS en bytes
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def combinar_par(tarea):
+    """Une los PDFs de `tarea` = (rutas_entrada, ruta_salida, comprimir) en uno.
+
+    Puede correr en otro proceso. Devuelve un dict con la salida, bytes
+    leídos y escritos, la duración, el RSS pico del proceso y el error si lo hubo.
+    """
+    rutas_entrada, ruta_salida, comprimir = tarea
+    inicio = time.perf_counter()
+    resultado = {"ruta_salida": ruta_salida, "bytes_entrada": 0, "bytes_salida": 0, "error": None}
+    try:
+        with fitz.open() as salida:
+            for ruta in rutas_entrada:
+                resultado["bytes_entrada"] += os.path.getsize(ruta)
+                with fitz.open(ruta) as documento:
+                    salida.insert_pdf(documento)
+            with escritura_atomica(ruta_salida) as temporal:
+                if comprimir:
+                    salida.save(temporal, garbage=3, deflate=True)
+                else:
+                    salida.save(temporal)
+        resultado["bytes_salida"] = os.path.getsize(ruta_salida)
+    except Exception as e:
+        resultado["error"] = str(e)
+    finally:
+        # Vaciar la caché interna de MuPDF para que no crezca de par en par
+        fitz.TOOLS.store_shrink(100)
+    resultado["duracion"] = time.perf_counter() - inicio
+    resultado["memoria_pico_mb"] = memoria_pico_mb()
+    return resultado
+
+
+def combinar_lote(tareas, workers=None, comprimir=None):
+    """Combina varias (rutas_entrada, ruta_salida) en un pool de procesos; conserva el orden.
+
+    Devuelve un dict con los resultados por tarea, MB leídos y escritos,
+    MB/s (de entrada) y el RSS pico entre este proceso y los del pool.
+    """
+    if comprimir is None:
+        comprimir = compresion_configurada()
+    if workers is None:
+        workers = workers_configurados("COMBINAR_WORKERS", por_defecto="auto")
+
+    inicio = time.perf_counter()
+    resultados = mapear_en_procesos(
+        combinar_par, [(tuple(rutas), salida, comprimir) for rutas, salida in tareas], workers
+    )
+    segundos = time.perf_counter() - inicio
+
+    mb_entrada = sum(r["bytes_entrada"] for r in resultados) / (1024 * 1024)
+    picos = [p for p in [memoria_pico_mb()] + [r["memoria_pico_mb"] for r in resultados] if p is not None]
+    return {
+        "resultados": resultados,
+        "segundos": segundos,
+        "mb_entrada": mb_entrada,
+        "mb_salida": sum(r["bytes_salida"] for r in resultados) / (1024 * 1024),
+        "mb_por_segundo": mb_entrada / segundos if segundos > 0 else 0.0,
+        "memoria_pico_mb": max(picos) if picos else None,
+    }
+
+
+def combinar_pares(triples, workers=None, comprimir=None):
+    """Combina cada (pdf_erp, pdf_soporte, ruta_salida) en un solo PDF; ver combinar_lote"""
+    return combinar_lote([((erp, soporte), salida) for erp, soporte, salida in triples], workers, comprimir)
+
+
+def resumen_combinacion(lote):
+    """Texto corto con volumen, velocidad y memoria pico de un lote combinado"""
+    texto = f"{lote['mb_entrada']:.1f} MB → {lote['mb_salida']:.1f} MB en {lote['segundos']:.1f}s " \
+            f"({lote['mb_por_segundo']:.1f} MB/s)"
+    if lote["memoria_pico_mb"] is not None:
+        texto += f" | RSS pico {lote['memoria_pico_mb']:.0f} MB"
+    return texto
@@ -0,0 +1,315 @@
+import heapq
+import os
+from collections import defaultdict
+
+import numpy as np
+
+# ==============================================
+# 🔗 EMPAREJAMIENTO ERP / SOPORTE
+# ==============================================
+# Compartido por 5.FC COMBINACION y 6 CE COMBINADO. Cada script aporta sus
+# claves por archivo, su función de puntuación y qué tipos de clave bastan
+# para superar su umbral; aquí se generan los candidatos con un índice
+# invertido y se elige la asignación en modo voraz o óptimo.
+MODO_VORAZ = "voraz"
+MODO_OPTIMO = "optimo"
+MODOS = (MODO_VORAZ, MODO_OPTIMO)
+
+
+def modo_configurado():
+    """Modo de emparejamiento (variable MODO_EMPAREJAMIENTO, voraz por defecto)"""
+    modo = os.environ.get("MODO_EMPAREJAMIENTO", MODO_VORAZ).strip().lower().replace("ó", "o")
+    if modo not in MODOS:
+        raise ValueError(f"Modo de emparejamiento desconocido: {modo} (opciones: {', '.join(MODOS)})")
+    return modo
+
+
+# ==============================================
+# 🗂️ ÍNDICE INVERTIDO DE CANDIDATOS
+# ==============================================
+def pares(valores):
+    ordenados = sorted(valores)
+    for a in range(len(ordenados)):
+        for b in range(a + 1, len(ordenados)):
+            yield ordenados[a], ordenados[b]
+
+
+def claves_indice(claves, tipos):
+    """Claves de los tipos pedidos por las que un archivo se indexa o se busca"""
+    if 'fecha' in tipos and claves['fecha']:
+        yield ('fecha', claves['fecha'])
+    if 'valor' in tipos:
+        for valor in claves['valores']:
+            yield ('valor', valor)
+    if 'codigo' in tipos:
+        for codigo in claves['codigos']:
+            yield ('codigo', codigo)
+    if 'nombre' in tipos:
+        for nombre in claves['nombres']:
+            yield ('nombre', nombre)
+    if 'par_codigos' in tipos:
+        for par in pares(claves['codigos']):
+            yield ('par_codigos',) + par
+    if 'par_otros' in tipos:
+        for par in pares(claves['otros']):
+            yield ('par_otros',) + par
+
+
+class IndiceCandidatos:
+    """Soportes indexados por clave, separados según tengan fecha o no.
+
+    `tipos_por_caso` dice, para (ERP con fecha, soporte con fecha), qué
+    tipos de clave compartida pueden llevar un par al umbral; un soporte
+    que no comparte ninguna no se puntúa.
+    """
+
+    def __init__(self, claves_soporte, tipos_por_caso):
+        self.tipos_por_caso = tipos_por_caso
+        tipos = set()
+        for tipos_caso in tipos_por_caso.values():
+            tipos.update(tipos_caso)
+        self._por_clave = {True: {}, False: {}}
+        for j, claves in enumerate(claves_soporte):
+            por_clave = self._por_clave[bool(claves['fecha'])]
+            for clave in claves_indice(claves, tipos):
+                por_clave.setdefault(clave, []).append(j)
+
+    def candidatos(self, claves_erp):
+        """Soportes que comparten con el ERP alguna clave suficiente, en orden ascendente"""
+        encontrados = set()
+        for soporte_con_fecha, por_clave in self._por_clave.items():
+            tipos = self.tipos_por_caso[(bool(claves_erp['fecha']), soporte_con_fecha)]
+            for clave in claves_indice(claves_erp, tipos):
+                encontrados.update(por_clave.get(clave, ()))
+        return sorted(encontrados)
+
+
+# ==============================================
+# 🎯 ASIGNACIÓN VORAZ Y ÓPTIMA
+# ==============================================
+def emparejar_voraz(claves_erp, claves_soporte, puntuar, umbral, indice):
+    """Cada ERP, en orden, toma el soporte libre de mayor puntuación (el primero si empatan)"""
+    parejas = []
+    usados = set()
+    for i, claves in enumerate(claves_erp):
+        mejor_indice = None
+        mejor_puntuacion = 0
+        for j in indice.candidatos(claves):
+            if j in usados:
+                continue
+            puntuacion, _ = puntuar(claves, claves_soporte[j], con_criterios=False)
+            if puntuacion >= umbral and puntuacion > mejor_puntuacion:
+                mejor_puntuacion = puntuacion
+                mejor_indice = j
+        if mejor_indice is not None:
+            parejas.append((i, mejor_indice, mejor_puntuacion))
+            usados.add(mejor_indice)
+    return parejas
+
+
+def aristas_candidatas(claves_erp, claves_soporte, puntuar, umbral, indice):
+    """Todos los pares (i, j, puntuación) que alcanzan el umbral"""
+    aristas = []
+    for i, claves in enumerate(claves_erp):
+        for j in indice.candidatos(claves):
+            puntuacion, _ = puntuar(claves, claves_soporte[j], con_criterios=False)
+            if puntuacion >= umbral:
+                aristas.append((i, j, puntuacion))
+    return aristas
+
+
+def componentes(aristas):
+    """Agrupa las aristas en componentes conexas (unión-búsqueda sobre ERP y soportes)"""
+    padre = {}  # ERP i -> nodo i; soporte j -> nodo -(j + 1)
+
+    def raiz(nodo):
+        while padre.setdefault(nodo, nodo) != nodo:
+            padre[nodo] = padre[padre[nodo]]
+            nodo = padre[nodo]
+        return nodo
+
+    # Las aristas de un mismo ERP suelen venir seguidas: se conserva su raíz
+    # y se saltan los soportes que ya cuelgan de ella
+    anterior = a = None
+    for i, j, _ in aristas:
+        if i != anterior:
+            anterior, a = i, raiz(i)
+        nodo = -(j + 1)
+        if padre.get(nodo) == a:
+            continue
+        b = raiz(nodo)
+        if a != b:
+            padre[a] = b
+            a = b
+
+    grupos = defaultdict(list)
+    raices = {}
+    for arista in aristas:
+        i = arista[0]
+        if i not in raices:
+            raices[i] = raiz(i)
+        grupos[raices[i]].append(arista)
+    return list(grupos.values())
+
+
+def _asignar_componente(aristas):
+    """Caminos de aumento más cortos (Dijkstra con potenciales) fila por fila.
+
+    Minimiza el costo -puntuación. Cada ERP tiene además una columna propia
+    "sin pareja" de costo 0, así que quedar libre siempre es posible y solo
+    se empareja cuando suma. Columnas reales: j >= 0; la libre de i: -(i + 1).
+    """
+    pesos = {(i, j): w for i, j, w in aristas}
+    adyacencia = defaultdict(list)
+    for i, j, w in aristas:
+        adyacencia[i].append((j, -w))
+    for i in list(adyacencia):
+        adyacencia[i].append((-(i + 1), 0))
+
+    def costo(i, j):
+        return 0 if j < 0 else -pesos[(i, j)]
+
+    potencial = defaultdict(int)  # potencial de cada columna
+    fila_de = {}
+    columna_de = {}
+
+    for fila in sorted(adyacencia):
+        distancia = {}
+        previa = {}
+        cola = []
+        for j, c in adyacencia[fila]:
+            d = c - potencial[j]
+            if d < distancia.get(j, float("inf")):
+                distancia[j] = d
+                previa[j] = fila
+                heapq.heappush(cola, (d, j < 0, j))
+
+        cerradas = []
+        vistas = set()
+        while True:
+            d, _, j = heapq.heappop(cola)
+            if j in vistas or d > distancia[j]:
+                continue
+            vistas.add(j)
+            cerradas.append(j)
+            ocupante = fila_de.get(j)
+            if ocupante is None:
+                destino, total = j, d
+                break
+            # Seguir por la fila que ocupa j: su arista actual tiene costo reducido 0
+            base = d - (costo(ocupante, j) - potencial[j])
+            for k, c in adyacencia[ocupante]:
+                if k in vistas:
+                    continue
+                nd = base + c - potencial[k]
+                if nd < distancia.get(k, float("inf")):
+                    distancia[k] = nd
+                    previa[k] = ocupante
+                    heapq.heappush(cola, (nd, k < 0, k))
+
+        for j in cerradas:
+            potencial[j] += distancia[j] - total
+
+        # Invertir el camino de aumento hasta la fila nueva
+        j = destino
+        while True:
+            i = previa[j]
+            anterior = columna_de.get(i)
+            fila_de[j] = i
+            columna_de[i] = j
+            if i == fila:
+                break
+            j = anterior
+
+    return [(i, j, pesos[(i, j)]) for i, j in columna_de.items() if j >= 0]
+
+
+def _asignar_denso(aristas):
+    """Húngaro (Kuhn-Munkres) vectorizado con numpy para componentes densas.
+
+    Un par sin arista vale 0, igual que dejar ambos sin pareja, así que
+    basta con asignar todas las filas (el lado más corto) y descartar
+    después las asignaciones que no son aristas.
+    """
+    tabla = np.array(aristas, dtype=np.int64)
+    origen, destino = tabla[:, 0], tabla[:, 1]
+    transpuesta = len(np.unique(origen)) > len(np.unique(destino))
+    if transpuesta:
+        origen, destino = destino, origen
+    filas, posicion_fila = np.unique(origen, return_inverse=True)
+    columnas, posicion_columna = np.unique(destino, return_inverse=True)
+
+    n, m = len(filas), len(columnas)
+    costo = np.zeros((n, m), dtype=np.int64)
+    costo[posicion_fila, posicion_columna] = -tabla[:, 2]
+
+    infinito = np.iinfo(np.int64).max // 4
+    u = np.zeros(n + 1, dtype=np.int64)
+    v = np.zeros(m + 1, dtype=np.int64)
+    fila_de = np.zeros(m + 1, dtype=np.int64)  # columna (desde 1) -> fila (desde 1), 0 = libre
+    camino = np.zeros(m + 1, dtype=np.int64)
+    for fila in range(1, n + 1):
+        fila_de[0] = fila
+        j0 = 0
+        minimo = np.full(m + 1, infinito, dtype=np.int64)
+        usadas = np.zeros(m + 1, dtype=bool)
+        while True:
+            usadas[j0] = True
+            i0 = fila_de[j0]
+            reducido = costo[i0 - 1] - u[i0] - v[1:]
+            mejora = ~usadas[1:] & (reducido < minimo[1:])
+            minimo[1:][mejora] = reducido[mejora]
+            camino[1:][mejora] = j0
+            j1 = int(np.argmin(np.where(usadas, infinito, minimo)))
+            delta = minimo[j1]
+            u[fila_de[usadas]] += delta
+            v[usadas] -= delta
+            minimo[~usadas] -= delta
+            j0 = j1
+            if fila_de[j0] == 0:
+                break
+        while j0:
+            j1 = camino[j0]
+            fila_de[j0] = fila_de[j1]
+            j0 = j1
+
+    parejas = []
+    for j in range(1, m + 1):
+        if not fila_de[j]:
+            continue
+        w = -int(costo[fila_de[j] - 1, j - 1])
+        if w > 0:
+            i, j_original = int(filas[fila_de[j] - 1]), int(columnas[j - 1])
+            parejas.append((j_original, i, w) if transpuesta else (i, j_original, w))
+    return parejas
+
+
+# Desde esta densidad (aristas / celdas de la matriz) y hasta este tamaño, la
+# componente se resuelve con la matriz densa en numpy en lugar del heap
+DENSIDAD_MATRIZ = 0.2
+MAX_CELDAS_MATRIZ = 25_000_000
+
+
+def asignacion_optima(aristas):
+    """Parejas (i, j, puntuación) de suma total máxima; cada lado a lo sumo una vez"""
+    parejas = []
+    for grupo in componentes(aristas):
+        celdas = len({i for i, _, _ in grupo}) * len({j for _, j, _ in grupo})
+        if celdas <= MAX_CELDAS_MATRIZ and len(grupo) >= DENSIDAD_MATRIZ * celdas:
+            parejas.extend(_asignar_denso(grupo))
+        else:
+            parejas.extend(_asignar_componente(grupo))
+    return sorted(parejas)
+
+
+def emparejar(claves_erp, claves_soporte, puntuar, umbral, tipos_por_caso, modo=None):
+    """Parejas (i, j, puntuación) ordenadas por ERP, en modo voraz u óptimo.
+
+    `puntuar(claves_erp, claves_soporte, con_criterios)` devuelve
+    (puntuación, criterios); solo cuentan los pares con puntuación >= umbral.
+    """
+    modo = modo or modo_configurado()
+    indice = IndiceCandidatos(claves_soporte, tipos_por_caso)
+    if modo == MODO_OPTIMO:
+        return asignacion_optima(aristas_candidatas(claves_erp, claves_soporte, puntuar, umbral, indice))
+    return emparejar_voraz(claves_erp, claves_soporte, puntuar, umbral, indice)
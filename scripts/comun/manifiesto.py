@@ -0,0 +1,102 @@
+import json
+import os
+import time
+
+from comun.texto_pdf import huella_archivo
+
+# ==============================================
+# 🗂️ MANIFIESTO DE PDFs YA PROCESADOS POR CARPETA
+# ==============================================
+# Cada carpeta de uploads guarda en .manifiesto.json, por nombre final de
+# cada PDF, la huella SHA-256 de su contenido, los campos extraídos (la fila
+# de la tabla de resultados) y el nombre original. Al volver a ejecutar un
+# script solo se procesan los archivos nuevos o modificados; los demás
+# aportan su fila guardada y no se renombran otra vez. La "firma" identifica
+# la configuración que produjo las filas (p. ej. el backend de texto): si
+# cambia, se procesa todo.
+NOMBRE_MANIFIESTO = ".manifiesto.json"
+VERSION_MANIFIESTO = 1
+
+
+def omitir_procesados():
+    """Si se saltan los PDFs sin cambios (variable OMITIR_PROCESADOS, activa por defecto)"""
+    return os.environ.get("OMITIR_PROCESADOS", "1").strip().lower() not in ("0", "no", "false")
+
+
+class Manifiesto:
+    """Registro persistente de los PDFs procesados en una carpeta"""
+
+    def __init__(self, carpeta, script, firma=""):
+        self.ruta = os.path.join(carpeta, NOMBRE_MANIFIESTO)
+        self.carpeta = carpeta
+        self.script = script
+        self.firma = firma
+        self.archivos = self._leer()
+        # Nombre original de cada nombre final, aunque la entrada se descarte al clasificar
+        self._originales = {salida: entrada["nombre_original"] for salida, entrada in self.archivos.items()}
+
+    def _leer(self):
+        try:
+            with open(self.ruta, encoding="utf-8") as archivo:
+                datos = json.load(archivo)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Manifiesto ilegible, se procesa todo de nuevo: {e}")
+            return {}
+        if (datos.get("version") != VERSION_MANIFIESTO or datos.get("script") != self.script
+                or datos.get("firma") != self.firma):
+            print("ℹ️ Manifiesto de otra versión o configuración: se procesa todo de nuevo")
+            return {}
+        return datos.get("archivos", {})
+
+    def clasificar(self, nombres):
+        """Separa los PDFs de la carpeta en pendientes y ya procesados.
+
+        Un PDF está procesado si su nombre es un nombre final registrado (o
+        el original, cuando el renombrado quedó pendiente) y su contenido no
+        cambió. Devuelve (pendientes, vigentes): listas de (nombre, huella)
+        y de (nombre, nombre final, entrada guardada). Sin OMITIR_PROCESADOS
+        todo queda pendiente.
+        """
+        omitir = omitir_procesados()
+        por_original = {entrada["nombre_original"]: salida for salida, entrada in self.archivos.items()}
+        pendientes, vigentes, conservados = [], [], {}
+        for nombre in nombres:
+            huella = huella_archivo(os.path.join(self.carpeta, nombre))
+            salida = nombre if nombre in self.archivos else por_original.get(nombre)
+            entrada = self.archivos.get(salida)
+            vigente = omitir and entrada is not None and entrada["huella"] == huella
+            if vigente and salida != nombre:
+                # Conserva el nombre original: solo vale si el renombrado quedó pendiente
+                vigente = not os.path.exists(os.path.join(self.carpeta, salida))
+            if vigente:
+                vigentes.append((nombre, salida, entrada))
+                conservados[salida] = entrada
+            else:
+                pendientes.append((nombre, huella))
+
+        # Lo que ya no está en la carpeta (o cambió) sale del manifiesto
+        self.archivos = conservados
+        return pendientes, vigentes
+
+    def nombre_original(self, nombre):
+        """Nombre con el que se subió un PDF que un script ya renombró (o el mismo nombre)"""
+        return self._originales.get(nombre, nombre)
+
+    def registrar(self, huella, nombre_original, nombre_salida, fila):
+        """Guarda (en memoria) la fila y el nombre final de un PDF recién procesado"""
+        self.archivos[nombre_salida] = {
+            "huella": huella,
+            "nombre_original": nombre_original,
+            "fila": list(fila),
+            "procesado": time.time(),
+        }
+
+    def guardar(self):
+        """Escribe el manifiesto de forma atómica (archivo temporal + reemplazo)"""
+        datos = {"version": VERSION_MANIFIESTO, "script": self.script, "firma": self.firma, "archivos": self.archivos}
+        temporal = f"{self.ruta}.tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo, ensure_ascii=False, indent=1, default=str)
+        os.replace(temporal, self.ruta)
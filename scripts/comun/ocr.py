@@ -0,0 +1,136 @@
+import os
+import subprocess
+import time
+
+import fitz  # PyMuPDF
+import pytesseract
+
+from comun.cache import CARPETA_CACHE, CacheLRU
+from comun.paralelo import mapear_en_procesos, workers_configurados
+from comun.texto_pdf import huella_archivo
+
+# ==============================================
+# 🔎 OCR EN MEMORIA (SIN ARCHIVOS TEMPORALES)
+# ==============================================
+# La página se renderiza con fitz y los bytes de la imagen se envían por
+# stdin a tesseract, que responde el texto por stdout. Así no hay temp.png
+# que dos ejecuciones simultáneas puedan pisarse.
+
+# Configuración OCR (en Windows se usa la instalación local de Tesseract)
+if os.name == "nt":
+    pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+
+OCR_DPI_POR_DEFECTO = 300
+OCR_IDIOMA_POR_DEFECTO = "spa"
+
+# Texto crudo de tesseract por (SHA-256 del PDF, página, DPI, idioma). Se
+# guarda la salida sin interpretar para que el análisis de las líneas pueda
+# cambiar sin volver a pagar el OCR.
+cache_ocr = CacheLRU(
+    os.path.join(CARPETA_CACHE, "ocr.sqlite"),
+    max_bytes=int(float(os.environ.get("CACHE_OCR_MAX_MB", 64)) * 1024 * 1024),
+)
+
+
+def dpi_configurado():
+    """Resolución de renderizado para OCR (variable OCR_DPI, 300 por defecto)"""
+    return int(os.environ.get("OCR_DPI", OCR_DPI_POR_DEFECTO))
+
+
+def idioma_configurado():
+    """Idioma de tesseract (variable OCR_IDIOMA, "spa" por defecto)"""
+    return os.environ.get("OCR_IDIOMA", OCR_IDIOMA_POR_DEFECTO)
+
+
+def renderizar_pagina(ruta_pdf, indice, dpi):
+    """Imagen PNM de la página en memoria (sin compresión: lo más rápido de codificar)"""
+    with fitz.open(ruta_pdf) as documento:
+        return documento[indice].get_pixmap(dpi=dpi).tobytes("pnm")
+
+
+def ocr_imagen(imagen, idioma, dpi, hilos=None):
+    """Texto de una imagen en memoria; tesseract la lee por stdin"""
+    entorno = None
+    if hilos:
+        # Con varios procesos en paralelo, cada tesseract usa un solo hilo
+        entorno = dict(os.environ, OMP_THREAD_LIMIT=str(hilos))
+    proceso = subprocess.run(
+        [pytesseract.pytesseract.tesseract_cmd, "stdin", "stdout", "-l", idioma, "--dpi", str(dpi)],
+        input=imagen,
+        capture_output=True,
+        env=entorno,
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(proceso.stderr.decode("utf-8", "replace").strip() or "tesseract falló")
+    return proceso.stdout.decode("utf-8", "replace")
+
+
+def lineas_ocr(texto):
+    """Líneas no vacías y sin espacios sobrantes, como las espera el análisis"""
+    return [linea.strip() for linea in texto.split("\n") if linea.strip()]
+
+
+def ocr_pagina(tarea):
+    """OCR de una página (puede correr en otro proceso).
+
+    `tarea` es (ruta_pdf, indice, dpi, idioma, hilos). Devuelve un dict con
+    el texto crudo, sus líneas, la duración y el error si lo hubo.
+    """
+    ruta_pdf, indice, dpi, idioma, hilos = tarea
+    inicio = time.perf_counter()
+    resultado = {"ruta": ruta_pdf, "pagina": indice, "texto": "", "lineas": [], "error": None, "cache": False}
+    try:
+        imagen = renderizar_pagina(ruta_pdf, indice, dpi)
+        resultado["texto"] = ocr_imagen(imagen, idioma, dpi, hilos)
+        resultado["lineas"] = lineas_ocr(resultado["texto"])
+    except Exception as e:
+        resultado["error"] = str(e)
+    resultado["duracion"] = time.perf_counter() - inicio
+    return resultado
+
+
+def clave_ocr(huella, indice, dpi, idioma):
+    return f"{huella}:{indice}:{dpi}:{idioma}"
+
+
+def ocr_paginas(paginas, dpi=None, idioma=None, workers=None):
+    """OCR de varias (ruta_pdf, indice) en un pool acotado de procesos; conserva el orden.
+
+    Las páginas que ya están en la caché de OCR no llegan al pool.
+    """
+    dpi = dpi or dpi_configurado()
+    idioma = idioma or idioma_configurado()
+    if workers is None:
+        workers = workers_configurados("OCR_WORKERS", por_defecto="auto")
+    hilos = 1 if workers > 1 else None
+
+    resultados = [None] * len(paginas)
+    pendientes = []  # (posición, clave en caché, tarea)
+    huellas = {}
+    for posicion, (ruta, indice) in enumerate(paginas):
+        clave = None
+        try:
+            if ruta not in huellas:
+                huellas[ruta] = huella_archivo(ruta)
+            clave = clave_ocr(huellas[ruta], indice, dpi, idioma)
+            texto = cache_ocr.obtener(clave)
+        except OSError:
+            texto = None  # el error real lo reporta ocr_pagina
+        if texto is not None:
+            resultados[posicion] = {"ruta": ruta, "pagina": indice, "texto": texto, "lineas": lineas_ocr(texto),
+                                    "error": None, "cache": True, "duracion": 0.0}
+        else:
+            pendientes.append((posicion, clave, (ruta, indice, dpi, idioma, hilos)))
+
+    hechos = mapear_en_procesos(ocr_pagina, [tarea for _, _, tarea in pendientes], workers)
+    for (posicion, clave, _), resultado in zip(pendientes, hechos):
+        if clave and not resultado["error"]:
+            cache_ocr.guardar(clave, resultado["texto"])
+        resultados[posicion] = resultado
+    return resultados
+
+
+def resumen_cache_ocr():
+    """Texto corto con aciertos y fallos de la caché de OCR en esta ejecución"""
+    estadisticas = cache_ocr.estadisticas()
+    return f"{estadisticas['aciertos']} aciertos / {estadisticas['fallos']} fallos"
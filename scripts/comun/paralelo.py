@@ -0,0 +1,56 @@
+import importlib.util
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# ==============================================
+# ⚡ MAPEO EN PARALELO CON PROCESOS
+# ==============================================
+
+
+def registrar_modulo(nombre, ruta):
+    """Importa el módulo dueño de la función en procesos hijos que no lo heredan"""
+    if nombre in sys.modules or nombre in ("__main__", "__mp_main__"):
+        return
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = modulo
+    spec.loader.exec_module(modulo)
+
+
+def workers_configurados(variable, por_defecto=1):
+    """Número de procesos a usar según la variable de entorno ("auto" = núcleos)"""
+    valor = os.environ.get(variable, str(por_defecto)).strip().lower()
+    if valor == "auto":
+        return os.cpu_count() or 1
+    return max(1, int(valor))
+
+
+def mapear_en_procesos(funcion, elementos, workers, al_terminar=None):
+    """Aplica la función a cada elemento en un pool de procesos y conserva el orden.
+
+    `al_terminar(indice, resultado)` se llama en este proceso a medida que
+    hay resultados (en orden), p. ej. para informar el progreso.
+    """
+    elementos = list(elementos)
+    workers = min(workers, len(elementos))
+    if workers <= 1:
+        resultados = (funcion(elemento) for elemento in elementos)
+        return _recolectar(resultados, al_terminar)
+
+    modulo = sys.modules[funcion.__module__]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=registrar_modulo,
+        initargs=(funcion.__module__, modulo.__file__),
+    ) as pool:
+        return _recolectar(pool.map(funcion, elementos), al_terminar)
+
+
+def _recolectar(resultados, al_terminar):
+    lista = []
+    for indice, resultado in enumerate(resultados, 1):
+        lista.append(resultado)
+        if al_terminar:
+            al_terminar(indice, resultado)
+    return lista
@@ -0,0 +1,286 @@
+import json
+import math
+import os
+
+import fitz  # PyMuPDF
+
+from comun.salidas import escritura_atomica
+from comun.texto_pdf import huella_archivo
+
+# ==============================================
+# 📐 PLANTILLAS DE EXTRACCIÓN POR REGIONES
+# ==============================================
+# Los formatos del ERP tienen diseño fijo: cada campo está siempre en el
+# mismo lugar respecto a su ancla ("PROVEEDO", "BENEFICIARIO", ...). Una
+# plantilla guarda, por campo, dónde suele estar el ancla y la región del
+# valor relativa a ella. Al extraer solo se arma el texto de la zona
+# recortada alrededor de esas regiones (get_textpage con clip), sin el
+# layout de la página completa. Si un ancla no aparece (otro formato,
+# escaneado) o el valor sigue fuera de su región (un nombre más largo o
+# partido en dos líneas) el campo queda en None y el script usa la
+# extracción completa.
+#
+# Modo aprender: a partir de PDFs de muestra y de los valores que la
+# extracción completa encontró en ellos, se ubican ancla y valor y la región
+# se ensancha hasta las palabras vecinas, para admitir valores más largos.
+# Las plantillas están desactivadas por defecto: se usan con
+# PLANTILLAS_MODO=usar una vez comparadas con la extracción completa en un
+# lote variado de documentos.
+VERSION_PLANTILLA = 1
+CARPETA_PLANTILLAS = os.environ.get(
+    "PLANTILLAS_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "plantillas")
+)
+MARGEN = 2.0  # puntos alrededor del valor
+TOLERANCIA_ANCLA = 36.0  # puntos que el ancla puede moverse entre documentos
+
+MODO_USAR = "usar"
+MODO_APRENDER = "aprender"
+MODO_NO = "no"
+
+
+def modo_plantillas():
+    """Modo de las plantillas (variable PLANTILLAS_MODO): "no" (por defecto), "usar" o "aprender" """
+    modo = os.environ.get("PLANTILLAS_MODO", MODO_NO).strip().lower()
+    return modo if modo in (MODO_USAR, MODO_APRENDER, MODO_NO) else MODO_NO
+
+
+def ruta_plantilla(tipo):
+    return os.path.join(CARPETA_PLANTILLAS, f"{tipo}.json")
+
+
+class Plantilla:
+    """Regiones de los campos de un tipo de documento.
+
+    `campos` es un dict {nombre: {"ancla", "pagina", "caja_ancla", "region"}}:
+    caja_ancla es dónde estaba el ancla en las muestras y region es
+    [x0, y0, x1, y1] relativa a la esquina superior izquierda del ancla.
+    """
+
+    def __init__(self, tipo, campos, muestras=0):
+        self.tipo = tipo
+        self.campos = campos
+        self.muestras = muestras
+
+    @classmethod
+    def cargar(cls, tipo):
+        """Plantilla guardada del tipo, o None si no hay (o es de otra versión)"""
+        try:
+            with open(ruta_plantilla(tipo), encoding="utf-8") as archivo:
+                datos = json.load(archivo)
+        except (OSError, ValueError):
+            return None
+        if datos.get("version") != VERSION_PLANTILLA:
+            return None
+        return cls(tipo, datos["campos"], datos.get("muestras", 0))
+
+    def guardar(self):
+        os.makedirs(CARPETA_PLANTILLAS, exist_ok=True)
+        datos = {"version": VERSION_PLANTILLA, "tipo": self.tipo, "muestras": self.muestras, "campos": self.campos}
+        with escritura_atomica(ruta_plantilla(self.tipo)) as temporal:
+            with open(temporal, "w", encoding="utf-8") as archivo:
+                json.dump(datos, archivo, ensure_ascii=False, indent=2)
+        return ruta_plantilla(self.tipo)
+
+    def extraer(self, ruta_pdf):
+        """Texto de la región de cada campo (None si no se ubicó su ancla).
+
+        Devuelve {"campos": {nombre: texto}, "paginas_leidas", "paginas_total"}.
+        """
+        resultado = {nombre: None for nombre in self.campos}
+        por_pagina = {}
+        for nombre, campo in self.campos.items():
+            por_pagina.setdefault(campo["pagina"], []).append(nombre)
+
+        with fitz.open(ruta_pdf) as documento:
+            for indice, nombres in sorted(por_pagina.items()):
+                if indice >= documento.page_count:
+                    continue
+                pagina = documento[indice]
+                zonas = [zona_campo(self.campos[nombre]) for nombre in nombres]
+                clip = fitz.Rect(zonas[0])
+                for zona in zonas[1:]:
+                    clip |= zona
+                texto_pagina = pagina.get_textpage(clip=clip & pagina.rect)
+                palabras = pagina.get_text("words", textpage=texto_pagina)
+                for nombre in nombres:
+                    campo = self.campos[nombre]
+                    ancla = ubicar_ancla(pagina, campo, texto_pagina)
+                    if ancla is not None:
+                        region = fitz.Rect(campo["region"]) + (ancla.x0, ancla.y0, ancla.x0, ancla.y0)
+                        resultado[nombre] = texto_region(palabras, region)
+            total = documento.page_count
+        return {"campos": resultado, "paginas_leidas": max(por_pagina, default=-1) + 1, "paginas_total": total}
+
+
+def zona_campo(campo):
+    """Zona que puede ocupar un campo: su ancla y su región, con la tolerancia de movimiento"""
+    caja = fitz.Rect(campo["caja_ancla"])
+    region = fitz.Rect(campo["region"]) + (caja.x0, caja.y0, caja.x0, caja.y0)
+    zona = caja | region
+    return zona + (-TOLERANCIA_ANCLA, -TOLERANCIA_ANCLA, TOLERANCIA_ANCLA, TOLERANCIA_ANCLA)
+
+
+def ubicar_ancla(pagina, campo, texto_pagina):
+    """Rectángulo del ancla más cercano a donde estaba en las muestras (o None)"""
+    esperada = fitz.Rect(campo["caja_ancla"])
+    candidatas = [
+        rect for rect in pagina.search_for(campo["ancla"], textpage=texto_pagina)
+        if abs(rect.x0 - esperada.x0) <= TOLERANCIA_ANCLA and abs(rect.y0 - esperada.y0) <= TOLERANCIA_ANCLA
+    ]
+    return min(candidatas, key=lambda rect: distancia(rect, esperada), default=None)
+
+
+def texto_region(palabras, region):
+    """Palabras con el centro dentro de la región, en líneas de arriba abajo y de izquierda a derecha.
+
+    None si no hay ninguna o si el valor sigue fuera de la región (ver valor_recortado).
+    """
+    dentro = [
+        p for p in palabras
+        if region.x0 <= (p[0] + p[2]) / 2 <= region.x1 and region.y0 <= (p[1] + p[3]) / 2 <= region.y1
+    ]
+    if not dentro or valor_recortado(palabras, dentro, region):
+        return None
+    lineas = {}
+    for palabra in sorted(dentro, key=lambda p: (p[5], p[6], p[7])):
+        lineas.setdefault((palabra[5], palabra[6]), []).append(palabra[4])
+    return "\n".join(" ".join(linea) for linea in lineas.values()) or None
+
+
+def valor_recortado(palabras, dentro, region):
+    """Si el valor de la región continúa fuera de ella y leerlo daría un texto cortado.
+
+    Lo indica una palabra que cruza el borde, otra más a la derecha en la
+    misma línea de texto o una línea siguiente del mismo bloque que empieza
+    alineada con el valor (un nombre partido en dos líneas).
+    """
+    lineas = {(p[5], p[6]) for p in dentro}
+    bloques = {p[5] for p in dentro}
+    inicio = min(p[0] for p in dentro)
+    fondo = max(p[3] for p in dentro)
+    alto = max(p[3] - p[1] for p in dentro)
+    for palabra in palabras:
+        rect = fitz.Rect(palabra[:4])
+        if palabra in dentro:
+            if rect.x0 < region.x0 - MARGEN or rect.x1 > region.x1 + MARGEN:
+                return True
+            continue
+        cruce = rect & region
+        if cruce.width > MARGEN and cruce.height > MARGEN:
+            return True
+        if (palabra[5], palabra[6]) in lineas and rect.x0 >= region.x1:
+            return True
+        if (
+            palabra[5] in bloques and (palabra[5], palabra[6]) not in lineas
+            and 0 <= rect.y0 - fondo < alto and abs(rect.x0 - inicio) <= MARGEN
+        ):
+            return True
+    return False
+
+
+def distancia(a, b):
+    return math.hypot(a.x0 - b.x0, a.y0 - b.y0)
+
+
+# ==============================================
+# 🎓 MODO APRENDER
+# ==============================================
+def aprender(tipo, anclas, muestras):
+    """Infiere una plantilla a partir de PDFs de muestra.
+
+    `anclas` es {campo: texto del ancla} y `muestras` una lista de
+    (ruta_pdf, {campo: valor tal como aparece en el PDF}). Las muestras con
+    el mismo contenido cuentan una vez. Un campo entra en la plantilla si su
+    ancla y su valor se ubicaron en al menos una muestra, siempre en la
+    misma página. Devuelve la Plantilla (sin guardar).
+    """
+    observaciones = {campo: [] for campo in anclas}  # (pagina, ancla, valor, libre)
+    distintas = {}
+    for ruta_pdf, valores in muestras:
+        distintas.setdefault(huella_archivo(ruta_pdf), (ruta_pdf, valores))
+    for ruta_pdf, valores in distintas.values():
+        with fitz.open(ruta_pdf) as documento:
+            for campo, ancla_texto in anclas.items():
+                valor = (valores.get(campo) or "").strip()
+                if not valor:
+                    continue
+                for pagina in documento:
+                    observacion = observar(pagina, ancla_texto, valor)
+                    if observacion:
+                        observaciones[campo].append((pagina.number, *observacion))
+                        break
+
+    campos = {}
+    for campo, vistas in observaciones.items():
+        if not vistas or len({pagina for pagina, *_ in vistas}) > 1:
+            continue
+        # Todo relativo a la esquina superior izquierda del ancla de cada muestra
+        valores = [valor + (-ancla.x0, -ancla.y0, -ancla.x0, -ancla.y0) for _, ancla, valor, _ in vistas]
+        libres = [libre + (-ancla.x0, -ancla.y0, -ancla.x0, -ancla.y0) for _, ancla, _, libre in vistas]
+        x0 = min(max(libre.x0 for libre in libres), min(valor.x0 for valor in valores) - MARGEN)
+        x1 = max(min(libre.x1 for libre in libres), max(valor.x1 for valor in valores) + MARGEN)
+        y0 = min(valor.y0 for valor in valores) - MARGEN
+        y1 = max(valor.y1 for valor in valores) + MARGEN
+        anclas_vistas = [ancla for _, ancla, _, _ in vistas]
+        caja = fitz.Rect(
+            sum(a.x0 for a in anclas_vistas) / len(vistas), sum(a.y0 for a in anclas_vistas) / len(vistas),
+            sum(a.x1 for a in anclas_vistas) / len(vistas), sum(a.y1 for a in anclas_vistas) / len(vistas),
+        )
+        campos[campo] = {
+            "ancla": anclas[campo],
+            "pagina": vistas[0][0],
+            "caja_ancla": [round(v, 1) for v in caja],
+            "region": [round(v, 1) for v in (x0, y0, x1, y1)],
+        }
+    return Plantilla(tipo, campos, muestras=len(distintas))
+
+
+def observar(pagina, ancla_texto, valor):
+    """(ancla, valor, espacio libre) de un campo en una página, o None.
+
+    De las apariciones del valor se toma la más cercana a un ancla, a su
+    derecha o debajo. El espacio libre es la franja horizontal del valor
+    hasta las palabras vecinas de la misma línea (o el borde de la página).
+    """
+    anclas = pagina.search_for(ancla_texto)
+    valores = pagina.search_for(valor)
+    pares = [
+        (distancia(v, a), a, v) for a in anclas for v in valores
+        if v.x0 >= a.x0 - TOLERANCIA_ANCLA and v.y0 >= a.y0 - MARGEN and not a.contains(v)
+    ]
+    if not pares:
+        return None
+    _, ancla, valor_rect = min(pares, key=lambda par: par[0])
+
+    izquierda, derecha = pagina.rect.x0, pagina.rect.x1
+    for palabra in pagina.get_text("words"):
+        rect = fitz.Rect(palabra[:4])
+        centro_x = (rect.x0 + rect.x1) / 2
+        if rect.y1 <= valor_rect.y0 or rect.y0 >= valor_rect.y1 or valor_rect.x0 <= centro_x <= valor_rect.x1:
+            continue  # otra línea, o una palabra del propio valor
+        if rect.x1 <= valor_rect.x0:
+            izquierda = max(izquierda, rect.x1 + 1)
+        elif rect.x0 >= valor_rect.x1:
+            derecha = min(derecha, rect.x0 - 1)
+    libre = fitz.Rect(izquierda, valor_rect.y0, derecha, valor_rect.y1)
+    return ancla, valor_rect, libre
+
+
+# Plantillas ya cargadas en este proceso, con la fecha de su archivo
+_cargadas = {}
+
+
+def plantilla_vigente(tipo):
+    """Plantilla del tipo para extraer, o None (sin plantilla o si PLANTILLAS_MODO no es "usar").
+
+    Se recarga si el archivo cambió, p. ej. tras un aprendizaje en otro proceso.
+    """
+    if modo_plantillas() != MODO_USAR:
+        return None
+    try:
+        modificada = os.stat(ruta_plantilla(tipo)).st_mtime_ns
+    except OSError:
+        return None
+    if tipo not in _cargadas or _cargadas[tipo][0] != modificada:
+        _cargadas[tipo] = (modificada, Plantilla.cargar(tipo))
+    return _cargadas[tipo][1]
@@ -0,0 +1,30 @@
+import json
+import os
+import time
+
+# ==============================================
+# 📡 EVENTOS DE PROGRESO PARA LA APP
+# ==============================================
+# La app le indica al script, con la variable PROGRESO_ARCHIVO, un archivo
+# donde dejar eventos de progreso (una línea JSON por evento) y los reenvía
+# al navegador mientras el script corre. Sin la variable (ejecución por
+# consola) emitir() no hace nada.
+#
+# Eventos: "inicio" (total, omitidos), "archivo" (indice, total, archivo,
+# duracion, ok, campos) y "fin" (procesados, errores, omitidos).
+VARIABLE_PROGRESO = "PROGRESO_ARCHIVO"
+
+
+def emitir(tipo, **datos):
+    """Agrega un evento al archivo de progreso de la ejecución actual"""
+    ruta = os.environ.get(VARIABLE_PROGRESO)
+    if not ruta:
+        return
+    evento = {"tipo": tipo, "t": round(time.time(), 3), **datos}
+    try:
+        # Una línea completa por write: la app nunca lee media línea como evento
+        with open(ruta, "a", encoding="utf-8") as archivo:
+            archivo.write(json.dumps(evento, ensure_ascii=False, default=str) + "\n")
+    except OSError:
+        # El progreso es informativo: nunca debe interrumpir el procesamiento
+        pass
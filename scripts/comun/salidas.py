@@ -0,0 +1,28 @@
+import os
+from contextlib import contextmanager
+
+# ==============================================
+# 💾 ESCRITURA ATÓMICA DE ARCHIVOS DE SALIDA
+# ==============================================
+# La app publica los resultados con hardlinks (sin copiar bytes). Si un
+# script reescribiera su Excel o PDF en el mismo archivo, cambiaría también
+# la copia publicada de una ejecución anterior. Escribiendo en un temporal
+# y reemplazando, cada ejecución deja un archivo nuevo y lo publicado antes
+# conserva su contenido.
+
+
+@contextmanager
+def escritura_atomica(ruta):
+    """Da una ruta temporal junto a `ruta` y, si no hubo error, la reemplaza por ella.
+
+    El temporal conserva la extensión (pandas elige el motor por ella).
+    """
+    base, extension = os.path.splitext(ruta)
+    temporal = f"{base}.tmp{os.getpid()}{extension}"
+    try:
+        yield temporal
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.unlink(temporal)
+        raise
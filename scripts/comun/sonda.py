@@ -0,0 +1,58 @@
+# ==============================================
+# 🔬 SONDA DE CAPA DE TEXTO POR PÁGINA
+# ==============================================
+# Antes de extraer una página se mira (con fitz, sin render) si tiene una
+# capa de texto real: cuántas letras y números legibles tiene, cuántas
+# fuentes usa y qué fracción de la página cubren imágenes. Una página sin
+# texto legible o casi toda imagen con apenas unas letras (un sello, un
+# encabezado) es un escaneado y va a OCR; una página sin ninguna letra ni
+# imagen ni trazos está en blanco. Así las páginas con texto nunca pagan OCR
+# y las escaneadas ya no salen vacías en silencio. Unas pocas letras sin
+# imagen siguen siendo capa de texto: solo se descarta una capa vacía.
+VERSION_SONDA = 2
+
+TEXTO = "texto"
+OCR = "ocr"
+VACIA = "vacia"
+
+MIN_CARACTERES = 20  # menos letras/números que esto no es una capa de texto
+MIN_CARACTERES_ESCANEO = 200  # una página casi toda imagen necesita más texto que esto
+COBERTURA_ESCANEO = 0.5  # fracción del área de la página cubierta por imágenes
+MIN_TRAZOS_TEXTO = 50  # texto convertido en curvas: muchos trazos, no un marco o una línea
+
+
+def cobertura_imagenes(pagina):
+    """Fracción (0 a 1) del área de la página cubierta por imágenes"""
+    area_pagina = abs(pagina.rect)
+    if not area_pagina:
+        return 0.0
+    cubierta = 0.0
+    for imagen in pagina.get_image_info():
+        recuadro = pagina.rect & imagen["bbox"]
+        if not recuadro.is_empty:
+            cubierta += abs(recuadro)
+    return min(1.0, cubierta / area_pagina)
+
+
+def sondear_pagina(pagina):
+    """Diagnóstico de una página de fitz.
+
+    Devuelve un dict con "caracteres" (letras y números legibles, no los
+    glifos sin Unicode), "fuentes", "cobertura_imagen" y "tipo": TEXTO, OCR
+    o VACIA.
+    """
+    caracteres = sum(1 for c in pagina.get_text("text") if c.isalnum())
+    fuentes = len(pagina.get_fonts())
+    cobertura = cobertura_imagenes(pagina)
+
+    if not fuentes or caracteres < MIN_CARACTERES:
+        # Sin texto: si hay imágenes o trazos (texto convertido en curvas) se lee con OCR
+        if cobertura or len(pagina.get_drawings()) >= MIN_TRAZOS_TEXTO:
+            tipo = OCR
+        else:
+            tipo = TEXTO if caracteres else VACIA
+    elif cobertura >= COBERTURA_ESCANEO and caracteres < MIN_CARACTERES_ESCANEO:
+        tipo = OCR
+    else:
+        tipo = TEXTO
+    return {"caracteres": caracteres, "fuentes": fuentes, "cobertura_imagen": round(cobertura, 3), "tipo": tipo}
@@ -0,0 +1,234 @@
+import glob
+import os
+
+import pandas as pd
+from unidecode import unidecode
+
+# ==============================================
+# 📊 EMPAREJAMIENTO POR TABLAS DE RESULTADOS
+# ==============================================
+# Los scripts 1-4 ya dejan en Excel la fecha, el monto y el nombre de cada
+# documento. En lugar de volver a adivinarlos desde el nombre del archivo,
+# los combinadores pueden unir esas tablas con joins de pandas: monto
+# normalizado con tolerancia y fecha dentro de una ventana de días. Solo
+# los archivos que quedan sin pareja pasan a la heurística de nombres.
+FUENTE_NOMBRES = "nombres"
+FUENTE_TABLAS = "tablas"
+FUENTES = (FUENTE_NOMBRES, FUENTE_TABLAS)
+
+# Puntuación informativa de las parejas encontradas por tabla
+PUNTUACION_TABLA_EXACTA = 100
+PUNTUACION_TABLA_APROXIMADA = 80
+
+
+def fuente_configurada():
+    """De dónde salen los campos para emparejar (variable FUENTE_EMPAREJAMIENTO, "nombres" por defecto)"""
+    fuente = os.environ.get("FUENTE_EMPAREJAMIENTO", FUENTE_NOMBRES).strip().lower()
+    if fuente not in FUENTES:
+        raise ValueError(f"Fuente de emparejamiento desconocida: {fuente} (opciones: {', '.join(FUENTES)})")
+    return fuente
+
+
+def tolerancia_monto():
+    """Diferencia máxima de monto, en pesos (variable TOLERANCIA_MONTO, 1 por defecto)"""
+    return float(os.environ.get("TOLERANCIA_MONTO", 1))
+
+
+def ventana_fecha():
+    """Diferencia máxima de fecha, en días (variable VENTANA_FECHA_DIAS, 3 por defecto)"""
+    return int(os.environ.get("VENTANA_FECHA_DIAS", 3))
+
+
+# ==============================================
+# 📥 LECTURA Y NORMALIZACIÓN
+# ==============================================
+def buscar_tabla(carpetas, patrones):
+    """La tabla más reciente que coincide con algún patrón en la primera carpeta que tenga una"""
+    for carpeta in carpetas:
+        encontradas = []
+        for patron in patrones:
+            encontradas.extend(glob.glob(os.path.join(glob.escape(carpeta), patron)))
+        if encontradas:
+            return max(encontradas, key=os.path.getmtime)
+    return None
+
+
+def carpetas_tabla(carpeta, subcarpeta, carpeta_origen):
+    """Dónde buscar una tabla: la subcarpeta de entrada, la carpeta del combinador
+    y la carpeta de uploads del script que la generó (hermana de la del combinador)"""
+    padre = os.path.dirname(os.path.abspath(carpeta))
+    return [subcarpeta, carpeta, os.path.join(padre, carpeta_origen)]
+
+
+def leer_tabla(ruta):
+    """Lee un Excel; si no lo es (2. FC MUISKA guarda CSV con extensión .xlsx), lo lee como CSV"""
+    try:
+        return pd.read_excel(ruta)
+    except Exception:
+        return pd.read_csv(ruta, encoding="utf-8")
+
+
+def cargar_tabla(carpetas, especificacion, etiqueta):
+    """Busca y lee la tabla descrita por `especificacion`; None (con aviso) si falta o no sirve"""
+    ruta = buscar_tabla(carpetas, especificacion["patrones"])
+    if not ruta:
+        print(f"⚠️ Tabla {etiqueta} no encontrada ({', '.join(especificacion['patrones'])})")
+        return None
+    try:
+        df = leer_tabla(ruta)
+    except Exception as e:
+        print(f"⚠️ No se pudo leer la tabla {etiqueta} {ruta}: {e}")
+        return None
+    faltantes = [especificacion[campo] for campo in ("monto", "fecha", "nombre") if especificacion[campo] not in df.columns]
+    if faltantes:
+        print(f"⚠️ A la tabla {etiqueta} le faltan columnas: {', '.join(faltantes)}")
+        return None
+    print(f"📊 Tabla {etiqueta}: {ruta} ({len(df)} filas)")
+    return df
+
+
+def normalizar_montos(serie):
+    return pd.to_numeric(serie, errors="coerce").round(2)
+
+
+def normalizar_fechas(serie):
+    """Fechas d/m/Y, d-m-Y o Y-m-d (con o sin hora) a datetime; lo demás queda NaT"""
+    texto = serie.astype(str).str.strip().str.replace("/", "-", regex=False)
+    iso = texto.str.match(r"^\d{4}-")
+    dia_primero = pd.to_datetime(texto.where(~iso), format="%d-%m-%Y", errors="coerce")
+    anio_primero = pd.to_datetime(texto.where(iso).str.slice(0, 10), format="%Y-%m-%d", errors="coerce")
+    return dia_primero.fillna(anio_primero)
+
+
+# Sufijos societarios que cambian entre el ERP y los soportes ("S.A.S.", "LTDA", ...)
+SUFIJOS_SOCIETARIOS = r"\b(?:S ?A ?S|S ?A|LTDA|E ?U|S ?EN ?C)\b"
+
+
+def normalizar_nombres(serie):
+    texto = serie.fillna("").astype(str).map(unidecode).str.upper()
+    texto = texto.str.replace(r"[^A-Z0-9]+", " ", regex=True)
+    return texto.str.replace(SUFIJOS_SOCIETARIOS, " ", regex=True).str.split().str.join(" ")
+
+
+def preparar_tabla(df, especificacion, archivos):
+    """Filas de la tabla que corresponden a un archivo de la carpeta, con campos normalizados.
+
+    `especificacion` indica las columnas "monto", "fecha", "nombre" y en
+    "archivo" las que tienen el nombre del PDF, en orden de preferencia.
+    Devuelve un DataFrame con indice (posición en `archivos`), monto, fecha y nombre.
+    """
+    posiciones = {archivo["nombre_archivo"]: k for k, archivo in enumerate(archivos)}
+    indice = pd.Series(float("nan"), index=df.index)
+    for columna in especificacion["archivo"]:
+        if columna in df.columns:
+            indice = indice.fillna(df[columna].astype(str).str.strip().map(posiciones))
+
+    tabla = pd.DataFrame({
+        "indice": indice,
+        "monto": normalizar_montos(df[especificacion["monto"]]),
+        "fecha": normalizar_fechas(df[especificacion["fecha"]]),
+        "nombre": normalizar_nombres(df[especificacion["nombre"]]),
+    })
+    tabla = tabla.dropna(subset=["indice", "monto", "fecha"])
+    tabla["indice"] = tabla["indice"].astype(int)
+    return tabla.drop_duplicates("indice").reset_index(drop=True)
+
+
+# ==============================================
+# 🔗 JOIN POR MONTO Y FECHA
+# ==============================================
+def seleccionar_unicos(candidatos):
+    """Parejas uno a uno tomando primero las mejores filas (candidatos ya ordenados)"""
+    elegidos = []
+    while not candidatos.empty:
+        ronda = candidatos.drop_duplicates("indice_erp").drop_duplicates("indice_soporte")
+        elegidos.append(ronda)
+        candidatos = candidatos[
+            ~candidatos["indice_erp"].isin(ronda["indice_erp"])
+            & ~candidatos["indice_soporte"].isin(ronda["indice_soporte"])
+        ]
+    if not elegidos:
+        return candidatos
+    return pd.concat(elegidos).sort_values("indice_erp").reset_index(drop=True)
+
+
+def unir_tablas(erp, soporte, tolerancia=None, ventana=None):
+    """Parejas (indice_erp, indice_soporte, diferencias) con monto y fecha compatibles.
+
+    Los montos se agrupan en cubetas del ancho de la tolerancia y se unen
+    con la cubeta propia y las vecinas (tres hash joins), así ningún par
+    dentro de la tolerancia queda fuera. Se prefiere la menor diferencia de
+    monto, luego el mismo nombre y luego la menor diferencia de fecha.
+    """
+    tolerancia = tolerancia_monto() if tolerancia is None else tolerancia
+    ventana = ventana_fecha() if ventana is None else ventana
+    ancho = max(tolerancia, 0.01)
+
+    erp = erp.assign(cubeta=(erp["monto"] // ancho).astype("int64"))
+    soporte = soporte.assign(cubeta=(soporte["monto"] // ancho).astype("int64"))
+    uniones = [
+        erp.merge(soporte.assign(cubeta=soporte["cubeta"] + desplazamiento), on="cubeta", suffixes=("_erp", "_soporte"))
+        for desplazamiento in (-1, 0, 1)
+    ]
+    candidatos = pd.concat(uniones, ignore_index=True)
+
+    candidatos["dif_monto"] = (candidatos["monto_erp"] - candidatos["monto_soporte"]).abs().round(2)
+    candidatos["dif_dias"] = (candidatos["fecha_erp"] - candidatos["fecha_soporte"]).abs().dt.days
+    candidatos["otro_nombre"] = candidatos["nombre_erp"] != candidatos["nombre_soporte"]
+    candidatos = candidatos[(candidatos["dif_monto"] <= tolerancia) & (candidatos["dif_dias"] <= ventana)]
+    candidatos = candidatos.sort_values(
+        ["dif_monto", "otro_nombre", "dif_dias", "indice_erp", "indice_soporte"], kind="stable"
+    )
+    return seleccionar_unicos(candidatos)
+
+
+def criterios_tabla(fila):
+    criterios = [f"Tabla: monto {fila.monto_erp:,.2f}", f"fecha {fila.fecha_erp:%Y-%m-%d}"]
+    if fila.dif_monto:
+        criterios[0] += f" (Δ {fila.dif_monto:,.2f})"
+    if fila.dif_dias:
+        criterios[1] += f" (Δ {fila.dif_dias} días)"
+    if not fila.otro_nombre:
+        criterios.append(f"nombre {fila.nombre_erp}")
+    return criterios
+
+
+def emparejar_con_tablas(archivos_erp, archivos_soporte, tabla_erp, tabla_soporte, heuristica,
+                         tolerancia=None, ventana=None):
+    """Empareja por las tablas de resultados y deja el resto a `heuristica`.
+
+    `tabla_erp` y `tabla_soporte` son (DataFrame o None, especificación). La
+    heurística recibe las listas de archivos sobrantes y devuelve
+    coincidencias con índices relativos a ellas. Devuelve las coincidencias
+    (mismo formato que encontrar_coincidencias_precisas) y cuántas salieron
+    de cada fuente.
+    """
+    coincidencias = []
+    if tabla_erp[0] is not None and tabla_soporte[0] is not None:
+        erp = preparar_tabla(tabla_erp[0], tabla_erp[1], archivos_erp)
+        soporte = preparar_tabla(tabla_soporte[0], tabla_soporte[1], archivos_soporte)
+        for fila in unir_tablas(erp, soporte, tolerancia, ventana).itertuples(index=False):
+            exacta = not fila.dif_monto and not fila.dif_dias
+            coincidencias.append({
+                'archivo_erp': archivos_erp[fila.indice_erp],
+                'archivo_soporte': archivos_soporte[fila.indice_soporte],
+                'puntuacion': PUNTUACION_TABLA_EXACTA if exacta else PUNTUACION_TABLA_APROXIMADA,
+                'criterios': criterios_tabla(fila),
+                'indice_erp': int(fila.indice_erp),
+                'indice_soporte': int(fila.indice_soporte),
+            })
+    por_tabla = len(coincidencias)
+
+    # Sobrantes: heurística de nombres de archivo
+    usados_erp = {c['indice_erp'] for c in coincidencias}
+    usados_soporte = {c['indice_soporte'] for c in coincidencias}
+    restantes_erp = [i for i in range(len(archivos_erp)) if i not in usados_erp]
+    restantes_soporte = [j for j in range(len(archivos_soporte)) if j not in usados_soporte]
+    for coincidencia in heuristica([archivos_erp[i] for i in restantes_erp],
+                                   [archivos_soporte[j] for j in restantes_soporte]):
+        coincidencia['indice_erp'] = restantes_erp[coincidencia['indice_erp']]
+        coincidencia['indice_soporte'] = restantes_soporte[coincidencia['indice_soporte']]
+        coincidencias.append(coincidencia)
+
+    coincidencias.sort(key=lambda c: c['indice_erp'])
+    return coincidencias, {"por_tabla": por_tabla, "por_nombre": len(coincidencias) - por_tabla}
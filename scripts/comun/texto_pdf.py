@@ -0,0 +1,264 @@
+import hashlib
+import os
+import re
+
+import pdfplumber
+
+from comun.cache import CARPETA_CACHE, CacheLRU
+from comun.sonda import TEXTO, VACIA, VERSION_SONDA, sondear_pagina
+
+# ==============================================
+# 📄 TEXTO POR PÁGINA CON CACHÉ POR CONTENIDO
+# ==============================================
+# La clave es el SHA-256 del archivo más el backend y su versión: un PDF
+# idéntico a uno ya procesado (aunque tenga otro nombre) no se vuelve a leer.
+BACKEND_POR_DEFECTO = "pdfplumber"
+
+cache_texto = CacheLRU(
+    os.path.join(CARPETA_CACHE, "texto_paginas.sqlite"),
+    max_bytes=int(float(os.environ.get("CACHE_PDF_MAX_MB", 256)) * 1024 * 1024),
+)
+
+
+# ==============================================
+# 🔌 BACKENDS DE EXTRACCIÓN DE TEXTO
+# ==============================================
+class BackendPdfplumber:
+    """Extractor original: lento pero es la referencia de los patrones"""
+
+    nombre = "pdfplumber"
+
+    @property
+    def version(self):
+        return f"pdfplumber-{pdfplumber.__version__}"
+
+    def abrir(self, ruta_pdf):
+        return pdfplumber.open(ruta_pdf)
+
+    def total_paginas(self, documento):
+        return len(documento.pages)
+
+    def texto_pagina(self, documento, indice):
+        return documento.pages[indice].extract_text() or ""
+
+    def cerrar(self, documento):
+        documento.close()
+
+
+class BackendPyMuPDF:
+    """Extractor con fitz (PyMuPDF), varias veces más rápido en facturas de texto.
+
+    El texto se ordena por posición y se normaliza al formato de pdfplumber
+    (un espacio entre palabras, sin líneas vacías) para que los mismos
+    patrones sigan funcionando.
+    """
+
+    nombre = "pymupdf"
+
+    @property
+    def version(self):
+        import fitz
+        return f"pymupdf-{fitz.VersionBind}"
+
+    def abrir(self, ruta_pdf):
+        import fitz
+        return fitz.open(ruta_pdf)
+
+    def total_paginas(self, documento):
+        return documento.page_count
+
+    def texto_pagina(self, documento, indice):
+        texto = documento[indice].get_text("text", sort=True)
+        lineas = (re.sub(r"[ \t\xa0]+", " ", linea).strip() for linea in texto.splitlines())
+        return "\n".join(linea for linea in lineas if linea)
+
+    def cerrar(self, documento):
+        documento.close()
+
+
+BACKENDS = {
+    BackendPdfplumber.nombre: BackendPdfplumber(),
+    BackendPyMuPDF.nombre: BackendPyMuPDF(),
+}
+
+
+def obtener_backend(nombre=None):
+    """Backend por nombre; sin nombre usa PDF_TEXTO_BACKEND o pdfplumber"""
+    nombre = (nombre or os.environ.get("PDF_TEXTO_BACKEND") or BACKEND_POR_DEFECTO).strip().lower()
+    if nombre in ("fitz", "mupdf"):
+        nombre = BackendPyMuPDF.nombre
+    if nombre not in BACKENDS:
+        raise ValueError(f"Backend de texto desconocido: {nombre} (opciones: {', '.join(BACKENDS)})")
+    return BACKENDS[nombre]
+
+
+def backend_configurado(variable):
+    """Nombre del backend para un script: su variable propia o la global"""
+    return os.environ.get(variable) or os.environ.get("PDF_TEXTO_BACKEND") or BACKEND_POR_DEFECTO
+
+
+def extraccion_incremental():
+    """Si los scripts dejan de leer páginas al resolver todos sus campos.
+
+    Desactivado por defecto: con la salida temprana gana la primera página
+    que resuelve cada campo, y no la prioridad de patrones (MUISKA) ni la
+    última página (ERP) de la lectura completa. EXTRACCION_INCREMENTAL=1 la
+    activa para lotes donde la velocidad importa más que esos casos.
+    """
+    return os.environ.get("EXTRACCION_INCREMENTAL", "0").strip().lower() in ("1", "si", "sí", "true")
+
+
+def ocr_automatico():
+    """Si las páginas escaneadas se leen con OCR (variable OCR_AUTOMATICO, activa por defecto)"""
+    return os.environ.get("OCR_AUTOMATICO", "1").strip().lower() not in ("0", "no", "false")
+
+
+def firma_extraccion(variable):
+    """Firma para el manifiesto: backend de texto, versión de la sonda y si hay OCR de escaneados"""
+    firma = f"{backend_configurado(variable)}+sonda{VERSION_SONDA}"
+    return f"{firma}+ocr" if ocr_automatico() else firma
+
+
+# Conteo de páginas por forma de lectura (ver textos_paginas)
+CONTADORES_PAGINAS = ("paginas_texto", "paginas_ocr", "paginas_vacias", "paginas_ocr_fallidas")
+
+
+def sumar_paginas(conteos):
+    """Suma los contadores de páginas de varios dicts (uno por PDF)"""
+    return {contador: sum(conteo.get(contador, 0) for conteo in conteos) for contador in CONTADORES_PAGINAS}
+
+
+def resumen_paginas(conteo):
+    """Texto corto con las páginas leídas por texto y por OCR"""
+    texto = f"{conteo['paginas_texto']} con texto / {conteo['paginas_ocr']} por OCR"
+    if conteo["paginas_vacias"]:
+        texto += f" / {conteo['paginas_vacias']} en blanco"
+    if conteo["paginas_ocr_fallidas"]:
+        texto += f" ({conteo['paginas_ocr_fallidas']} escaneada(s) sin leer)"
+    return texto
+
+
+def huella_archivo(ruta, tamano_bloque=1024 * 1024):
+    """SHA-256 del contenido del archivo, leído por bloques"""
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(tamano_bloque), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def texto_ocr(ruta_pdf, indice):
+    """Texto OCR de una página con el formato de los backends (líneas limpias, sin vacías)"""
+    # Importación diferida: comun.ocr usa huella_archivo de este módulo
+    from comun.ocr import ocr_paginas
+
+    resultado = ocr_paginas([(ruta_pdf, indice)], workers=1)[0]
+    if resultado["error"]:
+        raise RuntimeError(resultado["error"])
+    return "\n".join(resultado["lineas"])
+
+
+def textos_paginas(ruta_pdf, backend=None, progreso=None):
+    """Genera el texto de cada página, leyendo de la caché cuando es posible.
+
+    `backend` es un nombre ("pdfplumber" o "pymupdf"); por defecto se usa
+    PDF_TEXTO_BACKEND. El PDF solo se abre si alguna página no está en
+    caché. Cada página nueva pasa antes por la sonda (comun.sonda): las que
+    tienen capa de texto van al backend, las escaneadas a OCR (si
+    OCR_AUTOMATICO está activo) y las en blanco entregan texto vacío. De una
+    escaneada con algo de capa de texto (un sello, un encabezado) también se
+    guarda esa capa: si el OCR falla o no lee nada se entrega la capa. Si una
+    página falla se avisa y se entrega texto vacío (sin guardarlo en caché).
+    Si se pasa un dict en `progreso` se llenan "paginas_total",
+    "paginas_leidas" y los CONTADORES_PAGINAS, útil cuando quien consume
+    deja de iterar antes de la última página.
+    """
+    if progreso is None:
+        progreso = {}
+    progreso.setdefault("paginas_total", 0)
+    progreso.setdefault("paginas_leidas", 0)
+    for contador in CONTADORES_PAGINAS:
+        progreso.setdefault(contador, 0)
+    extractor = obtener_backend(backend)
+    prefijo = f"{huella_archivo(ruta_pdf)}:{extractor.version}:sonda{VERSION_SONDA}"
+    pdf = None
+    paginas_fitz = None
+    try:
+        total_paginas = cache_texto.obtener(f"{prefijo}:paginas")
+        if total_paginas is None:
+            pdf = extractor.abrir(ruta_pdf)
+            total_paginas = extractor.total_paginas(pdf)
+            cache_texto.guardar(f"{prefijo}:paginas", total_paginas)
+        progreso["paginas_total"] = total_paginas
+
+        for i in range(total_paginas):
+            progreso["paginas_leidas"] = i + 1
+            # En caché: el texto de una página con capa de texto, o {"tipo": ..., "capa": ...} si es
+            # escaneada (con la capa de texto que tenga) o en blanco
+            valor = cache_texto.obtener(f"{prefijo}:{i}")
+            if valor is None:
+                try:
+                    if paginas_fitz is None:
+                        import fitz
+                        paginas_fitz = fitz.open(ruta_pdf)
+                    sonda = sondear_pagina(paginas_fitz[i])
+                    if sonda["tipo"] == VACIA:
+                        valor = {"tipo": VACIA}
+                    else:
+                        if pdf is None:
+                            pdf = extractor.abrir(ruta_pdf)
+                        texto = extractor.texto_pagina(pdf, i)
+                        valor = texto if sonda["tipo"] == TEXTO else {"tipo": sonda["tipo"], "capa": texto}
+                except Exception as e:
+                    print(f"    ⚠ Error en página {i+1}: {str(e)}")
+                    yield ""
+                    continue
+                cache_texto.guardar(f"{prefijo}:{i}", valor)
+
+            if isinstance(valor, str):
+                progreso["paginas_texto"] += 1
+                yield valor
+            elif valor["tipo"] == VACIA:
+                progreso["paginas_vacias"] += 1
+                yield ""
+            else:
+                yield leer_escaneada(ruta_pdf, i, progreso, valor.get("capa", ""))
+    finally:
+        if pdf is not None:
+            extractor.cerrar(pdf)
+        if paginas_fitz is not None:
+            paginas_fitz.close()
+
+
+def leer_escaneada(ruta_pdf, indice, progreso, capa=""):
+    """Texto OCR de una página escaneada.
+
+    Si el OCR está desactivado, falla o no lee nada se entrega la `capa` de
+    texto de la página (y cuenta en paginas_texto). Si el OCR no pudo correr
+    se avisa y cuenta en paginas_ocr_fallidas, haya capa o no, para que el
+    script vuelva a intentarlo cuando haya OCR.
+    """
+    texto = ""
+    motivo = None
+    if not ocr_automatico():
+        motivo = "OCR_AUTOMATICO desactivado"
+    else:
+        try:
+            texto = texto_ocr(ruta_pdf, indice)
+        except Exception as e:
+            motivo = str(e)
+    if motivo:
+        progreso["paginas_ocr_fallidas"] += 1
+        respaldo = "; se usa su capa de texto" if capa.strip() else ""
+        print(f"    ⚠ Página {indice+1} escaneada sin leer: {motivo}{respaldo}")
+    if not texto.strip() and capa.strip():
+        progreso["paginas_texto"] += 1
+        return capa
+    progreso["paginas_ocr"] += 1
+    return texto
+
+
+def resumen_cache():
+    """Texto corto con aciertos y fallos de la caché en esta ejecución"""
+    estadisticas = cache_texto.estadisticas()
+    return f"{estadisticas['aciertos']} aciertos / {estadisticas['fallos']} fallos"
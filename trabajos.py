@@ -0,0 +1,126 @@
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# ==============================================
+# 🧵 COLA DE TRABAJOS EN SEGUNDO PLANO
+# ==============================================
+ESTADO_EN_COLA = "en_cola"
+ESTADO_EJECUTANDO = "ejecutando"
+ESTADO_COMPLETADO = "completado"
+ESTADO_ERROR = "error"
+
+ESTADOS_FINALES = (ESTADO_COMPLETADO, ESTADO_ERROR)
+
+# Eventos de progreso que se conservan por trabajo (los más viejos se descartan)
+MAX_EVENTOS = 2000
+
+
+class Trabajo:
+    """Estado de una ejecución encolada de un script"""
+
+    def __init__(self, script, trabajo_id=None):
+        self.id = trabajo_id or uuid.uuid4().hex
+        self.script = script
+        self.estado = ESTADO_EN_COLA
+        self.creado = time.time()
+        self.inicio = None
+        self.fin = None
+        self.resultado = {}
+        self.error = None
+        self.eventos = []
+        self._ultimo_evento = -1
+        self._condicion = threading.Condition()
+
+    @property
+    def terminado(self):
+        return self.estado in ESTADOS_FINALES
+
+    def publicar(self, evento):
+        """Agrega un evento de progreso (dict con "tipo") y despierta a quien lo espera"""
+        with self._condicion:
+            self._ultimo_evento += 1
+            self.eventos.append({"id": self._ultimo_evento, "t": round(time.time(), 3), **evento})
+            del self.eventos[:-MAX_EVENTOS]
+            self._condicion.notify_all()
+
+    def eventos_desde(self, ultimo_id, timeout=None):
+        """Eventos con id mayor que `ultimo_id`; espera hasta `timeout` si todavía no hay"""
+        with self._condicion:
+            self._condicion.wait_for(lambda: self._ultimo_evento > ultimo_id, timeout)
+            return [evento for evento in self.eventos if evento["id"] > ultimo_id]
+
+    def a_dict(self):
+        """Resumen serializable del trabajo (sin la salida completa)"""
+        duracion = None
+        if self.inicio:
+            duracion = round((self.fin or time.time()) - self.inicio, 2)
+        return {
+            "job_id": self.id,
+            "script": self.script,
+            "estado": self.estado,
+            "creado": self.creado,
+            "inicio": self.inicio,
+            "fin": self.fin,
+            "duracion_segundos": duracion,
+            "message": self.resultado.get("message"),
+            "error": self.error,
+            "success": self.resultado.get("success", False) if self.terminado else None,
+        }
+
+
+class ColaTrabajos:
+    """Ejecuta trabajos en un pool acotado de hilos y conserva su estado"""
+
+    def __init__(self, max_trabajos=1, max_historial=200):
+        self._executor = ThreadPoolExecutor(max_workers=max_trabajos, thread_name_prefix="trabajo")
+        self._trabajos = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_historial = max_historial
+
+    def encolar(self, script, funcion, *args, trabajo_id=None):
+        """Registra el trabajo y lo envía al pool; devuelve de inmediato.
+
+        `trabajo_id` permite fijar el id de antemano (p. ej. para pasárselo a `funcion`).
+        """
+        trabajo = Trabajo(script, trabajo_id)
+        trabajo.publicar({"tipo": "estado", "estado": ESTADO_EN_COLA})
+        with self._lock:
+            self._trabajos[trabajo.id] = trabajo
+            self._podar_historial()
+        self._executor.submit(self._ejecutar, trabajo, funcion, args)
+        return trabajo
+
+    def obtener(self, trabajo_id):
+        with self._lock:
+            return self._trabajos.get(trabajo_id)
+
+    def _ejecutar(self, trabajo, funcion, args):
+        trabajo.estado = ESTADO_EJECUTANDO
+        trabajo.inicio = time.time()
+        trabajo.publicar({"tipo": "estado", "estado": ESTADO_EJECUTANDO})
+        try:
+            trabajo.resultado = funcion(*args) or {}
+            trabajo.estado = ESTADO_COMPLETADO
+        except Exception as e:
+            traceback.print_exc()
+            trabajo.error = str(e)
+            trabajo.estado = ESTADO_ERROR
+        finally:
+            trabajo.fin = time.time()
+            # Último evento del trabajo: quien sigue el progreso puede cerrar la conexión
+            trabajo.publicar({
+                "tipo": "estado", "estado": trabajo.estado,
+                "message": trabajo.resultado.get("message"), "error": trabajo.error
+            })
+
+    def _podar_historial(self):
+        """Descarta los trabajos terminados más antiguos cuando hay demasiados"""
+        sobrantes = len(self._trabajos) - self.max_historial
+        if sobrantes <= 0:
+            return
+        for trabajo_id in [t.id for t in self._trabajos.values() if t.terminado][:sobrantes]:
+            del self._trabajos[trabajo_id]